@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from technova_attrition.cleaning import drop_constant_columns, safe_divide
+from technova_attrition.data_io import EVAL_DTYPES, SIRH_DTYPES, SONDAGE_DTYPES
+from technova_attrition.features import add_engineered_features
+from technova_attrition.synthetic import make_joined
+
+# versions d'origine de cleaning.yes_no_to_int / percent_to_ratio (avant les tables de
+# normalization) : la référence mesure le code de départ, pas l'implémentation courante
+_YES_SET = {"Y", "OUI", "Oui", "oui", "o", "yes", "y", "true", "1"}
+_NO_SET = {"N", "NON", "Non", "non", "n", "no", "false", "0"}
+
+
+def _yes_no_to_int(series: pd.Series) -> pd.Series:
+    s = series.astype(str).str.strip().str.lower()
+    out = pd.Series(pd.NA, index=series.index, dtype="Int64")
+    out[s.isin(_YES_SET)] = 1
+    out[s.isin(_NO_SET)] = 0
+    return out
+
+
+def _percent_to_ratio(series: pd.Series) -> np.ndarray:
+    s = series.astype(str).str.strip()
+    s = s.replace({"nan": np.nan, "None": np.nan})
+    s = s.str.replace("%", "", regex=False)
+    s = pd.to_numeric(s, errors="coerce")
+    return np.where(s > 1, s / 100.0, s)
+
+
+def reference_add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Implémentation d'origine (copies + pd.to_numeric répétés), gardée comme référence."""
+    out = df.copy()
+    if "a_quitte_l_entreprise" in out.columns:
+        out["a_quitte_l_entreprise"] = _yes_no_to_int(out["a_quitte_l_entreprise"])
+    if "heure_supplementaires" in out.columns:
+        out["heure_supplementaires"] = _yes_no_to_int(out["heure_supplementaires"])
+    if "augmentation_salaire_precedente" in out.columns:
+        out["augmentation_salaire_precedente"] = _percent_to_ratio(
+            out["augmentation_salaire_precedente"]
+        )
+    if "genre" in out.columns:
+        g = out["genre"].astype(str).str.strip().str.upper()
+        if set(g.dropna().unique()).issubset({"F", "M"}):
+            out["genre"] = g.map({"F": 0, "M": 1}).astype("Int64")
+    out = drop_constant_columns(out, candidates=["nombre_heures_travailless", "ayant_enfants"])
+    if {"annees_dans_l_entreprise", "annees_dans_le_poste_actuel"}.issubset(out.columns):
+        out["changement_poste"] = (
+            pd.to_numeric(out["annees_dans_l_entreprise"], errors="coerce")
+            > pd.to_numeric(out["annees_dans_le_poste_actuel"], errors="coerce")
+        ).astype("Int64")
+    exp_col = "nombre_experiences_precedentes"
+    out["proba_chgt_experience_par_an"] = safe_divide(out[exp_col], out["annee_experience_totale"])
+    adult_years = pd.to_numeric(out["age"], errors="coerce") - 18
+    out["proba_chgt_experience_par_an_adulte"] = safe_divide(out[exp_col], adult_years)
+    adult_years = pd.to_numeric(out["age"], errors="coerce") - 18
+    out["ratio_experience_vie_adulte"] = safe_divide(out["annee_experience_totale"], adult_years)
+    out["evolution_note"] = pd.to_numeric(
+        out["note_evaluation_actuelle"], errors="coerce"
+    ) - pd.to_numeric(out["note_evaluation_precedente"], errors="coerce")
+    return out
+
+
+def _measure(fn, repeat: int) -> dict[str, float]:
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"best_s": round(min(times), 4), "peak_mb": round(peak / 1e6, 1)}
+
+
+def run(n_rows: int, repeat: int, seed: int) -> dict:
+    raw = make_joined(n_rows, seed)
+    # même frame, typé comme par data_io (catégories / entiers compacts)
+    schema = {**SIRH_DTYPES, **EVAL_DTYPES, **SONDAGE_DTYPES}
+    typed = raw.astype({c: t for c, t in schema.items() if c in raw.columns})
+
+    # garde-fou : même résultat que l'implémentation de référence
+    pd.testing.assert_frame_equal(
+        reference_add_engineered_features(raw.head(10_000)),
+        add_engineered_features(raw.head(10_000)),
+    )
+
+    results = {"n_rows": n_rows, "repeat": repeat, "cases": {}}
+    for label, frame in [("raw", raw), ("typed", typed)]:
+        results["cases"][label] = {
+            "reference": _measure(lambda: reference_add_engineered_features(frame), repeat),
+            "copy": _measure(lambda: add_engineered_features(frame), repeat),
+            # copie préparée hors chrono : on mesure le mode en place seul
+            "inplace": _measure(
+                lambda copies=[frame.copy() for _ in range(repeat)]: add_engineered_features(
+                    copies.pop(), copy=False
+                ),
+                repeat,
+            ),
+        }
+        case = results["cases"][label]
+        ref = case["reference"]["best_s"]
+        for mode in ("copy", "inplace"):
+            case[mode]["speedup"] = round(ref / case[mode]["best_s"], 2)
+    return results
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark de add_engineered_features.")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", type=Path, help="Fichier JSON de résultats (optionnel)")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    results = run(args.rows, args.repeat, args.seed)
+
+    for label, case in results["cases"].items():
+        for mode, m in case.items():
+            extra = f"  x{m['speedup']}" if "speedup" in m else ""
+            print(f"{label:6s} {mode:10s} {m['best_s']:8.3f}s  {m['peak_mb']:8.1f} MB{extra}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"✅ Résultats: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
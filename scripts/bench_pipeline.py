@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from technova_attrition.data_io import join_sources, load_eval, load_sirh, load_sondage
+from technova_attrition.features import add_engineered_features
+from technova_attrition.modeling import make_logreg, make_random_forest
+from technova_attrition.preprocessing import build_preprocessor, make_feature_groups
+from technova_attrition.synthetic import make_raw_sources
+
+TARGET = "a_quitte_l_entreprise"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+STAGES = [
+    "load_sirh",
+    "load_eval",
+    "load_sondage",
+    "join_sources",
+    "add_engineered_features",
+    "preprocess_fit_transform",
+    "fit_logreg",
+    "fit_random_forest",
+]
+
+
+def _measure(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, dict[str, float]]:
+    """Une exécution chronométrée + pic mémoire Python/NumPy (tracemalloc) ; renvoie le résultat."""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        out = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return out, {"seconds": round(elapsed, 4), "peak_mb": round(peak / 1e6, 1)}
+
+
+def write_sources(n: int, seed: int, directory: Path) -> dict[str, Path]:
+    """
+    Extraits synthétiques au format des CSV bruts. Évaluations et sondage sont mélangés :
+    la jointure ne profite pas de clés déjà alignées comme dans make_joined.
+    """
+    sirh, eval_df, sondage = make_raw_sources(n, seed)
+    rng = np.random.default_rng(seed + 1)
+    paths = {
+        "sirh": directory / "extrait_sirh.csv",
+        "eval": directory / "extrait_eval.csv",
+        "sondage": directory / "extrait_sondage.csv",
+    }
+    sirh.to_csv(paths["sirh"], index=False)
+    eval_df.take(rng.permutation(n)).to_csv(paths["eval"], index=False)
+    sondage.take(rng.permutation(n)).to_csv(paths["sondage"], index=False)
+    return paths
+
+
+def run_size(
+    n: int,
+    seed: int,
+    stages: list[str],
+    fit_max_rows: dict[str, int],
+    engine: str,
+    workdir: Path,
+) -> dict[str, dict[str, Any]]:
+    paths = write_sources(n, seed, workdir)
+    results: dict[str, dict[str, Any]] = {}
+
+    # valeurs passées en arguments (pas de closure) : les `del` libèrent bien la mémoire
+    def _stage(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if name not in stages:
+            # étape non demandée : exécutée (les suivantes en dépendent) hors mesure
+            return fn(*args, **kwargs)
+        out, results[name] = _measure(fn, *args, **kwargs)
+        m = results[name]
+        print(f"{n:>10,d} {name:26s} {m['seconds']:9.3f}s {m['peak_mb']:9.1f} MB")
+        return out
+
+    sirh = _stage("load_sirh", load_sirh, paths["sirh"], engine=engine)
+    eval_df = _stage("load_eval", load_eval, paths["eval"], engine=engine)
+    sondage = _stage("load_sondage", load_sondage, paths["sondage"], engine=engine)
+    df = _stage("join_sources", join_sources, sirh, eval_df, sondage)
+    del sirh, eval_df, sondage
+    df = _stage("add_engineered_features", add_engineered_features, df, copy=False)
+
+    X = df.drop(columns=[TARGET])
+    y = df[TARGET].astype(int).to_numpy()
+    groups = make_feature_groups(df, target=TARGET)
+    del df
+    Xt = _stage("preprocess_fit_transform", build_preprocessor(groups).fit_transform, X)
+    del X
+
+    # modèles seuls sur la matrice préprocessée : Pipeline.fit = étape précédente + celle-ci
+    models = {"fit_logreg": make_logreg, "fit_random_forest": make_random_forest}
+    for name, factory in models.items():
+        if name not in stages:
+            continue
+        if n > fit_max_rows[name]:
+            results[name] = {"skipped": f"n > {fit_max_rows[name]}"}
+            print(f"{n:>10,d} {name:26s} ignoré (> {fit_max_rows[name]:,d} lignes)")
+            continue
+        clf = factory(groups).named_steps["model"]
+        _stage(name, clf.fit, Xt, y)
+
+    for p in paths.values():
+        p.unlink()
+    return results
+
+
+def run(
+    sizes: list[int],
+    seed: int,
+    stages: list[str],
+    fit_max_rows: dict[str, int],
+    engine: str,
+) -> dict[str, Any]:
+    report: dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "seed": seed,
+            "csv_engine": engine,
+            "fit_max_rows": fit_max_rows,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+        },
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        for n in sizes:
+            report["sizes"][str(n)] = run_size(n, seed, stages, fit_max_rows, engine, Path(tmp))
+    return report
+
+
+def to_markdown(report: dict[str, Any]) -> str:
+    """Tableau étape x taille : `secondes s / pic MB` (— : étape ignorée)."""
+    sizes = list(report["sizes"])
+    stages = [s for s in STAGES if any(s in report["sizes"][n] for n in sizes)]
+    lines = [
+        "# Benchmark pipeline offline",
+        "",
+        f"Généré le {report['meta']['created_at']} — moteur CSV `{report['meta']['csv_engine']}`, "
+        f"pandas {report['meta']['pandas']}, Python {report['meta']['python']}.",
+        "",
+        "| Étape | " + " | ".join(f"{int(n):,d} lignes" for n in sizes) + " |",
+        "|---|" + "---|" * len(sizes),
+    ]
+    for stage in stages:
+        cells = []
+        for n in sizes:
+            m = report["sizes"][n].get(stage)
+            if m is None or "skipped" in m:
+                cells.append("—")
+            else:
+                cells.append(f"{m['seconds']:.3f} s / {m['peak_mb']:.0f} MB")
+        lines.append(f"| `{stage}` | " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v.replace("_", "")) for v in value.split(",") if v]
+
+
+def _stage_list(value: str) -> list[str]:
+    stages = [v for v in value.split(",") if v]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"étapes inconnues: {sorted(unknown)}")
+    return stages
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Benchmark du pipeline offline (chargement -> features -> fit)."
+    )
+    p.add_argument("--rows", type=_int_list, default=DEFAULT_SIZES, help="ex: 10000,100000")
+    p.add_argument("--stages", type=_stage_list, default=list(STAGES))
+    # au-delà, le fit est ignoré (forêt de 400 arbres : ~1 min à 100k lignes, linéaire au mieux)
+    p.add_argument("--logreg-max-rows", type=int, default=10_000_000)
+    p.add_argument("--rf-max-rows", type=int, default=100_000)
+    p.add_argument("--csv-engine", choices=["c", "pyarrow"], default="c")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", type=Path, default=Path("reports/bench_pipeline.json"))
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    fit_max_rows = {"fit_logreg": args.logreg_max_rows, "fit_random_forest": args.rf_max_rows}
+    report = run(args.rows, args.seed, args.stages, fit_max_rows, args.csv_engine)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    md_path = args.output.with_suffix(".md")
+    md_path.write_text(to_markdown(report), encoding="utf-8")
+    print(f"✅ Rapport: {args.output} / {md_path}")
+
+
+if __name__ == "__main__":
+    main()
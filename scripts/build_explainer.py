@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from technova_attrition.config import PATHS, SETTINGS
+from technova_attrition.fast_explainer import build_linear_explainer, save_explainer
+
+TARGET = "a_quitte_l_entreprise"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Précalcule models/explainer.json (fond résumé) pour ?explain=k."
+    )
+    p.add_argument(
+        "--data",
+        type=Path,
+        default=PATHS.data_processed / "employees_features.parquet",
+        help="fond : parquet ou CSV de features brutes (la cible est ignorée)",
+    )
+    p.add_argument("--method", choices=["kmeans", "sample"], default="kmeans")
+    p.add_argument("--n-summary", type=int, default=32, help="centres k-means / lignes")
+    p.add_argument("--max-rows", type=int, default=100_000, help="échantillon du fond")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    pipeline = joblib.load(PATHS.models / "pipeline.joblib")
+
+    if args.data.suffix == ".csv":
+        df = pd.read_csv(args.data)
+    else:
+        df = pd.read_parquet(args.data)
+    X = df.drop(columns=[TARGET], errors="ignore")[list(pipeline.feature_names_in_)]
+    if len(X) > args.max_rows:
+        X = X.sample(args.max_rows, random_state=SETTINGS.random_state)
+
+    artifact = build_linear_explainer(
+        pipeline,
+        X,
+        method=args.method,
+        n_summary=args.n_summary,
+        random_state=SETTINGS.random_state,
+    )
+    out_path = PATHS.models / "explainer.json"
+    save_explainer(artifact, out_path)
+
+    print(f"✅ Explainer ({args.method}, {len(artifact['weights'])} points, fond {len(X)} lignes)")
+    print(f" - {out_path.relative_to(PATHS.root)}")
+
+
+if __name__ == "__main__":
+    main()
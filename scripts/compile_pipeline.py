@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import joblib
+
+from technova_attrition.config import PATHS
+from technova_attrition.fast_scorer import compile_pipeline, save_compiled
+
+
+def main() -> None:
+    pipeline = joblib.load(PATHS.models / "pipeline.joblib")
+    artifact = compile_pipeline(pipeline)
+
+    out_path = PATHS.models / "pipeline_compiled.json"
+    save_compiled(artifact, out_path)
+
+    print(f"✅ Pipeline compilé ({len(artifact['coef'])} features transformées)")
+    print(f" - {out_path.relative_to(PATHS.root)}")
+
+
+if __name__ == "__main__":
+    main()
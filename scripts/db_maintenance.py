@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+
+from technova_attrition.db import get_engine
+from technova_attrition.env import load_env
+from technova_attrition.serving_db_ops import (
+    drop_prediction_partitions,
+    ensure_prediction_partitions,
+    refresh_prediction_rollups,
+)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Maintenance de predictions : partitions mensuelles, rétention, rollups."
+    )
+    p.add_argument("--months-ahead", type=int, default=3, help="Partitions créées d'avance")
+    p.add_argument(
+        "--retention-months",
+        type=int,
+        help="Garde les N derniers mois (mois courant compris) ; défaut : aucune suppression",
+    )
+    p.add_argument(
+        "--rollup-since",
+        type=date.fromisoformat,
+        help="Recalcule les rollups depuis ce jour (YYYY-MM-DD) ; défaut : hier",
+    )
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    load_env()
+    args = parse_args(argv)
+    engine = get_engine()
+
+    created = ensure_prediction_partitions(engine, months_ahead=args.months_ahead)
+    print(f"✅ Partitions présentes: {', '.join(created)}")
+
+    # rollups avant la rétention : les jours des partitions supprimées restent agrégés
+    stats = refresh_prediction_rollups(engine, since=args.rollup_since)
+    print(f"✅ Rollups: {stats}")
+
+    if args.retention_months is not None:
+        dropped = drop_prediction_partitions(engine, args.retention_months)
+        print(f"✅ Partitions supprimées: {', '.join(dropped) or 'aucune'}")
+
+
+if __name__ == "__main__":
+    main()
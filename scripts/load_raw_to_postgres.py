@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import argparse
+import io
 import re
+import time
 import unicodedata
 from pathlib import Path
 
@@ -8,6 +11,28 @@ import pandas as pd
 
 from technova_attrition.config import PATHS
 from technova_attrition.db import get_engine
+from technova_attrition.env import load_env
+
+FILES = {
+    "sirh_raw": PATHS.data_raw / "extrait_sirh.csv",
+    "eval_raw": PATHS.data_raw / "extrait_eval.csv",
+    "sondage_raw": PATHS.data_raw / "extrait_sondage.csv",
+}
+
+# clé naturelle de chaque extrait (après sanitize_column) : cible du mode upsert
+KEYS = {
+    "sirh_raw": "id_employee",
+    "eval_raw": "eval_number",
+    "sondage_raw": "code_sondage",
+}
+
+# dtype pandas (échantillon) -> (type Postgres, dtype nullable imposé aux chunks)
+_PG_TYPES = {
+    "i": ("BIGINT", "Int64"),
+    "u": ("BIGINT", "Int64"),
+    "f": ("DOUBLE PRECISION", "Float64"),
+    "b": ("BOOLEAN", "boolean"),
+}
 
 
 def sanitize_column(name: str) -> str:
@@ -27,20 +52,170 @@ def load_csv(path: Path) -> pd.DataFrame:
     return df
 
 
-def main():
+def infer_schema(path: Path, sample_rows: int) -> tuple[list[str], dict[str, str], dict[str, str]]:
+    """
+    Lit un échantillon du CSV et en déduit :
+    - colonnes brutes (ordre du fichier)
+    - type Postgres par colonne sanitizée
+    - dtype pandas nullable à imposer aux chunks (un chunk incompatible lève une erreur
+      explicite au lieu de charger silencieusement une colonne mal typée)
+    """
+    sample = pd.read_csv(path, encoding="utf-8", sep=",", nrows=sample_rows)
+    pg_types: dict[str, str] = {}
+    dtypes: dict[str, str] = {}
+    for col in sample.columns:
+        pg, dt = _PG_TYPES.get(sample[col].dtype.kind, ("TEXT", "string"))
+        # float entièrement entier dans l'échantillon (NaN -> float64) : reste un entier
+        if pg == "DOUBLE PRECISION":
+            s = sample[col].dropna()
+            if len(s) and (s % 1 == 0).all():
+                pg, dt = "BIGINT", "Int64"
+        pg_types[sanitize_column(col)] = pg
+        dtypes[col] = dt
+    return list(sample.columns), pg_types, dtypes
+
+
+def iter_csv_chunks(path: Path, dtypes: dict[str, str], chunk_size: int):
+    """CSV -> DataFrames de chunk_size lignes, colonnes sanitizées, types imposés."""
+    for chunk in pd.read_csv(path, encoding="utf-8", sep=",", dtype=dtypes, chunksize=chunk_size):
+        yield chunk.rename(columns={c: sanitize_column(c) for c in chunk.columns})
+
+
+def _q(name: str) -> str:
+    return f'"{name}"'
+
+
+def _copy_chunk(cur, table: str, chunk: pd.DataFrame) -> None:
+    # CSV en mémoire -> COPY FROM STDIN (champ vide non quoté = NULL)
+    buf = io.StringIO()
+    chunk.to_csv(buf, header=False, index=False)
+    cols = ", ".join(_q(c) for c in chunk.columns)
+    with cur.copy(f"COPY {_q(table)} ({cols}) FROM STDIN WITH (FORMAT csv)") as copy:
+        copy.write(buf.getvalue())
+
+
+def _prepare_table(cur, table: str, pg_types: dict[str, str], mode: str) -> None:
+    cols_ddl = ", ".join(f"{_q(c)} {t}" for c, t in pg_types.items())
+    if mode == "replace":
+        # comme to_sql(if_exists="replace") : échoue si des vues dépendent de la table
+        # (sql/02_clean_views.sql) -> les recréer après chargement
+        cur.execute(f"DROP TABLE IF EXISTS {_q(table)}")
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {_q(table)} ({cols_ddl})")
+    if mode == "upsert":
+        key = KEYS[table]
+        cur.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_q(f'{table}_{key}_uidx')} "
+            f"ON {_q(table)} ({_q(key)})"
+        )
+
+
+def _upsert_chunk(cur, table: str, chunk: pd.DataFrame) -> None:
+    """COPY dans une table temporaire, puis INSERT ... ON CONFLICT (clé) DO UPDATE."""
+    key = KEYS[table]
+    stg = f"{table}_stg"
+    cols = [_q(c) for c in chunk.columns]
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c != _q(key))
+    # _stg_row : numéro de ligne dans l'ordre du COPY (départage les doublons de clé)
+    cur.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_q(stg)} "
+        f"(LIKE {_q(table)} INCLUDING DEFAULTS, _stg_row BIGSERIAL) ON COMMIT DROP"
+    )
+    cur.execute(f"TRUNCATE {_q(stg)} RESTART IDENTITY")
+    _copy_chunk(cur, stg, chunk)
+    # DISTINCT ON : un doublon de clé dans le chunk ferait échouer ON CONFLICT ;
+    # la dernière occurrence l'emporte (comme entre deux chunks)
+    cur.execute(
+        f"INSERT INTO {_q(table)} ({', '.join(cols)}) "
+        f"SELECT DISTINCT ON ({_q(key)}) {', '.join(cols)} FROM {_q(stg)} "
+        f"ORDER BY {_q(key)}, _stg_row DESC "
+        f"ON CONFLICT ({_q(key)}) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING")
+    )
+
+
+def copy_csv_to_table(
+    engine,
+    table: str,
+    path: Path,
+    *,
+    mode: str = "replace",
+    chunk_size: int = 50_000,
+    sample_rows: int = 10_000,
+) -> int:
+    """
+    Charge un CSV brut dans `table` via COPY FROM STDIN, par chunks, en une transaction.
+    mode : replace (drop + create), append (create if not exists), upsert (clé KEYS[table]).
+    Retourne le nombre de lignes chargées.
+    """
+    _, pg_types, dtypes = infer_schema(path, sample_rows)
+
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection  # connexion psycopg 3 (cursor.copy)
+        n_rows = 0
+        with conn.cursor() as cur:
+            _prepare_table(cur, table, pg_types, mode)
+            for chunk in iter_csv_chunks(path, dtypes, chunk_size):
+                if mode == "upsert":
+                    _upsert_chunk(cur, table, chunk)
+                else:
+                    _copy_chunk(cur, table, chunk)
+                n_rows += len(chunk)
+        conn.commit()
+        return n_rows
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Charge les extraits bruts (CSV) dans Postgres.")
+    p.add_argument(
+        "--method",
+        choices=["copy", "to_sql"],
+        default="copy",
+        help="copy: COPY FROM STDIN par chunks (défaut) ; to_sql: chargement pandas historique",
+    )
+    p.add_argument("--mode", choices=["replace", "append", "upsert"], default="replace")
+    p.add_argument("--chunk-size", type=int, default=50_000)
+    p.add_argument(
+        "--sample-rows", type=int, default=10_000, help="Lignes lues pour inférer les types"
+    )
+    p.add_argument("--tables", nargs="+", choices=list(FILES), default=list(FILES))
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    load_env()
+    args = parse_args(argv)
+    if args.method == "to_sql" and args.mode == "upsert":
+        raise SystemExit("--mode upsert nécessite --method copy")
+
     engine = get_engine()
 
-    files = {
-        "sirh_raw": PATHS.data_raw / "extrait_sirh.csv",
-        "eval_raw": PATHS.data_raw / "extrait_eval.csv",
-        "sondage_raw": PATHS.data_raw / "extrait_sondage.csv",
-    }
-
-    for table, path in files.items():
-        df = load_csv(path)
-        print(f"{table}: {df.shape} from {path.name}")
-        df.to_sql(table, engine, if_exists="replace", index=False)
-        print(f" -> loaded into {table}")
+    for table in args.tables:
+        path = FILES[table]
+        t0 = time.perf_counter()
+        if args.method == "copy":
+            n_rows = copy_csv_to_table(
+                engine,
+                table,
+                path,
+                mode=args.mode,
+                chunk_size=args.chunk_size,
+                sample_rows=args.sample_rows,
+            )
+        else:
+            df = load_csv(path)
+            df.to_sql(table, engine, if_exists=args.mode, index=False)
+            n_rows = len(df)
+        elapsed = time.perf_counter() - t0
+        rate = n_rows / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"{table}: {n_rows} rows from {path.name} ({args.method}/{args.mode}) "
+            f"in {elapsed:.2f}s -> {rate:,.0f} rows/s"
+        )
 
     print("Done.")
 
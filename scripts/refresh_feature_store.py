@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from sqlalchemy.orm import sessionmaker
+
+from technova_attrition.api.service import current_model, load_compiled_scorer
+from technova_attrition.db import get_engine
+from technova_attrition.env import load_env
+from technova_attrition.feature_store import (
+    DEFAULT_CHUNK_SIZE,
+    refresh_feature_store,
+    rescore_from_store,
+)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Met à jour employee_feature_vectors (vecteurs model-ready par employé)."
+    )
+    p.add_argument("--full", action="store_true", help="Recalcule tous les vecteurs")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    p.add_argument(
+        "--rescore",
+        action="store_true",
+        help="Après refresh : re-score tous les employés depuis les vecteurs (NDJSON)",
+    )
+    p.add_argument("--output", help="Fichier NDJSON du re-scoring (défaut: stdout)")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    load_env()
+    args = parse_args(argv)
+    # version et seuil du modèle servi (registry) : ceux que /predict_by_id utilise
+    model = current_model()
+    scorer = load_compiled_scorer(model)
+
+    Session = sessionmaker(bind=get_engine(), autocommit=False, autoflush=False)
+    db = Session()
+    try:
+        stats = refresh_feature_store(
+            db, scorer, model.version, full=args.full, chunk_size=args.chunk_size
+        )
+        print(
+            f"✅ Feature store ({model.version}, {scorer.preprocess_hash}): {stats}",
+            file=sys.stderr,
+        )
+
+        if args.rescore:
+            out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+            n = 0
+            try:
+                for item in rescore_from_store(
+                    db, scorer, model.version, model.threshold, args.chunk_size
+                ):
+                    out.write(json.dumps(item) + "\n")
+                    n += 1
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            print(f"✅ Re-scoring: {n} employés", file=sys.stderr)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from sqlalchemy.orm import sessionmaker
+
+from technova_attrition.api.bulk import DEFAULT_CHUNK_SIZE, iter_bulk_scores
+from technova_attrition.db import get_engine
+from technova_attrition.env import load_env
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Score les employés de la table employees (curseur serveur, sortie NDJSON)."
+    )
+    p.add_argument("--ids", type=int, nargs="+", help="Liste d'employee_id à scorer")
+    p.add_argument("--id-min", type=int, help="Borne basse (incluse) sur employee_id")
+    p.add_argument("--id-max", type=int, help="Borne haute (incluse) sur employee_id")
+    p.add_argument(
+        "--filter-json",
+        help='Égalités sur les features JSONB, ex: \'{"departement": "Commercial"}\'',
+    )
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    p.add_argument("--no-persist", action="store_true", help="Ne pas écrire dans predictions")
+    p.add_argument("--output", help="Fichier NDJSON de sortie (défaut: stdout)")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    load_env()
+    args = parse_args(argv)
+
+    # sans filtre explicite : toute la table employees
+    features_filter = json.loads(args.filter_json) if args.filter_json else None
+
+    engine = get_engine()
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    read_db = Session()
+    write_db = None if args.no_persist else Session()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    summary = {}
+    try:
+        items = iter_bulk_scores(
+            read_db,
+            write_db,
+            employee_ids=args.ids,
+            features_filter=features_filter,
+            id_min=args.id_min,
+            id_max=args.id_max,
+            chunk_size=args.chunk_size,
+        )
+        for item in items:
+            out.write(json.dumps(item, ensure_ascii=False) + "\n")
+            summary = item.get("summary", summary)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        read_db.close()
+        if write_db is not None:
+            write_db.close()
+
+    print(f"✅ Scoring terminé: {summary}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,381 @@
+from __future__ import annotations
+
+import argparse
 import json
+import shutil
+from functools import cache
+from pathlib import Path
 
 import joblib
+import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.model_selection import train_test_split
 
+from technova_attrition import (
+    evaluation,
+    fast_explainer,
+    fast_scorer,
+    importance,
+    modeling,
+    preprocessing,
+)
+from technova_attrition.checkpoints import (
+    StageCache,
+    StageResult,
+    atomic_copy,
+    file_digest,
+    source_digest,
+)
 from technova_attrition.config import (
     FINAL_MODEL_PARAMS,
     FINAL_MODEL_THRESHOLD,
+    IMPORTANCE_FEATURE_GROUPS,
     PATHS,
     SETTINGS,
+    Paths,
 )
 from technova_attrition.evaluation import evaluate_classifier
+from technova_attrition.fast_explainer import build_linear_explainer, save_explainer
+from technova_attrition.fast_scorer import compile_pipeline, save_compiled
+from technova_attrition.importance import grouped_permutation_importance
 from technova_attrition.modeling import make_logreg
 from technova_attrition.preprocessing import make_feature_groups
 
 TARGET = "a_quitte_l_entreprise"
+TEST_SIZE = 0.10  # mentor: 90/10, stratifié
+STAGES = ["load", "split", "fit", "evaluate", "importance", "export"]
+DEFAULT_CACHE_DIR = PATHS.root / ".cache" / "train_export"
+# fond des explications (?explain=k) : centres k-means du train
+EXPLAINER_PARAMS = {"method": "kmeans", "n_summary": 32}
+# code exécuté par chaque étape, dans sa clé de cache : un changement de code invalide l'étape
+STAGE_SOURCES = {
+    "fit": [preprocessing, modeling],
+    "evaluate": [evaluation],
+    "importance": [importance, fast_scorer],
+    "export": [fast_scorer, fast_explainer, Path(__file__)],  # script : model card
+}
+# importance par permutation sur le test (n_repeats = maximum, arrêt anticipé)
+IMPORTANCE_PARAMS = {"scoring": "average_precision", "n_repeats": 50, "min_repeats": 10}
 
 
-def main():
-    df = pd.read_parquet(PATHS.data_processed / "employees_features.parquet")
-    X = df.drop(columns=[TARGET])
-    y = df[TARGET].astype(int)
+def export_destinations(paths: Paths) -> dict[str, Path]:
+    """Fichier produit par l'étape export -> emplacement publié."""
+    api_test_dir = paths.data_processed / "api_test"
+    return {
+        # ✅ artefact principal (NON versionné en git, mais utile localement)
+        "pipeline.joblib": paths.models / "pipeline.joblib",
+        # ✅ version "compilée" NumPy-only du même pipeline (fast path serving, FAST_SCORER=1)
+        "pipeline_compiled.json": paths.models / "pipeline_compiled.json",
+        # ✅ liste officielle des features attendues
+        "expected_features.json": paths.models / "expected_features.json",
+        # ✅ explications servies par l'API (moyenne du fond + résumé k-means)
+        "explainer.json": paths.models / "explainer.json",
+        # ✅ set de test API (complets : probablement ignorés par git ; samples : à versionner)
+        "X_test.csv": api_test_dir / "X_test.csv",
+        "y_test.csv": api_test_dir / "y_test.csv",
+        "X_test_sample.json": api_test_dir / "X_test_sample.json",
+        "y_test_sample.json": api_test_dir / "y_test_sample.json",
+        "api_model_metrics.json": paths.reports / "api_model_metrics.json",
+        "permutation_importance.csv": paths.reports / "permutation_importance.csv",
+        # ✅ petit "model card" minimal (versionnable) — publié en dernier
+        "model_card.json": paths.models / "model_card.json",
+    }
 
-    # mentor: 90/10, stratifié
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=0.10,
-        random_state=SETTINGS.random_state,
-        stratify=y,
-    )
 
-    # 🔒 Source de vérité unique pour les groupes de features
-    groups = make_feature_groups(df, target=TARGET)
+def _write_json(path: Path, obj) -> None:
+    path.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+
+
+def run(
+    data_path: Path,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    paths: Paths = PATHS,
+    force: set[str] = frozenset(),
+    n_jobs: int = 1,
+) -> dict[str, StageResult]:
+    """
+    DAG load -> split -> fit -> evaluate -> importance -> export. Chaque étape est rejouée
+    seulement si ses entrées (empreintes amont + paramètres) changent ; sinon sa sortie est
+    relue du cache. Les fichiers publiés (models/, reports/, api_test/) ne sont réécrits que s'ils
+    diffèrent de la sortie de l'étape export.
+    """
+    cache_store = StageCache(Path(cache_dir), force=set(force))
+
+    @cache
+    def frame() -> pd.DataFrame:
+        return pd.read_parquet(data_path)
+
+    def xy() -> tuple[pd.DataFrame, pd.Series]:
+        df = frame()
+        return df.drop(columns=[TARGET]), df[TARGET].astype(int)
+
+    def split_frames(split: StageResult):
+        X, y = xy()
+        idx = np.load(split.path("split.npz"))
+        tr, te = idx["train"], idx["test"]
+        return X.iloc[tr], X.iloc[te], y.iloc[tr], y.iloc[te]
+
+    results: dict[str, StageResult] = {}
 
-    # Pipeline complet (preprocessing + modèle)
-    pipeline = make_logreg(groups)
+    def _report(res: StageResult) -> StageResult:
+        results[res.name] = res
+        status = "cache" if res.cached else f"{res.seconds:.2f}s"
+        print(f" - {res.name:10s} {res.digest[:12]} ({status})")
+        return res
 
-    # ✅ On applique explicitement les hyperparams du "meilleur modèle"
-    pipeline.set_params(**FINAL_MODEL_PARAMS)
+    # --- load : empreinte du contenu du parquet
+    data_sha = file_digest(data_path)
 
-    pipeline.fit(X_train, y_train)
+    def _load(_: Path) -> dict:
+        df = frame()
+        return {"data_sha256": data_sha, "n_rows": len(df), "columns": list(df.columns)}
 
-    # sanity check: métriques à threshold par défaut (0.5)
-    res = evaluate_classifier(
-        pipeline,
-        X_train,
-        y_train,
-        X_test,
-        y_test,
-        threshold=FINAL_MODEL_THRESHOLD,
+    load = _report(cache_store.run("load", {"data_sha256": data_sha}, _load))
+
+    # --- split : positions train / test
+    def _split(out: Path) -> dict:
+        X, y = xy()
+        tr, te = train_test_split(
+            np.arange(len(y)),
+            test_size=TEST_SIZE,
+            random_state=SETTINGS.random_state,
+            stratify=y,
+        )
+        np.savez(out / "split.npz", train=tr, test=te)
+        return {"n_train": int(len(tr)), "n_test": int(len(te))}
+
+    split = _report(
+        cache_store.run(
+            "split",
+            {"load": load.digest, "test_size": TEST_SIZE, "random_state": SETTINGS.random_state},
+            _split,
+        )
     )
 
-    PATHS.models.mkdir(parents=True, exist_ok=True)
-    PATHS.reports.mkdir(parents=True, exist_ok=True)
+    # --- fit : pipeline complet (preprocessing + modèle), hyperparams du "meilleur modèle"
+    def _fit(out: Path) -> dict:
+        X_train, _, y_train, _ = split_frames(split)
+        # 🔒 Source de vérité unique pour les groupes de features
+        groups = make_feature_groups(frame(), target=TARGET)
+        pipeline = make_logreg(groups)
+        pipeline.set_params(**FINAL_MODEL_PARAMS)
+        pipeline.fit(X_train, y_train)
+        joblib.dump(pipeline, out / "pipeline.joblib")
+        return {"expected_features": list(X_train.columns)}
+
+    fit = _report(
+        cache_store.run(
+            "fit",
+            {
+                "split": split.digest,
+                "model": "make_logreg",
+                "params": FINAL_MODEL_PARAMS,
+                "sklearn": sklearn.__version__,
+                "code": source_digest(*STAGE_SOURCES["fit"]),
+            },
+            _fit,
+        )
+    )
 
-    # ✅ artefact principal (NON versionné en git, mais utile localement)
-    joblib.dump(pipeline, PATHS.models / "pipeline.joblib")
+    @cache
+    def pipeline():
+        return joblib.load(fit.path("pipeline.joblib"))
 
-    # ✅ liste officielle des features attendues
-    expected_features = list(X_train.columns)
-    (PATHS.models / "expected_features.json").write_text(
-        json.dumps(expected_features, indent=2),
-        encoding="utf-8",
+    # --- evaluate : modèle déjà entraîné (pas de second fit)
+    def _evaluate(out: Path) -> dict:
+        X_train, X_test, y_train, y_test = split_frames(split)
+        res = evaluate_classifier(
+            pipeline(),
+            X_train,
+            y_train,
+            X_test,
+            y_test,
+            threshold=FINAL_MODEL_THRESHOLD,
+            fit=False,
+        )
+        metrics = {
+            "train_ap": res["train_ap"],
+            "test_ap": res["test_ap"],
+            "train_roc_auc": res["train_roc_auc"],
+            "test_roc_auc": res["test_roc_auc"],
+            "threshold": FINAL_MODEL_THRESHOLD,
+            "test_cm": res["test_cm"].tolist(),
+        }
+        _write_json(out / "metrics.json", metrics)
+        return metrics
+
+    evaluate = _report(
+        cache_store.run(
+            "evaluate",
+            {
+                "fit": fit.digest,
+                "split": split.digest,
+                "threshold": FINAL_MODEL_THRESHOLD,
+                "code": source_digest(*STAGE_SOURCES["evaluate"]),
+            },
+            _evaluate,
+        )
     )
 
-    # ✅ set de test API (complet + samples)
-    api_test_dir = PATHS.data_processed / "api_test"
-    api_test_dir.mkdir(parents=True, exist_ok=True)
-
-    # (fichiers complets : probablement ignorés par git)
-    X_test.to_csv(api_test_dir / "X_test.csv", index=False)
-    y_test.to_csv(api_test_dir / "y_test.csv", index=False)
-
-    # (samples : à versionner)
-    X_test.head(10).to_json(api_test_dir / "X_test_sample.json", orient="records")
-    y_test.head(10).to_json(api_test_dir / "y_test_sample.json", orient="records")
-
-    # ✅ petit "model card" minimal (versionnable)
-    model_card = {
-        "target": TARGET,
-        "model_type": "logistic_regression",
-        "final_params": FINAL_MODEL_PARAMS,
-        "default_threshold": FINAL_MODEL_THRESHOLD,
-        "n_train": int(len(X_train)),
-        "n_test": int(len(X_test)),
-        "train_ap": res["train_ap"],
-        "test_ap": res["test_ap"],
-        "expected_n_features_raw": len(expected_features),
-    }
-    (PATHS.models / "model_card.json").write_text(
-        json.dumps(model_card, indent=2),
-        encoding="utf-8",
+    # --- importance : permutation sur le test (groupes corrélés permutés ensemble)
+    def _importance(out: Path) -> dict:
+        _, X_test, _, y_test = split_frames(split)
+        res = grouped_permutation_importance(
+            pipeline(),
+            X_test,
+            y_test,
+            groups=IMPORTANCE_FEATURE_GROUPS,
+            n_jobs=n_jobs,  # hors clé de cache : résultat indépendant de n_jobs
+            random_state=SETTINGS.random_state,
+            **IMPORTANCE_PARAMS,
+        )
+        res.importances[["feature", "importance_mean", "importance_std"]].to_csv(
+            out / "permutation_importance.csv", index=False
+        )
+        return {
+            "space": res.space,
+            "baseline_score": res.baseline_score,
+            "n_evaluations": res.n_evaluations,
+        }
+
+    importance = _report(
+        cache_store.run(
+            "importance",
+            {
+                "fit": fit.digest,
+                "split": split.digest,
+                "params": IMPORTANCE_PARAMS,
+                "groups": IMPORTANCE_FEATURE_GROUPS,
+                "code": source_digest(*STAGE_SOURCES["importance"]),
+            },
+            _importance,
+        )
     )
 
-    (PATHS.reports / "api_model_metrics.json").write_text(
-        json.dumps(
+    # --- export : artefacts serving + set de test API + model card
+    def _export(out: Path) -> dict:
+        X_train, X_test, _, y_test = split_frames(split)
+        expected_features = fit.meta["expected_features"]
+        metrics = evaluate.meta
+
+        shutil.copyfile(fit.path("pipeline.joblib"), out / "pipeline.joblib")
+        shutil.copyfile(
+            importance.path("permutation_importance.csv"), out / "permutation_importance.csv"
+        )
+        save_compiled(compile_pipeline(pipeline()), out / "pipeline_compiled.json")
+        _write_json(out / "expected_features.json", expected_features)
+        save_explainer(
+            build_linear_explainer(
+                pipeline(), X_train, random_state=SETTINGS.random_state, **EXPLAINER_PARAMS
+            ),
+            out / "explainer.json",
+        )
+
+        X_test.to_csv(out / "X_test.csv", index=False)
+        y_test.to_csv(out / "y_test.csv", index=False)
+        X_test.head(10).to_json(out / "X_test_sample.json", orient="records")
+        y_test.head(10).to_json(out / "y_test_sample.json", orient="records")
+
+        _write_json(
+            out / "model_card.json",
             {
-                "train_ap": res["train_ap"],
-                "test_ap": res["test_ap"],
+                "target": TARGET,
+                # version servie (sauf MODEL_VERSION) : change à chaque nouveau modèle ajusté
+                "model_version": f"logreg-{fit.digest[:12]}",
+                "model_type": "logistic_regression",
+                "final_params": FINAL_MODEL_PARAMS,
+                "default_threshold": FINAL_MODEL_THRESHOLD,
+                "n_train": split.meta["n_train"],
+                "n_test": split.meta["n_test"],
+                "train_ap": metrics["train_ap"],
+                "test_ap": metrics["test_ap"],
+                "expected_n_features_raw": len(expected_features),
+            },
+        )
+        _write_json(
+            out / "api_model_metrics.json",
+            {
+                "train_ap": metrics["train_ap"],
+                "test_ap": metrics["test_ap"],
                 "threshold": FINAL_MODEL_THRESHOLD,
             },
-            indent=2,
-        ),
-        encoding="utf-8",
+        )
+        return {"files": list(export_destinations(paths))}
+
+    export = _report(
+        cache_store.run(
+            "export",
+            {
+                "fit": fit.digest,
+                "evaluate": evaluate.digest,
+                "importance": importance.digest,
+                "split": split.digest,
+                "explainer": EXPLAINER_PARAMS,
+                "code": source_digest(*STAGE_SOURCES["export"]),
+            },
+            _export,
+        )
     )
 
+    published = publish(export, export_destinations(paths))
+    print(f" - publish    {len(published)} fichier(s) mis à jour")
+    for dest in published:
+        print(f"   {dest}")
+    return results
+
+
+def publish(export: StageResult, destinations: dict[str, Path]) -> list[Path]:
+    """
+    Copie atomique (fichier temporaire + rename) des sorties de l'étape export, seulement
+    pour les fichiers absents ou différents : un run sans changement ne touche à rien
+    (mtime inchangés -> pas de rechargement à chaud du modèle servi).
+    """
+    updated = []
+    for name, dest in destinations.items():
+        if dest.exists() and file_digest(dest) == export.files[name]:
+            continue
+        atomic_copy(export.path(name), dest)
+        updated.append(dest)
+    return updated
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Entraînement + export des artefacts serving (étapes en cache, reprise)."
+    )
+    p.add_argument("--data", type=Path, default=PATHS.data_processed / "employees_features.parquet")
+    p.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+    p.add_argument(
+        "--from-stage",
+        choices=STAGES,
+        default=None,
+        help="rejoue cette étape et les suivantes même si elles sont en cache",
+    )
+    p.add_argument("--force", action="store_true", help="rejoue toutes les étapes")
+    p.add_argument(
+        "--n-jobs", type=int, default=-1, help="process pour l'importance (-1 : tous les cœurs)"
+    )
+    p.add_argument(
+        "--prune", action="store_true", help="supprime les entrées de cache non utilisées"
+    )
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    force: set[str] = set()
+    if args.force:
+        force = set(STAGES)
+    elif args.from_stage is not None:
+        force = set(STAGES[STAGES.index(args.from_stage) :])
+
+    print(f"✅ Étapes (cache: {args.cache_dir})")
+    results = run(args.data, args.cache_dir, force=force, n_jobs=args.n_jobs)
+    if args.prune:
+        removed = StageCache(args.cache_dir).prune(results.values())
+        print(f" - prune      {removed} entrée(s) supprimée(s)")
     print("✅ Export terminé")
-    print(" - models/pipeline.joblib")
-    print(" - models/expected_features.json")
-    print(" - models/model_card.json")
-    print(" - data/processed/api_test/X_test_sample.json")
-    print(" - data/processed/api_test/y_test_sample.json")
-    print(" - reports/api_model_metrics.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+
+from technova_attrition.checkpoints import atomic_copy, json_digest
+from technova_attrition.config import FINAL_MODEL_PARAMS, FINAL_MODEL_THRESHOLD, PATHS, SETTINGS
+from technova_attrition.fast_explainer import build_linear_explainer, save_explainer
+from technova_attrition.fast_scorer import compile_pipeline, save_compiled
+from technova_attrition.streaming import train_streaming
+
+TARGET = "a_quitte_l_entreprise"
+
+
+def _write_json(path: Path, obj) -> None:
+    path.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description=(
+            "Entraînement hors mémoire (row groups parquet -> SGD logistique) "
+            "+ export des artefacts serving."
+        )
+    )
+    p.add_argument(
+        "--data",
+        type=Path,
+        default=PATHS.data_processed / "employees_features.parquet",
+        help="fichier parquet ou répertoire de fichiers parquet (ex: un par filiale)",
+    )
+    p.add_argument("--C", type=float, default=FINAL_MODEL_PARAMS["model__C"])
+    p.add_argument("--epochs", type=int, default=5)
+    p.add_argument("--test-size", type=float, default=0.10)
+    p.add_argument("--sketch-k", type=int, default=4096, help="taille d'un niveau du sketch")
+    p.add_argument("--eval-sample-rows", type=int, default=1_000_000)
+    p.add_argument("--seed", type=int, default=SETTINGS.random_state)
+    p.add_argument("--models-dir", type=Path, default=PATHS.models)
+    p.add_argument("--reports-dir", type=Path, default=PATHS.reports)
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args(argv)
+    t0 = time.perf_counter()
+    res = train_streaming(
+        args.data,
+        TARGET,
+        C=args.C,
+        epochs=args.epochs,
+        test_size=args.test_size,
+        seed=args.seed,
+        sketch_k=args.sketch_k,
+        eval_sample_rows=args.eval_sample_rows,
+    )
+    metrics = res.metrics
+    expected_features = res.stats.feature_names
+    compiled = compile_pipeline(res.pipeline)
+
+    model_card = {
+        "target": TARGET,
+        # version servie (sauf MODEL_VERSION) : empreinte des paramètres du modèle
+        "model_version": f"sgd-{json_digest(compiled)[:12]}",
+        "model_type": "sgd_logistic_streaming",
+        "final_params": {"model__C": args.C, "model__alpha": res.pipeline[-1].alpha},
+        "epochs": args.epochs,
+        "default_threshold": FINAL_MODEL_THRESHOLD,
+        "n_train": metrics["n_train"],
+        "n_test": metrics["n_test"],
+        "train_ap": metrics["train_ap"],
+        "test_ap": metrics["test_ap"],
+        "expected_n_features_raw": len(expected_features),
+    }
+
+    # écrit à côté puis publié par rename : le rechargement à chaud ne lit pas de fichier partiel
+    with tempfile.TemporaryDirectory(prefix="train_streaming_") as tmp:
+        out = Path(tmp)
+        joblib.dump(res.pipeline, out / "pipeline.joblib")
+        save_compiled(compiled, out / "pipeline_compiled.json")
+        _write_json(out / "expected_features.json", expected_features)
+        save_explainer(
+            build_linear_explainer(res.pipeline, res.background, random_state=args.seed),
+            out / "explainer.json",
+        )
+        _write_json(out / "model_card.json", model_card)
+        _write_json(
+            out / "api_model_metrics.json",
+            {
+                "train_ap": metrics["train_ap"],
+                "test_ap": metrics["test_ap"],
+                "threshold": FINAL_MODEL_THRESHOLD,
+            },
+        )
+        for name in [
+            "pipeline.joblib",
+            "pipeline_compiled.json",
+            "expected_features.json",
+            "explainer.json",
+        ]:
+            atomic_copy(out / name, args.models_dir / name)
+        atomic_copy(out / "api_model_metrics.json", args.reports_dir / "api_model_metrics.json")
+        atomic_copy(out / "model_card.json", args.models_dir / "model_card.json")  # en dernier
+
+    print(f"✅ Entraînement streaming terminé en {time.perf_counter() - t0:.1f}s")
+    print(
+        f" - lignes: {metrics['n_rows']:,d} "
+        f"(train {metrics['n_train']:,d} / test {metrics['n_test']:,d})"
+    )
+    print(f" - AP train (échantillon): {metrics['train_ap']}, AP test: {metrics['test_ap']}")
+    print(f" - {args.models_dir}/pipeline.joblib, pipeline_compiled.json, expected_features.json")
+    print(f" - {args.models_dir}/model_card.json, {args.reports_dir}/api_model_metrics.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,35 @@ CREATE TABLE IF NOT EXISTS employees (
   created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- ===========================
+-- predictions : partitionnée par mois (RANGE sur created_at, bornes en UTC)
+-- ===========================
+
+-- migration : une ancienne table non partitionnée est renommée ici, recopiée plus bas
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema() AND c.relname = 'predictions' AND c.relkind = 'r'
+  ) THEN
+    ALTER TABLE predictions RENAME TO predictions_unpartitioned;
+    ALTER TABLE predictions_unpartitioned
+      RENAME CONSTRAINT predictions_pkey TO predictions_unpartitioned_pkey;
+    -- la séquence survit à l'ancienne table : les ids continuent
+    ALTER SEQUENCE predictions_id_seq OWNED BY NONE;
+    DROP INDEX IF EXISTS idx_predictions_created_at;
+    DROP INDEX IF EXISTS idx_predictions_employee_id;
+    DROP INDEX IF EXISTS idx_predictions_created_at_id;
+    DROP INDEX IF EXISTS idx_predictions_employee_created_at_id;
+  END IF;
+END;
+$$;
+
+CREATE SEQUENCE IF NOT EXISTS predictions_id_seq;
+
 CREATE TABLE IF NOT EXISTS predictions (
-  id              BIGSERIAL PRIMARY KEY,
+  id              BIGINT NOT NULL DEFAULT nextval('predictions_id_seq'),
   created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
 
   employee_id     INTEGER NULL REFERENCES employees(employee_id),
@@ -19,9 +46,123 @@ CREATE TABLE IF NOT EXISTS predictions (
   proba_depart    DOUBLE PRECISION NOT NULL,
   prediction      SMALLINT NOT NULL,
   threshold       DOUBLE PRECISION NOT NULL,
-  model_version   TEXT NOT NULL
-);
+  model_version   TEXT NOT NULL,
+
+  -- la clé de partition doit faire partie de la clé primaire
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE predictions_id_seq OWNED BY predictions.id;
+
+-- filet de sécurité pour les lignes hors partitions mensuelles (doit rester vide :
+-- une partition mensuelle ne peut pas être créée si le défaut contient des lignes du mois)
+CREATE TABLE IF NOT EXISTS predictions_default PARTITION OF predictions DEFAULT;
+
+-- partition du mois de p_month (idempotent), nommée predictions_yYYYYmMM
+CREATE OR REPLACE FUNCTION predictions_create_partition(p_month DATE) RETURNS TEXT AS $$
+DECLARE
+  v_start DATE = date_trunc('month', p_month);
+  v_end   DATE = v_start + INTERVAL '1 month';
+  v_name  TEXT = 'predictions_y' || to_char(v_start, 'YYYY') || 'm' || to_char(v_start, 'MM');
+BEGIN
+  IF to_regclass(v_name) IS NULL THEN
+    EXECUTE 'CREATE TABLE ' || quote_ident(v_name) || ' PARTITION OF predictions'
+      || ' FOR VALUES FROM (' || quote_literal(to_char(v_start, 'YYYY-MM-DD') || ' 00:00:00+00')
+      || ') TO (' || quote_literal(to_char(v_end, 'YYYY-MM-DD') || ' 00:00:00+00') || ')';
+  END IF;
+  RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- partitions du mois courant (+2 mois d'avance) ; recopie de l'ancienne table le cas échéant
+DO $$
+DECLARE
+  v_now   DATE = date_trunc('month', NOW() AT TIME ZONE 'UTC');
+  v_month DATE = v_now;
+BEGIN
+  IF to_regclass('predictions_unpartitioned') IS NOT NULL THEN
+    SELECT LEAST(v_now, COALESCE(date_trunc('month', MIN(created_at) AT TIME ZONE 'UTC'), v_now))
+      INTO v_month
+      FROM predictions_unpartitioned;
+  END IF;
+
+  WHILE v_month <= v_now + INTERVAL '2 months' LOOP
+    PERFORM predictions_create_partition(v_month);
+    v_month = v_month + INTERVAL '1 month';
+  END LOOP;
+
+  IF to_regclass('predictions_unpartitioned') IS NOT NULL THEN
+    INSERT INTO predictions
+      (id, created_at, employee_id, input_payload, proba_depart, prediction, threshold, model_version)
+    SELECT id, created_at, employee_id, input_payload, proba_depart, prediction, threshold, model_version
+    FROM predictions_unpartitioned;
+    DROP TABLE predictions_unpartitioned;
+  END IF;
+END;
+$$;
 
 -- Indexes (important for history endpoints)
-CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions(created_at DESC);
-CREATE INDEX IF NOT EXISTS idx_predictions_employee_id ON predictions(employee_id);
+-- pagination keyset (created_at, id) ; INCLUDE : index-only scan quand input_payload est omis
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at_id
+  ON predictions(created_at DESC, id DESC)
+  INCLUDE (employee_id, proba_depart, prediction, threshold, model_version);
+CREATE INDEX IF NOT EXISTS idx_predictions_employee_created_at_id
+  ON predictions(employee_id, created_at DESC, id DESC)
+  INCLUDE (proba_depart, prediction, threshold, model_version);
+
+-- ===========================
+-- Rollups journaliers (jour UTC x model_version) : dashboards sans scan des lignes brutes
+-- ===========================
+
+CREATE TABLE IF NOT EXISTS predictions_daily_counts (
+  day             DATE NOT NULL,
+  model_version   TEXT NOT NULL,
+  n_predictions   BIGINT NOT NULL,
+  n_positive      BIGINT NOT NULL,
+  proba_sum       DOUBLE PRECISION NOT NULL,
+  proba_min       DOUBLE PRECISION NOT NULL,
+  proba_max       DOUBLE PRECISION NOT NULL,
+  refreshed_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (day, model_version)
+);
+
+-- histogramme des probabilités : bucket k = [k/10, (k+1)/10[ (1.0 dans le dernier)
+CREATE TABLE IF NOT EXISTS predictions_daily_histogram (
+  day             DATE NOT NULL,
+  model_version   TEXT NOT NULL,
+  bucket          SMALLINT NOT NULL,
+  n               BIGINT NOT NULL,
+  PRIMARY KEY (day, model_version, bucket)
+);
+
+-- ===========================
+-- Feature store : vecteur model-ready (sortie du préprocesseur) par employé et version
+-- ===========================
+
+-- horodatage de modification des features (rafraîchissement incrémental du feature store)
+ALTER TABLE employees ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION employees_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+  IF NEW.features IS DISTINCT FROM OLD.features THEN
+    NEW.updated_at = NOW();
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_employees_updated_at ON employees;
+CREATE TRIGGER trg_employees_updated_at
+  BEFORE UPDATE ON employees
+  FOR EACH ROW EXECUTE FUNCTION employees_touch_updated_at();
+
+CREATE TABLE IF NOT EXISTS employee_feature_vectors (
+  employee_id        INTEGER NOT NULL REFERENCES employees(employee_id) ON DELETE CASCADE,
+  model_version      TEXT NOT NULL,
+  -- empreinte des paramètres du préprocesseur : un re-fit invalide les vecteurs
+  preprocess_hash    TEXT NOT NULL,
+  vector             DOUBLE PRECISION[] NOT NULL,
+  source_updated_at  TIMESTAMPTZ NOT NULL,
+  computed_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (employee_id, model_version)
+);
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from technova_attrition.serving_db_ops import insert_predictions
+
+logger = logging.getLogger(__name__)
+
+# statut de persistance renvoyé au client
+PERSISTED = "persisted"
+QUEUED = "queued"
+DROPPED = "dropped"
+# file pleine + politique "sync" : l'appelant écrit lui-même (synchrone)
+SYNC_FALLBACK = "sync_fallback"
+
+BACKPRESSURE_POLICIES = {"sync", "drop", "block"}
+
+
+class PredictionWriter:
+    """
+    Write-behind des prédictions : file bornée en mémoire + thread qui flush dans
+    `predictions` par batch (taille ou délai), via un INSERT multi-lignes par batch.
+
+    Backpressure (file pleine) :
+    - "sync"  : l'appelant écrit synchroniquement (aucune ligne d'audit perdue)
+    - "drop"  : la ligne est abandonnée (comptée dans stats["dropped"])
+    - "block" : attente bornée (block_timeout_s) puis abandon
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        maxsize: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_s: float = 0.5,
+        backpressure: str = "sync",
+        block_timeout_s: float = 0.05,
+        max_retries: int = 3,
+    ):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"backpressure inconnue: {backpressure}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.backpressure = backpressure
+        self.block_timeout_s = block_timeout_s
+        self.max_retries = max_retries
+
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"queued": 0, "flushed": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # --- cycle de vie
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Arrêt propre : la file est vidée (flush) avant la fin du thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    # --- côté requête
+    def submit(self, row: dict[str, Any]) -> str:
+        """Retourne QUEUED, DROPPED ou SYNC_FALLBACK (à l'appelant d'écrire la ligne)."""
+        try:
+            if self.backpressure == "block":
+                self._queue.put(row, timeout=self.block_timeout_s)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            if self.backpressure == "sync":
+                return SYNC_FALLBACK
+            self._count("dropped")
+            return DROPPED
+        self._count("queued")
+        return QUEUED
+
+    # --- côté thread
+    def _next_batch(self) -> list[dict[str, Any]]:
+        try:
+            first = self._queue.get(timeout=self.flush_interval_s)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval_s
+        while len(batch) < self.batch_size:
+            try:
+                if self._stop.is_set():
+                    batch.append(self._queue.get_nowait())  # arrêt : on draine sans attendre
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: list[dict[str, Any]]) -> None:
+        for attempt in range(1, self.max_retries + 1):
+            db = self.session_factory()
+            try:
+                insert_predictions(db, batch)
+                db.commit()
+                self._count("flushed", len(batch))
+                self._count("batches")
+                return
+            except Exception as e:
+                db.rollback()
+                logger.warning("flush predictions (tentative %s) en échec: %s", attempt, e)
+                if attempt < self.max_retries:  # pas d'attente après la dernière tentative
+                    time.sleep(min(0.1 * 2**attempt, 2.0))
+            finally:
+                db.close()
+        self._count("failed", len(batch))
+        logger.error("%s prédictions non persistées après %s tentatives", len(batch), attempt)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+            elif self._stop.is_set() and self._queue.empty():
+                return
+
+
+_WRITER: Optional[PredictionWriter] = None
+
+
+def get_writer() -> Optional[PredictionWriter]:
+    """Writer actif (AUDIT_LOG_MODE=async et app démarrée), sinon None -> écriture synchrone."""
+    return _WRITER
+
+
+def start_writer(session_factory: Callable[[], Session], **kwargs: Any) -> PredictionWriter:
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = PredictionWriter(session_factory, **kwargs)
+        _WRITER.start()
+    return _WRITER
+
+
+def stop_writer() -> None:
+    global _WRITER
+    if _WRITER is not None:
+        _WRITER.stop()
+        _WRITER = None
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from technova_attrition.api.registry import ServedModel
+from technova_attrition.api.service import (
+    check_payload,
+    current_model,
+    decide_batch,
+    normalize_payloads,
+    predict_proba_batch,
+)
+from technova_attrition.serving_db_ops import insert_predictions
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def build_employees_query(
+    employee_ids: Optional[list[int]] = None,
+    features_filter: Optional[Dict[str, Any]] = None,
+    id_min: Optional[int] = None,
+    id_max: Optional[int] = None,
+):
+    """
+    SELECT employee_id, features FROM employees + filtres optionnels (tous paramétrés).
+    - employee_ids : liste explicite
+    - features_filter : égalités sur le JSONB (containment @>, ex: {"departement": "Commercial"})
+    - id_min / id_max : bornes inclusives sur employee_id
+    """
+    where = []
+    params: Dict[str, Any] = {}
+    if employee_ids is not None:
+        where.append("employee_id = ANY(:ids)")
+        params["ids"] = list(employee_ids)
+    if features_filter:
+        where.append("features @> CAST(:flt AS JSONB)")
+        params["flt"] = json.dumps(features_filter, ensure_ascii=False)
+    if id_min is not None:
+        where.append("employee_id >= :id_min")
+        params["id_min"] = id_min
+    if id_max is not None:
+        where.append("employee_id <= :id_max")
+        params["id_max"] = id_max
+
+    sql = "SELECT employee_id, features FROM employees"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY employee_id"
+    return text(sql), params
+
+
+def score_employee_rows(
+    rows: list[tuple[int, Any]],
+    write_db: Optional[Session] = None,
+    model: Optional[ServedModel] = None,
+) -> list[dict[str, Any]]:
+    """
+    Score un chunk (employee_id, features) comme une seule matrice.
+    Si write_db est fourni : INSERT multi-lignes + commit (le chunk est durable).
+    """
+    model = model or current_model()
+
+    # selon driver/param, ça peut arriver en dict OU en string JSON
+    payloads = normalize_payloads(
+        [json.loads(features) if isinstance(features, str) else features for _, features in rows]
+    )
+
+    results: list[dict[str, Any]] = []
+    valid: list[tuple[int, int, dict]] = []  # (position dans results, employee_id, payload)
+    for (employee_id, _), payload in zip(rows, payloads):
+        missing, nulls = check_payload(payload, model)
+        if missing or nulls:
+            results.append(
+                {
+                    "employee_id": employee_id,
+                    "ok": False,
+                    "error": {
+                        "message": "Features en DB incohérentes avec expected_features.json.",
+                        "missing_features": missing,
+                        "null_features": nulls,
+                    },
+                }
+            )
+            continue
+        valid.append((len(results), employee_id, payload))
+        results.append({"employee_id": employee_id, "ok": True})
+
+    if not valid:
+        return results
+
+    probas = predict_proba_batch([p for _, _, p in valid], model)
+    preds = decide_batch(probas, model)
+
+    db_ids: list[Optional[int]] = [None] * len(valid)
+    if write_db is not None:
+        db_ids = insert_predictions(
+            write_db,
+            [
+                {
+                    "employee_id": employee_id,
+                    "input_payload": payload,
+                    "proba": float(proba),
+                    "pred": int(pred),
+                    "thr": model.threshold,
+                    "ver": model.version,
+                }
+                for (_, employee_id, payload), proba, pred in zip(valid, probas, preds)
+            ],
+        )
+        write_db.commit()
+
+    for (pos, _, _), proba, pred, db_id in zip(valid, probas, preds, db_ids):
+        results[pos].update({"proba_depart": float(proba), "prediction": int(pred), "db_id": db_id})
+    return results
+
+
+def iter_bulk_scores(
+    read_db: Session,
+    write_db: Optional[Session] = None,
+    *,
+    employee_ids: Optional[list[int]] = None,
+    features_filter: Optional[Dict[str, Any]] = None,
+    id_min: Optional[int] = None,
+    id_max: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """
+    Générateur de résultats (un dict par employé, puis un dict "summary").
+
+    Mémoire plate : features lues par curseur serveur (yield_per) chunk par chunk ;
+    chaque chunk est scoré en une matrice puis écrit (INSERT multi-lignes) sur write_db.
+    Deux sessions distinctes : le commit d'écriture ne ferme pas le curseur de lecture.
+    Un seul modèle pour tout le flux, même si une bascule a lieu pendant l'export.
+    """
+    model = current_model()
+    q, params = build_employees_query(employee_ids, features_filter, id_min, id_max)
+
+    pending_ids = set(employee_ids) if employee_ids is not None else None
+    n_ok = 0
+    n_errors = 0
+
+    result = read_db.execute(q, params, execution_options={"yield_per": chunk_size})
+    for chunk in result.partitions(chunk_size):
+        for item in score_employee_rows([(int(r[0]), r[1]) for r in chunk], write_db, model):
+            if pending_ids is not None:
+                pending_ids.discard(item["employee_id"])
+            if item["ok"]:
+                n_ok += 1
+            else:
+                n_errors += 1
+            yield item
+
+    for employee_id in sorted(pending_ids or ()):
+        n_errors += 1
+        yield {"employee_id": employee_id, "ok": False, "error": {"message": "Employee not found"}}
+
+    yield {
+        "summary": {
+            "n_ok": n_ok,
+            "n_errors": n_errors,
+            "stored": write_db is not None,
+            "threshold": model.threshold,
+            "model_version": model.version,
+        }
+    }
+
+
+def to_ndjson(items: Iterator[dict[str, Any]]) -> Iterator[str]:
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + "\n"
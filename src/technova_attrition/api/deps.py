@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import time
+from typing import Any, Callable, TypeVar
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+
+from technova_attrition.api import metrics
+from technova_attrition.api.settings import AppConfig, get_config
 
-from technova_attrition.api.settings import get_config
+T = TypeVar("T")
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -21,18 +30,101 @@ def require_api_key(api_key: str = Depends(api_key_header)) -> None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
 
 
-def get_sessionmaker():
+class TimedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente d'une connexion libre (METRICS_ENABLED=1)."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe_pool_wait("sync", time.perf_counter() - t0)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe_pool_wait("async", time.perf_counter() - t0)
+
+
+def engine_kwargs(cfg: AppConfig, is_async: bool = False) -> dict[str, Any]:
+    """Réglages du pool (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)."""
+    kwargs: dict[str, Any] = {
+        "pool_pre_ping": True,
+        "pool_size": cfg.db_pool_size,
+        "max_overflow": cfg.db_max_overflow,
+        "pool_timeout": cfg.db_pool_timeout,
+        "pool_recycle": cfg.db_pool_recycle,
+    }
+    if cfg.metrics_enabled:
+        kwargs["poolclass"] = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    return kwargs
+
+
+def to_async_url(url: str) -> str:
+    """
+    postgresql+psycopg:// fonctionne tel quel en async (psycopg 3) ;
+    postgresql+asyncpg:// est respecté si l'utilisateur l'a choisi (driver installé à part).
+    """
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix) :]
+    return url
+
+
+def build_engine():
     cfg = get_config()
-    engine = create_engine(cfg.database_url, pool_pre_ping=True)
-    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    return create_engine(cfg.database_url, **engine_kwargs(cfg))
+
+
+def build_async_engine():
+    cfg = get_config()
+    return create_async_engine(to_async_url(cfg.database_url), **engine_kwargs(cfg, is_async=True))
+
 
+def get_sessionmaker(engine=None):
+    return sessionmaker(bind=engine or build_engine(), autocommit=False, autoflush=False)
 
-SessionLocal = get_sessionmaker()
 
+# moteur sync : toujours présent (scripts, streaming NDJSON, warm-up)
+engine = build_engine()
+SessionLocal = get_sessionmaker(engine)
+
+# moteur async : seulement si DB_ASYNC=1
+async_engine = build_async_engine() if get_config().db_async else None
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+
+async def get_db():
+    """Session async (DB_ASYNC=1) ou sync ; dans les deux cas, utiliser run_db()."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
 
-def get_db():
     db: Session = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
+
+
+async def run_db(db: Session | AsyncSession, fn: Callable[..., T], *args: Any) -> T:
+    """
+    Exécute fn(session_sync, *args) sans bloquer l'event loop :
+    - AsyncSession : run_sync (driver async, pas de thread)
+    - Session sync : threadpool Starlette
+    Les endpoints écrivent donc leur accès DB une seule fois, en code sync.
+    """
+    name = getattr(getattr(fn, "func", fn), "__name__", "query").lstrip("_")
+    with metrics.stage(f"db_{name}"):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args)
+        return await run_in_threadpool(fn, db, *args)
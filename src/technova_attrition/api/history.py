@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+DEFAULT_CHUNK_SIZE = 1000
+
+CSV_COLUMNS = [
+    "id",
+    "created_at",
+    "employee_id",
+    "proba_depart",
+    "prediction",
+    "threshold",
+    "model_version",
+]
+
+
+def encode_cursor(created_at: datetime, pred_id: int) -> str:
+    """Curseur opaque (base64url) de la dernière ligne lue : (created_at, id)."""
+    raw = f"{created_at.isoformat()}|{pred_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse de encode_cursor ; ValueError si le curseur est invalide."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        ts, pred_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pred_id)
+    except Exception as e:
+        raise ValueError(f"cursor invalide: {cursor!r}") from e
+
+
+def build_history_query(
+    employee_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_payload: bool = True,
+):
+    """
+    Historique en pagination keyset : ORDER BY (created_at, id) DESC, reprise strictement
+    après le curseur. Sans input_payload, la requête est couverte par les index composites
+    (idx_predictions_created_at_id / idx_predictions_employee_created_at_id).
+    """
+    cols = list(CSV_COLUMNS) + (["input_payload"] if include_payload else [])
+    where = []
+    params: Dict[str, Any] = {}
+    if employee_id is not None:
+        where.append("employee_id = :employee_id")
+        params["employee_id"] = employee_id
+    if cursor is not None:
+        params["c_ts"], params["c_id"] = decode_cursor(cursor)
+        # comparaison de tuples : utilisable telle quelle par l'index (created_at, id)
+        where.append("(created_at, id) < (:c_ts, :c_id)")
+
+    sql = f"SELECT {', '.join(cols)} FROM predictions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return text(sql), params
+
+
+def row_to_item(row: Any, include_payload: bool = True) -> dict[str, Any]:
+    item = {
+        "id": int(row[0]),
+        "created_at": row[1].isoformat(),
+        "employee_id": row[2],
+        "proba_depart": float(row[3]),
+        "prediction": int(row[4]),
+        "threshold": float(row[5]),
+        "model_version": row[6],
+    }
+    if include_payload:
+        # selon driver/param, ça peut arriver en dict OU en string JSON
+        item["input_payload"] = row[7] if isinstance(row[7], dict) else json.loads(row[7])
+    return item
+
+
+def fetch_history_page(
+    db: Session,
+    *,
+    employee_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    include_payload: bool = True,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """Une page + curseur de la page suivante (None si la page est la dernière)."""
+    q, params = build_history_query(employee_id, cursor, limit + 1, include_payload)
+    rows = db.execute(q, params).fetchall()
+    # une ligne de plus que demandé : savoir s'il reste des lignes sans COUNT(*)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1][1], int(rows[-1][0])) if has_more else None
+    return [row_to_item(r, include_payload) for r in rows], next_cursor
+
+
+def iter_history(
+    db: Session,
+    *,
+    employee_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_payload: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """Toutes les lignes (après `cursor`), lues par curseur serveur : mémoire plate."""
+    q, params = build_history_query(employee_id, cursor, None, include_payload)
+    result = db.execute(q, params, execution_options={"yield_per": chunk_size})
+    for chunk in result.partitions(chunk_size):
+        for r in chunk:
+            yield row_to_item(r, include_payload)
+
+
+def to_csv(items: Iterator[dict[str, Any]], include_payload: bool = True) -> Iterator[str]:
+    """CSV ligne à ligne (en-tête d'abord) ; input_payload sérialisé en JSON dans une colonne."""
+    columns = CSV_COLUMNS + (["input_payload"] if include_payload else [])
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def _flush() -> str:
+        out = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return out
+
+    writer.writerow(columns)
+    yield _flush()
+    for item in items:
+        if include_payload:
+            item = {**item, "input_payload": json.dumps(item["input_payload"], ensure_ascii=False)}
+        writer.writerow([item[c] for c in columns])
+        yield _flush()
@@ -1,16 +1,60 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
 
+from technova_attrition.api import audit_log, deps, metrics
+from technova_attrition.api.registry import get_registry
+from technova_attrition.api.routers.ops import router as ops_router
 from technova_attrition.api.routers.predict import router as predict_router
+from technova_attrition.api.service import get_inference_executor
+from technova_attrition.api.settings import get_config
+from technova_attrition.api.warmup import run_async_warmup, run_warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # uvicorn n'accepte le trafic qu'après ce bloc : le 1er /predict n'est plus "à froid"
+    cfg = get_config()
+    if cfg.warmup_on_startup:
+        await run_in_threadpool(run_warmup)
+        await run_async_warmup()
+    if cfg.audit_log_mode == "async":
+        audit_log.start_writer(
+            deps.SessionLocal,
+            maxsize=cfg.audit_queue_size,
+            batch_size=cfg.audit_batch_size,
+            flush_interval_s=cfg.audit_flush_interval_s,
+            backpressure=cfg.audit_backpressure,
+        )
+    if cfg.model_reload_poll_s > 0:
+        get_registry().start_polling(cfg.model_reload_poll_s)
+    yield
+
+    # arrêt propre : flush des prédictions en file, pools DB fermés, executor vidé
+    await run_in_threadpool(get_registry().stop_polling)
+    await run_in_threadpool(audit_log.stop_writer)
+    if deps.async_engine is not None:
+        await deps.async_engine.dispose()
+    deps.engine.dispose()
+    get_inference_executor().shutdown(wait=True)
+    get_inference_executor.cache_clear()
+
 
 app = FastAPI(
     title="TechNova Attrition API",
     version="1.0.0",
     description="API de scoring de probabilité de démission (POC) avec traçabilité DB.",
+    lifespan=lifespan,
 )
 
+# latence par endpoint + requêtes en vol : middleware ajouté seulement si activé
+if get_config().metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 
 # HF Space ouvre souvent "/". On redirige vers Swagger.
 @app.get("/", include_in_schema=False)
@@ -19,3 +63,4 @@ def root():
 
 
 app.include_router(predict_router)
+app.include_router(ops_router)
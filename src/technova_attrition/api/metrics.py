@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Iterable, Optional
+
+from starlette.routing import Match
+
+from technova_attrition.api import audit_log
+from technova_attrition.api.registry import get_registry
+from technova_attrition.api.settings import get_config
+
+# ---------------------------------------------------------------------------
+# Métriques Prometheus (format texte 0.0.4), sans dépendance externe.
+# Désactivées (METRICS_ENABLED=0) : stage() renvoie un context manager vide partagé,
+# pas de middleware, pas de pool instrumenté.
+# ---------------------------------------------------------------------------
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# secondes : de 0.5 ms (fast scorer) à 10 s (batch / DB saturée)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}  # labels -> [compteurs par bucket, somme, total]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        for labels, counts, total, n in sorted(series):
+            cum = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cum += c
+                le = f'le="{_fmt(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cum}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {n}"
+
+
+class Gauge:
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: tuple, amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} gauge"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, v in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_fmt(v)}"
+
+
+REQUEST_LATENCY = Histogram(
+    "technova_request_duration_seconds",
+    "Durée totale des requêtes HTTP.",
+    ("endpoint", "method", "status", "model_version"),
+)
+STAGE_LATENCY = Histogram(
+    "technova_stage_duration_seconds",
+    "Durée des étapes internes (validation, normalisation, inférence, DB...).",
+    ("endpoint", "stage", "model_version"),
+)
+IN_FLIGHT = Gauge(
+    "technova_requests_in_flight",
+    "Requêtes HTTP en cours de traitement.",
+    ("endpoint",),
+)
+POOL_WAIT = Histogram(
+    "technova_db_pool_checkout_wait_seconds",
+    "Attente d'une connexion libre dans le pool SQLAlchemy.",
+    ("engine",),
+)
+
+_ENDPOINT: ContextVar[str] = ContextVar("metrics_endpoint", default="other")
+_REQUEST_T0: ContextVar[Optional[float]] = ContextVar("metrics_request_t0", default=None)
+
+
+def enabled() -> bool:
+    return get_config().metrics_enabled
+
+
+def _model_version() -> str:
+    # version servie sans forcer de chargement (avant le 1er : pas encore de version)
+    return get_registry().version or "none"
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_Stage":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        observe_stage(self.name, time.perf_counter() - self.t0)
+
+
+_NOOP = contextlib.nullcontext()
+
+
+def stage(name: str):
+    """`with metrics.stage("normalize"):` ; no-op partagé si les métriques sont désactivées."""
+    if not enabled():
+        return _NOOP
+    return _Stage(name)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_LATENCY.observe((_ENDPOINT.get(), name, _model_version()), seconds)
+
+
+def mark_since_request(name: str) -> None:
+    """
+    Durée entre l'entrée dans le middleware et l'appel courant : lecture du body,
+    parsing JSON, validation Pydantic et dépendances (appelé en tête d'endpoint).
+    """
+    t0 = _REQUEST_T0.get()
+    if t0 is not None:
+        observe_stage(name, time.perf_counter() - t0)
+
+
+def observe_pool_wait(engine: str, seconds: float) -> None:
+    POOL_WAIT.observe((engine,), seconds)
+
+
+def _counter_lines(name: str, doc: str, label: str, values: dict[str, Any]) -> Iterable[str]:
+    yield f"# HELP {name} {doc}"
+    yield f"# TYPE {name} counter"
+    for key, v in values.items():
+        yield f'{name}{{{label}="{key}"}} {_fmt(v)}'
+
+
+def _runtime_lines() -> Iterable[str]:
+    """Compteurs tenus ailleurs (cache de prédictions, write-behind), lus au scrape."""
+    # import local : prediction_cache -> service -> metrics (cycle au chargement)
+    from technova_attrition.api.prediction_cache import get_cache
+
+    cache = get_cache()
+    if cache is not None:
+        snap = cache.snapshot()
+        events = ("hits", "misses", "evictions", "expirations", "invalidations")
+        yield from _counter_lines(
+            "technova_prediction_cache_events_total",
+            "Événements du cache de prédictions.",
+            "event",
+            {e: snap[e] for e in events},
+        )
+        yield "# HELP technova_prediction_cache_size Entrées dans le cache de prédictions."
+        yield "# TYPE technova_prediction_cache_size gauge"
+        yield f"technova_prediction_cache_size {snap['size']}"
+
+    writer = audit_log.get_writer()
+    if writer is not None:
+        yield from _counter_lines(
+            "technova_audit_writer_rows_total",
+            "Lignes d'audit du write-behind, par statut.",
+            "status",
+            dict(writer.stats),
+        )
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in (REQUEST_LATENCY, STAGE_LATENCY, IN_FLIGHT, POOL_WAIT):
+        lines.extend(metric.render())
+    lines.extend(_runtime_lines())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (installé seulement si METRICS_ENABLED=1) : latence totale et
+    requêtes en vol par endpoint. Le label endpoint est le gabarit de route
+    (/history/{employee_id}), pas le chemin brut : cardinalité bornée.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[list] = None
+
+    @staticmethod
+    def _leaf_routes(routes) -> Iterable[Any]:
+        # routeurs inclus : aplatis (la structure interne varie selon la version de FastAPI)
+        for route in routes:
+            nested = getattr(route, "routes", None)
+            if nested is None and hasattr(route, "original_router"):
+                nested = route.original_router.routes
+            if nested is not None and not hasattr(route, "path"):
+                yield from MetricsMiddleware._leaf_routes(nested)
+            elif hasattr(route, "matches"):
+                yield route
+
+    def _endpoint(self, scope) -> str:
+        if self._routes is None:
+            self._routes = list(self._leaf_routes(scope["app"].routes))
+        for route in self._routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "other")
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        t0 = time.perf_counter()
+        tok_ep = _ENDPOINT.set(endpoint)
+        tok_t0 = _REQUEST_T0.set(t0)
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc((endpoint,))
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            IN_FLIGHT.dec((endpoint,))
+            REQUEST_LATENCY.observe(
+                (endpoint, scope["method"], str(status["code"]), _model_version()),
+                time.perf_counter() - t0,
+            )
+            _ENDPOINT.reset(tok_ep)
+            _REQUEST_T0.reset(tok_t0)
+
+
+def reset() -> None:
+    """Remise à zéro (tests)."""
+    for metric in (REQUEST_LATENCY, STAGE_LATENCY, POOL_WAIT):
+        metric._series.clear()
+    IN_FLIGHT._values.clear()
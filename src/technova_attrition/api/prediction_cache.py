@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from technova_attrition.api.service import model_artifacts_token
+from technova_attrition.api.settings import get_config
+
+# statut de persistance d'un hit en mode "reference" : pas de nouvelle ligne,
+# db_id = ligne d'audit de la prédiction d'origine
+CACHED = "cached"
+
+
+def payload_key(
+    payload: Dict[str, Any], model_version: str, employee_id: Optional[int] = None
+) -> str:
+    """
+    Hash canonique (clés triées, séparateurs fixes) du payload *normalisé* + version
+    (ServedModel.cache_namespace côté API) : deux payloads égaux après normalisation
+    partagent la même entrée.
+    """
+    canon = json.dumps(
+        [model_version, employee_id, payload],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    proba: float
+    expires_at: float
+    # ligne d'audit d'origine (None si write-behind / non persistée)
+    db_id: Optional[int] = None
+
+
+class PredictionCache:
+    """
+    Cache LRU + TTL des probabilités (thread-safe : lu depuis l'event loop, rempli
+    après l'inférence).
+
+    `token_fn` renvoie un jeton du modèle servi (ex. service.model_artifacts_token :
+    ServedModel.token du registry, soit version, seuil et signature des artefacts) : s'il
+    change (bascule du registry), le cache est vidé. Il est relu au plus toutes les
+    `check_interval_s` secondes, pas à chaque requête.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_s: float = 300.0,
+        token_fn: Optional[Callable[[], Hashable]] = None,
+        check_interval_s: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.token_fn = token_fn
+        self.check_interval_s = check_interval_s
+        self.clock = clock
+
+        self._data: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._token = token_fn() if token_fn else None
+        self._next_check = clock() + check_interval_s
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _check_token(self, now: float) -> None:
+        # appelé sous verrou
+        if self.token_fn is None or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval_s
+        token = self.token_fn()
+        if token != self._token:
+            self._token = token
+            self._clear()
+
+    def _clear(self) -> None:
+        self._data.clear()
+        self.stats["invalidations"] += 1
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        now = self.clock()
+        with self._lock:
+            self._check_token(now)
+            entry = self._data.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._data[key]
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key: str, proba: float, db_id: Optional[int] = None) -> None:
+        now = self.clock()
+        expires_at = now + self.ttl_s if self.ttl_s > 0 else float("inf")
+        with self._lock:
+            self._data[key] = CacheEntry(float(proba), expires_at, db_id)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self) -> None:
+        """Vidage explicite (ex: rechargement du modèle)."""
+        with self._lock:
+            self._clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl_s,
+                "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            }
+
+
+_CACHE: Optional[PredictionCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> Optional[PredictionCache]:
+    """Cache actif si PREDICTION_CACHE=1 (créé au premier appel), sinon None."""
+    global _CACHE
+    cfg = get_config()
+    if not cfg.prediction_cache:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = PredictionCache(
+                    max_size=cfg.prediction_cache_size,
+                    ttl_s=cfg.prediction_cache_ttl_s,
+                    token_fn=model_artifacts_token,
+                )
+    return _CACHE
+
+
+def reset_cache() -> None:
+    global _CACHE
+    _CACHE = None
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import cached_property, lru_cache
+from typing import Any, Callable, Optional
+
+import joblib
+import numpy as np
+
+from technova_attrition.api.settings import AppConfig, get_config, resolve_model_identity
+from technova_attrition.fast_explainer import LinearExplainer, load_explainer
+from technova_attrition.fast_scorer import CompiledScorer, load_compiled
+from technova_attrition.normalization import records_to_frame
+
+logger = logging.getLogger(__name__)
+
+# écart max toléré entre pipeline sklearn et scorer compilé sur la prédiction de contrôle
+COMPILED_PARITY_TOL = 1e-6
+
+
+class ModelValidationError(RuntimeError):
+    """Artefacts candidats refusés : le modèle servi reste en place."""
+
+
+@dataclass(frozen=True)
+class ServedModel:
+    """
+    Un jeu d'artefacts chargé et validé (immuable). Une requête prend une référence
+    au début et s'en sert jusqu'au bout : une bascule ne l'affecte pas.
+    """
+
+    version: str
+    threshold: float
+    pipeline: Any
+    expected_features: list[str]
+    compiled: Optional[CompiledScorer]
+    signature: tuple  # (mtime_ns, taille) des artefacts lus
+    loaded_at: float
+    explainer: Optional[LinearExplainer] = None
+
+    @property
+    def token(self) -> tuple:
+        return (self.version, self.threshold, self.signature)
+
+    @cached_property
+    def cache_namespace(self) -> str:
+        """
+        Préfixe des clés du cache de prédictions : version + empreinte des fichiers.
+        Même version, artefacts différents -> clés différentes (pas de proba périmée).
+        """
+        return f"{self.version}:{_signature_digest(self.signature)}"
+
+    def require_compiled(self) -> CompiledScorer:
+        if self.compiled is None:
+            raise FileNotFoundError("Pipeline compilé non chargé (FAST_SCORER / FEATURE_STORE)")
+        return self.compiled
+
+    def require_explainer(self) -> LinearExplainer:
+        if self.explainer is None:
+            raise FileNotFoundError("Explainer non chargé (models/explainer.json absent)")
+        return self.explainer
+
+
+def _signature_digest(signature: tuple) -> str:
+    return hashlib.sha256(repr(signature).encode("utf-8")).hexdigest()[:12]
+
+
+def _artifact_paths(cfg: AppConfig) -> tuple:
+    return (
+        cfg.pipeline_path,
+        cfg.compiled_pipeline_path,
+        cfg.model_card_path,
+        cfg.expected_features_path,
+        cfg.explainer_path,
+    )
+
+
+def artifacts_signature(cfg: AppConfig) -> tuple:
+    """(mtime_ns, taille) de chaque artefact (None si absent) : un stat() par fichier."""
+    sig = []
+    for path in _artifact_paths(cfg):
+        try:
+            st = path.stat()
+            sig.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def read_expected_features(cfg: AppConfig) -> list[str]:
+    data = json.loads(cfg.expected_features_path.read_text(encoding="utf-8"))
+    if not isinstance(data, list) or not all(isinstance(x, str) for x in data):
+        raise ValueError("expected_features.json invalide (doit être une liste de strings)")
+    return data
+
+
+def needs_compiled(cfg: AppConfig) -> bool:
+    # l'explainer s'appuie sur le transform du scorer compilé
+    return cfg.fast_scorer or cfg.feature_store or cfg.explainer_path.exists()
+
+
+def load_model(cfg: AppConfig) -> ServedModel:
+    """Charge les artefacts de models/ (sans les valider)."""
+    # signature lue avant les fichiers : une écriture concurrente déclenchera un autre rechargement
+    signature = artifacts_signature(cfg)
+    if not cfg.pipeline_path.exists():
+        raise FileNotFoundError(f"Pipeline introuvable: {cfg.pipeline_path}")
+    # carte sans model_version (ni MODEL_VERSION) : version dérivée des artefacts, qui
+    # change donc à chaque bascule
+    threshold, version = resolve_model_identity(
+        cfg.model_card_path, default_version=f"dev-{_signature_digest(signature)}"
+    )
+    compiled = load_compiled(cfg.compiled_pipeline_path) if needs_compiled(cfg) else None
+    explainer = None
+    if cfg.explainer_path.exists():
+        try:
+            explainer = load_explainer(cfg.explainer_path, compiled)
+        except ValueError as e:
+            raise ModelValidationError(str(e)) from e
+    return ServedModel(
+        version=version,
+        threshold=threshold,
+        pipeline=joblib.load(cfg.pipeline_path),
+        expected_features=read_expected_features(cfg),
+        compiled=compiled,
+        signature=signature,
+        loaded_at=time.time(),
+        explainer=explainer,
+    )
+
+
+def imputer_payload(pipeline: Any, expected_features: list[str]) -> dict[str, Any]:
+    """
+    Payload complet construit depuis les valeurs d'imputation du pipeline
+    (médianes / modalités les plus fréquentes) : pas besoin de données réelles.
+    """
+    pre = pipeline.named_steps["preprocess"]
+    payload: dict[str, Any] = {f: None for f in expected_features}
+    for _, trans, cols in pre.transformers_:
+        imputer = getattr(trans, "named_steps", {}).get("imputer")
+        if imputer is None:
+            continue
+        for col, val in zip(cols, imputer.statistics_):
+            payload[col] = val.item() if isinstance(val, np.generic) else val
+    return payload
+
+
+def validate_model(model: ServedModel) -> float:
+    """
+    Contrôles avant bascule : features attendues = colonnes vues au fit, prédiction
+    synthétique dans [0, 1], scorer compilé aligné sur le pipeline, explications qui
+    somment au logit. Retourne la proba.
+    """
+    seen = getattr(model.pipeline, "feature_names_in_", None)
+    if seen is not None and list(seen) != model.expected_features:
+        missing = sorted(set(seen) - set(model.expected_features))
+        extra = sorted(set(model.expected_features) - set(seen))
+        raise ModelValidationError(
+            "expected_features.json incohérent avec le pipeline "
+            f"(absentes: {missing}, en trop: {extra}, ou ordre différent)"
+        )
+
+    payload = imputer_payload(model.pipeline, model.expected_features)
+    X = records_to_frame([payload], model.expected_features)
+    proba = float(model.pipeline.predict_proba(X)[:, 1][0])
+    if not (math.isfinite(proba) and 0.0 <= proba <= 1.0):
+        raise ModelValidationError(f"prédiction de contrôle invalide: {proba}")
+
+    if model.compiled is not None:
+        fast = model.compiled.predict_proba_one(payload)
+        if abs(fast - proba) > COMPILED_PARITY_TOL:
+            raise ModelValidationError(
+                f"pipeline_compiled.json désynchronisé du pipeline ({fast} vs {proba})"
+            )
+
+    if model.explainer is not None:
+        logit = model.compiled.decision_function_one(payload)
+        explained = model.explainer.explain_one(payload, top_k=1)["logit"]
+        if abs(explained - logit) > COMPILED_PARITY_TOL:
+            raise ModelValidationError(f"explainer.json incohérent ({explained} vs {logit})")
+    return proba
+
+
+def _invalidate_prediction_cache() -> None:
+    # import local : prediction_cache -> service -> registry (cycle au chargement)
+    from technova_attrition.api.prediction_cache import get_cache
+
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate()
+
+
+class ModelRegistry:
+    """
+    Modèle servi + rechargement à chaud.
+
+    reload() charge et valide les artefacts dans le thread appelant (threadpool, thread
+    de scrutation), puis bascule par une seule affectation : les requêtes déjà
+    commencées terminent sur l'ancien ServedModel, les suivantes voient le nouveau.
+    Artefacts refusés : l'ancien modèle reste servi, la signature refusée n'est pas
+    re-tentée (sauf force=True) tant que les fichiers ne changent pas.
+
+    MODEL_VERSION / MODEL_THRESHOLD (env) figent l'identité servie : un rechargement
+    bascule les poids mais garde ce libellé de version et ce seuil. Pour que version et
+    seuil suivent model_card.json, laisser ces variables vides.
+    """
+
+    def __init__(self, config_fn: Callable[[], AppConfig] = get_config):
+        self.config_fn = config_fn
+        self._current: Optional[ServedModel] = None
+        self._rejected_signature: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"checks": 0, "reloads": 0, "rejected": 0}
+        self.last_error: Optional[str] = None
+
+    def _load_validated(self) -> ServedModel:
+        model = load_model(self.config_fn())
+        validate_model(model)
+        return model
+
+    def current(self) -> ServedModel:
+        """Modèle servi ; chargé (et validé) au premier appel."""
+        model = self._current
+        if model is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self._load_validated()
+                model = self._current
+        return model
+
+    @property
+    def version(self) -> Optional[str]:
+        """Version servie, sans déclencher de chargement (None avant le premier)."""
+        model = self._current
+        return model.version if model is not None else None
+
+    def reload(self, force: bool = False) -> dict[str, Any]:
+        """
+        Recharge si les artefacts ont changé (ou force=True).
+        Statuts : "unchanged", "reloaded" ; ModelValidationError si le candidat est refusé.
+        """
+        with self._lock:
+            self.stats["checks"] += 1
+            previous = self._current
+            signature = artifacts_signature(self.config_fn())
+            if not force and previous is not None and signature == previous.signature:
+                return {"status": "unchanged", "model_version": previous.version}
+            if not force and signature == self._rejected_signature:
+                raise ModelValidationError(f"artefacts déjà refusés: {self.last_error}")
+
+            try:
+                candidate = self._load_validated()
+            except Exception as e:
+                self.stats["rejected"] += 1
+                self._rejected_signature = signature
+                self.last_error = (
+                    str(e) if isinstance(e, ModelValidationError) else f"{type(e).__name__}: {e}"
+                )
+                logger.warning("rechargement du modèle refusé: %s", self.last_error)
+                raise ModelValidationError(self.last_error) from e
+
+            self._current = candidate  # bascule atomique
+            self._rejected_signature = None
+            self.last_error = None
+            self.stats["reloads"] += 1
+
+        _invalidate_prediction_cache()
+        prev_version = previous.version if previous is not None else None
+        logger.info("modèle rechargé: %s -> %s", prev_version, candidate.version)
+        return {
+            "status": "reloaded",
+            "previous_version": prev_version,
+            "model_version": candidate.version,
+        }
+
+    # --- scrutation de models/ (MODEL_RELOAD_POLL_S > 0)
+    def start_polling(self, interval_s: float) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._poll, args=(interval_s,), name="model-registry", daemon=True
+        )
+        self._thread.start()
+
+    def stop_polling(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    def _poll(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            try:
+                self.reload()
+            except ModelValidationError:
+                pass  # déjà journalisé ; l'ancien modèle reste servi
+            except Exception:
+                logger.exception("scrutation des artefacts en échec")
+
+    def snapshot(self) -> dict[str, Any]:
+        model = self._current
+        return {
+            "model_version": model.version if model is not None else None,
+            "threshold": model.threshold if model is not None else None,
+            "loaded_at": (
+                datetime.fromtimestamp(model.loaded_at, timezone.utc).isoformat(timespec="seconds")
+                if model is not None
+                else None
+            ),
+            "polling": self._thread is not None,
+            **self.stats,
+            "last_error": self.last_error,
+        }
+
+
+@lru_cache
+def get_registry() -> ModelRegistry:
+    return ModelRegistry()
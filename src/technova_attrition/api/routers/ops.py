@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from technova_attrition.api import audit_log, metrics, warmup
+from technova_attrition.api.deps import require_api_key
+from technova_attrition.api.prediction_cache import get_cache
+from technova_attrition.api.registry import ModelValidationError, get_registry
+
+router = APIRouter(tags=["ops"])
+
+
+@router.get("/ready")
+async def ready():
+    """
+    Readiness (load balancer) ≠ liveness (/health) : 200 seulement quand pipeline,
+    features attendues, prédiction synthétique et pool DB sont chauds.
+    Les étapes en échec sont rejouées à chaque appel (ex: DB indisponible au boot).
+    """
+    if not warmup.READINESS.ready:
+        await run_in_threadpool(warmup.run_warmup, True)
+        await warmup.run_async_warmup(only_failed=True)
+    state = warmup.READINESS
+    return JSONResponse(status_code=200 if state.ready else 503, content=state.as_dict())
+
+
+@router.get("/stats", dependencies=[Depends(require_api_key)])
+def stats():
+    """
+    Compteurs internes : modèle servi (rechargements), cache de prédictions
+    (hits/misses/évictions) et write-behind.
+    """
+    cache = get_cache()
+    writer = audit_log.get_writer()
+    return {
+        "model": get_registry().snapshot(),
+        "prediction_cache": cache.snapshot() if cache is not None else None,
+        "audit_writer": dict(writer.stats) if writer is not None else None,
+    }
+
+
+@router.post("/admin/reload-model", dependencies=[Depends(require_api_key)])
+async def reload_model(force: bool = False):
+    """
+    Recharge models/ sans redémarrer : chargement + validation hors event loop, puis
+    bascule atomique. Artefacts refusés -> 422, l'ancien modèle reste servi.
+    force=True : recharge même si les fichiers n'ont pas changé.
+    """
+    registry = get_registry()
+    try:
+        return await run_in_threadpool(registry.reload, force)
+    except ModelValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "message": "Nouveau modèle refusé, version précédente conservée.",
+                "error": str(e),
+                "model_version": registry.version,
+            },
+        ) from e
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Exposition Prometheus (METRICS_ENABLED=1) ; labels sans donnée RH (routes, étapes)."""
+    if not metrics.enabled():
+        raise HTTPException(status_code=404, detail="Metrics disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,18 +1,68 @@
 from __future__ import annotations
 
 import json
+from functools import partial
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from technova_attrition.api.deps import get_db, require_api_key
-from technova_attrition.api.schemas import HistoryItem, PredictRequest, PredictResponse
-from technova_attrition.api.service import check_payload, decide, normalize_payload, predict_proba
+from technova_attrition.api import metrics
+from technova_attrition.api.audit_log import PERSISTED, SYNC_FALLBACK, get_writer
+from technova_attrition.api.bulk import iter_bulk_scores, to_ndjson
+from technova_attrition.api.deps import SessionLocal, get_db, require_api_key, run_db
+from technova_attrition.api.history import (
+    decode_cursor,
+    fetch_history_page,
+    iter_history,
+    to_csv,
+)
+from technova_attrition.api.prediction_cache import CACHED, get_cache, payload_key
+from technova_attrition.api.registry import ServedModel
+from technova_attrition.api.schemas import (
+    MAX_EXPLAIN_TOP_K,
+    HistoryItem,
+    PredictBatchItem,
+    PredictBatchRequest,
+    PredictBatchResponse,
+    PredictByIdsRequest,
+    PredictRequest,
+    PredictResponse,
+    non_primitive_keys,
+)
+from technova_attrition.api.service import (
+    check_payload,
+    current_model,
+    decide,
+    decide_batch,
+    explain_batch,
+    normalize_payload,
+    normalize_payloads,
+    predict_proba,
+    predict_proba_batch,
+    run_inference,
+)
 from technova_attrition.api.settings import get_config
+from technova_attrition.feature_store import fetch_employee_with_vector
+from technova_attrition.serving_db_ops import insert_predictions
 
 router = APIRouter(tags=["prediction"])
 
+# borne haute d'une page /history (au-delà : /history/export en streaming)
+MAX_HISTORY_LIMIT = 1000
+
+# ?explain=k sur /predict, /predict_batch, /predict_by_id (0 : pas d'explication)
+ExplainTopK = Query(
+    0,
+    ge=0,
+    le=MAX_EXPLAIN_TOP_K,
+    description="Top-k variables brutes par |contribution| (log-odds) ; 0 = désactivé.",
+)
+
 
 @router.get("/health")
 def health():
@@ -25,13 +75,145 @@ _INSERT_PRED = text("""
     RETURNING id
 """)
 
+_SELECT_EMP = text("SELECT features FROM employees WHERE employee_id = :id")
 
-@router.post("/predict", response_model=PredictResponse, dependencies=[Depends(require_api_key)])
-def predict(req: PredictRequest, db: Session = Depends(get_db)):
+
+# --- Accès DB (code sync, exécuté via run_db : threadpool ou driver async) ---
+def _insert_one(db: Session, row: dict) -> int:
+    out = db.execute(
+        _INSERT_PRED,
+        {**row, "input_payload": json.dumps(row["input_payload"], ensure_ascii=False)},
+    ).fetchone()
+    db.commit()
+    return int(out[0])
+
+
+def _insert_many(db: Session, rows: list[dict]) -> list[int]:
+    ids = insert_predictions(db, rows)
+    db.commit()
+    return ids
+
+
+async def _persist(db: Session, rows: list[dict]) -> list[tuple[str, int | None]]:
+    """
+    Lignes d'audit : write-behind si AUDIT_LOG_MODE=async (statut "queued"/"dropped"),
+    sinon INSERT + commit avant de répondre (statut "persisted" + db_id).
+    """
+    out: list[tuple[str, int | None]] = [(PERSISTED, None)] * len(rows)
+    to_write = list(range(len(rows)))
+
+    writer = get_writer()
+    if writer is not None:
+        to_write = []
+        for i, row in enumerate(rows):
+            if writer.backpressure == "block":
+                status = await run_in_threadpool(writer.submit, row)
+            else:
+                status = writer.submit(row)
+            if status == SYNC_FALLBACK:
+                to_write.append(i)
+            else:
+                out[i] = (status, None)
+
+    if to_write:
+        if len(rows) == 1:
+            ids = [await run_db(db, _insert_one, rows[0])]
+        else:
+            ids = await run_db(db, _insert_many, [rows[i] for i in to_write])
+        for i, db_id in zip(to_write, ids):
+            out[i] = (PERSISTED, db_id)
+    return out
+
+
+async def _score(
+    model: ServedModel, payloads: list[dict], employee_ids: list[int | None]
+) -> tuple[np.ndarray, list, list[str | None]]:
+    """
+    Probabilités, avec cache optionnel (PREDICTION_CACHE=1) : seuls les misses passent
+    par l'inférence. Retourne (probas, hits, clés) ; hits[i] = entrée de cache ou None.
+    """
+    cache = get_cache()
+    hits: list = [None] * len(payloads)
+    keys: list[str | None] = [None] * len(payloads)
+    if cache is not None:
+        with metrics.stage("cache_lookup"):
+            ns = model.cache_namespace
+            keys = [payload_key(p, ns, e) for p, e in zip(payloads, employee_ids)]
+            hits = [cache.get(k) for k in keys]
+
+    probas = np.array([h.proba if h is not None else np.nan for h in hits], dtype=float)
+    misses = [i for i, h in enumerate(hits) if h is None]
+    if len(payloads) == 1 and misses:
+        probas[0] = await run_inference(predict_proba, payloads[0], model)
+    elif misses:
+        probas[misses] = await run_inference(
+            predict_proba_batch, [payloads[i] for i in misses], model
+        )
+    return probas, hits, keys
+
+
+async def _audit(
+    db: Session, rows: list[dict], hits: list, keys: list[str | None]
+) -> list[tuple[str, int | None]]:
+    """
+    _persist + cache : un hit en mode PREDICTION_CACHE_AUDIT=reference renvoie la ligne
+    d'audit d'origine (statut "cached") au lieu d'en écrire une nouvelle.
+    """
     cfg = get_config()
+    cache = get_cache()
+    out: list[tuple[str, int | None]] = [(PERSISTED, None)] * len(rows)
+    to_write = []
+    for i, hit in enumerate(hits):
+        if hit is not None and hit.db_id is not None and cfg.prediction_cache_audit == "reference":
+            out[i] = (CACHED, hit.db_id)
+        else:
+            to_write.append(i)
+
+    with metrics.stage("persist"):
+        persisted = await _persist(db, [rows[i] for i in to_write]) if to_write else []
+    for i, (status, db_id) in zip(to_write, persisted):
+        out[i] = (status, db_id)
+        if cache is None or keys[i] is None:
+            continue
+        if hits[i] is None:
+            cache.put(keys[i], rows[i]["proba"], db_id)
+        elif hits[i].db_id is None:
+            hits[i].db_id = db_id  # 1re ligne persistée pour cette entrée
+    return out
+
+
+def _require_explainer(model: ServedModel, explain: int) -> None:
+    # vérifié avant tout scoring / écriture d'audit
+    if explain and model.explainer is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Explications indisponibles : models/explainer.json absent "
+            "(scripts/build_explainer.py).",
+        )
+
+
+async def _explain(model: ServedModel, payloads: list[dict], explain: int) -> list:
+    if not explain:
+        return [None] * len(payloads)
+    return await run_inference(explain_batch, payloads, explain, model)
+
+
+def _fetch_employee_features(db: Session, employee_id: int):
+    row = db.execute(_SELECT_EMP, {"id": employee_id}).fetchone()
+    return row[0] if row else None
 
-    payload = normalize_payload(req.features)
-    missing, nulls = check_payload(payload)
+
+@router.post("/predict", response_model=PredictResponse, dependencies=[Depends(require_api_key)])
+async def predict(req: PredictRequest, explain: int = ExplainTopK, db: Session = Depends(get_db)):
+    metrics.mark_since_request("parse_validate")
+    # un seul modèle pour toute la requête (rechargement à chaud : cf. registry)
+    model = current_model()
+    _require_explainer(model, explain)
+
+    with metrics.stage("normalize"):
+        payload = normalize_payload(req.features)
+    with metrics.stage("check_payload"):
+        missing, nulls = check_payload(payload, model)
 
     # On refuse les payloads incomplets -> 422 explicite (propre pour l’évaluation)
     if missing or nulls:
@@ -45,30 +227,143 @@ def predict(req: PredictRequest, db: Session = Depends(get_db)):
             },
         )
 
-    proba = predict_proba(payload)
-    pred = decide(proba)
+    probas, hits, keys = await _score(model, [payload], [None])
+    proba = float(probas[0])
+    pred = decide(proba, model)
+    [explanation] = await _explain(model, [payload], explain)
 
-    input_json = json.dumps(payload, ensure_ascii=False)
-    row = db.execute(
-        _INSERT_PRED,
-        {
-            "employee_id": None,
-            "input_payload": input_json,
-            "proba": proba,
-            "pred": pred,
-            "thr": cfg.model_threshold,
-            "ver": cfg.model_version,
-        },
-    ).fetchone()
-    db.commit()
+    [(persistence, db_id)] = await _audit(
+        db,
+        [
+            {
+                "employee_id": None,
+                "input_payload": payload,
+                "proba": proba,
+                "pred": pred,
+                "thr": model.threshold,
+                "ver": model.version,
+            }
+        ],
+        hits,
+        keys,
+    )
 
     return PredictResponse(
         proba_depart=proba,
         prediction=pred,
-        threshold=cfg.model_threshold,
-        model_version=cfg.model_version,
-        stored=True,
-        db_id=int(row[0]),
+        threshold=model.threshold,
+        model_version=model.version,
+        stored=persistence in {PERSISTED, CACHED},
+        db_id=db_id,
+        persistence=persistence,
+        explanation=explanation,
+    )
+
+
+def _prepare_batch(
+    records: list[dict], model: ServedModel
+) -> tuple[list[PredictBatchItem | None], list[int], list[dict]]:
+    """Normalisation (tous les records d'un coup) + validation ; erreurs record par record."""
+    items: list[PredictBatchItem | None] = [None] * len(records)
+    candidates: list[int] = []
+    for i, features in enumerate(records):
+        bad = non_primitive_keys(features)
+        if bad:
+            items[i] = PredictBatchItem(
+                index=i,
+                ok=False,
+                error={"message": "Valeurs non supportées.", "invalid_features": bad},
+            )
+        else:
+            candidates.append(i)
+
+    valid_idx: list[int] = []
+    valid_payloads: list[dict] = []
+    with metrics.stage("normalize"):
+        normalized = normalize_payloads([records[i] for i in candidates])
+    with metrics.stage("check_payload"):
+        for i, payload in zip(candidates, normalized):
+            missing, nulls = check_payload(payload, model)
+            if missing or nulls:
+                items[i] = PredictBatchItem(
+                    index=i,
+                    ok=False,
+                    error={
+                        "message": "Payload incomplet ou valeurs nulles.",
+                        "missing_features": missing,
+                        "null_features": nulls,
+                    },
+                )
+                continue
+
+            valid_idx.append(i)
+            valid_payloads.append(payload)
+    return items, valid_idx, valid_payloads
+
+
+@router.post(
+    "/predict_batch",
+    response_model=PredictBatchResponse,
+    dependencies=[Depends(require_api_key)],
+)
+async def predict_batch(
+    req: PredictBatchRequest, explain: int = ExplainTopK, db: Session = Depends(get_db)
+):
+    metrics.mark_since_request("parse_validate")
+    model = current_model()
+    _require_explainer(model, explain)
+
+    # 1) normalisation + validation hors event loop (jusqu'à MAX_BATCH_RECORDS records)
+    items, valid_idx, valid_payloads = await run_inference(
+        _prepare_batch, req.records, model, stage="prepare"
+    )
+
+    # 2) un seul predict_proba sur N lignes + un seul INSERT multi-lignes / un seul commit
+    if valid_payloads:
+        probas, hits, keys = await _score(model, valid_payloads, [None] * len(valid_payloads))
+        preds = decide_batch(probas, model)
+        explanations = await _explain(model, valid_payloads, explain)
+
+        persisted = await _audit(
+            db,
+            [
+                {
+                    "employee_id": None,
+                    "input_payload": payload,
+                    "proba": float(proba),
+                    "pred": int(pred),
+                    "thr": model.threshold,
+                    "ver": model.version,
+                }
+                for payload, proba, pred in zip(valid_payloads, probas, preds)
+            ],
+            hits,
+            keys,
+        )
+
+        for i, proba, pred, (persistence, db_id), explanation in zip(
+            valid_idx, probas, preds, persisted, explanations
+        ):
+            items[i] = PredictBatchItem(
+                index=i,
+                ok=True,
+                proba_depart=float(proba),
+                prediction=int(pred),
+                db_id=db_id,
+                persistence=persistence,
+                explanation=explanation,
+            )
+
+    statuses = {it.persistence for it in items if it.ok}
+    return PredictBatchResponse(
+        threshold=model.threshold,
+        model_version=model.version,
+        n_records=len(req.records),
+        n_ok=len(valid_idx),
+        n_errors=len(req.records) - len(valid_idx),
+        stored=bool(statuses) and statuses <= {PERSISTED, CACHED},
+        persistence=statuses.pop() if len(statuses) == 1 else "mixed",
+        items=items,
     )
 
 
@@ -77,21 +372,36 @@ def predict(req: PredictRequest, db: Session = Depends(get_db)):
     response_model=PredictResponse,
     dependencies=[Depends(require_api_key)],
 )
-def predict_by_id(employee_id: int, db: Session = Depends(get_db)):
+async def predict_by_id(
+    employee_id: int, explain: int = ExplainTopK, db: Session = Depends(get_db)
+):
+    metrics.mark_since_request("parse_validate")
     cfg = get_config()
+    model = current_model()
+    _require_explainer(model, explain)
 
-    q_emp = text("SELECT features FROM employees WHERE employee_id = :id")
-    row = db.execute(q_emp, {"id": employee_id}).fetchone()
-    if not row:
-        raise HTTPException(status_code=404, detail="Employee not found")
+    vector = None
+    if cfg.feature_store:
+        # features + vecteur précalculé (NULL si absent/périmé) en une requête
+        found = await run_db(
+            db, fetch_employee_with_vector, employee_id, model.require_compiled(), model.version
+        )
+        if found is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        payload, vector = found
+    else:
+        payload = await run_db(db, _fetch_employee_features, employee_id)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
 
-    payload = row[0]
-    # selon driver/param, ça peut arriver en dict OU en string JSON
-    if isinstance(payload, str):
-        payload = json.loads(payload)
+        # selon driver/param, ça peut arriver en dict OU en string JSON
+        if isinstance(payload, str):
+            payload = json.loads(payload)
 
-    payload = normalize_payload(payload)
-    missing, nulls = check_payload(payload)
+    with metrics.stage("normalize"):
+        payload = normalize_payload(payload)
+    with metrics.stage("check_payload"):
+        missing, nulls = check_payload(payload, model)
     if missing or nulls:
         raise HTTPException(
             status_code=500,
@@ -102,55 +412,151 @@ def predict_by_id(employee_id: int, db: Session = Depends(get_db)):
             },
         )
 
-    proba = predict_proba(payload)
-    pred = decide(proba)
+    if vector is not None:
+        # un produit scalaire : pas de préprocessing, pas de passage par l'executor
+        with metrics.stage("vector_score"):
+            proba = float(model.require_compiled().predict_proba_transformed([vector])[0])
+        hits, keys = [None], [None]
+    else:
+        probas, hits, keys = await _score(model, [payload], [employee_id])
+        proba = float(probas[0])
+    pred = decide(proba, model)
+    [explanation] = await _explain(model, [payload], explain)
 
-    input_json = json.dumps(payload, ensure_ascii=False)
-    row2 = db.execute(
-        _INSERT_PRED,
-        {
-            "employee_id": employee_id,
-            "input_payload": input_json,
-            "proba": proba,
-            "pred": pred,
-            "thr": cfg.model_threshold,
-            "ver": cfg.model_version,
-        },
-    ).fetchone()
-    db.commit()
+    [(persistence, db_id)] = await _audit(
+        db,
+        [
+            {
+                "employee_id": employee_id,
+                "input_payload": payload,
+                "proba": proba,
+                "pred": pred,
+                "thr": model.threshold,
+                "ver": model.version,
+            }
+        ],
+        hits,
+        keys,
+    )
 
     return PredictResponse(
         proba_depart=proba,
         prediction=pred,
-        threshold=cfg.model_threshold,
-        model_version=cfg.model_version,
-        stored=True,
-        db_id=int(row2[0]),
+        threshold=model.threshold,
+        model_version=model.version,
+        stored=persistence in {PERSISTED, CACHED},
+        db_id=db_id,
+        persistence=persistence,
+        explanation=explanation,
     )
 
 
+@router.post("/predict_by_ids", dependencies=[Depends(require_api_key)])
+def predict_by_ids(req: PredictByIdsRequest):
+    flt = req.filter
+
+    def _stream():
+        # sessions propres au stream : la réponse vit plus longtemps que la dépendance get_db
+        read_db = SessionLocal()
+        write_db = SessionLocal() if req.persist else None
+        try:
+            yield from to_ndjson(
+                iter_bulk_scores(
+                    read_db,
+                    write_db,
+                    employee_ids=req.employee_ids,
+                    features_filter=flt.features if flt else None,
+                    id_min=flt.employee_id_min if flt else None,
+                    id_max=flt.employee_id_max if flt else None,
+                    chunk_size=req.chunk_size,
+                )
+            )
+        finally:
+            read_db.close()
+            if write_db is not None:
+                write_db.close()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+async def _history_page(
+    response: Response,
+    db: Session,
+    employee_id: int | None,
+    limit: int,
+    cursor: str | None,
+    include_payload: bool,
+) -> list[HistoryItem]:
+    metrics.mark_since_request("parse_validate")
+    try:
+        items, next_cursor = await run_db(
+            db,
+            partial(
+                fetch_history_page,
+                employee_id=employee_id,
+                cursor=cursor,
+                limit=limit,
+                include_payload=include_payload,
+            ),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    # corps inchangé (liste) : le curseur de la page suivante passe par un header
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [HistoryItem(**it) for it in items]
+
+
 @router.get("/history", response_model=list[HistoryItem], dependencies=[Depends(require_api_key)])
-def history(limit: int = 50, db: Session = Depends(get_db)):
-    q = text("""
-        SELECT id, created_at, employee_id, proba_depart, prediction, threshold, model_version, input_payload
-        FROM predictions
-        ORDER BY created_at DESC
-        LIMIT :limit
-    """)
-    rows = db.execute(q, {"limit": limit}).fetchall()
-    return [
-        HistoryItem(
-            id=int(r[0]),
-            created_at=r[1].isoformat(),
-            employee_id=r[2],
-            proba_depart=float(r[3]),
-            prediction=int(r[4]),
-            threshold=float(r[5]),
-            model_version=r[6],
-            input_payload=r[7] if isinstance(r[7], dict) else json.loads(r[7]),
+async def history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT),
+    cursor: str | None = None,
+    include_payload: bool = True,
+    db: Session = Depends(get_db),
+):
+    """
+    Dernières prédictions, plus récentes d'abord. Page suivante : repasser le header
+    `X-Next-Cursor` en `?cursor=` (absent sur la dernière page).
+    """
+    return await _history_page(response, db, None, limit, cursor, include_payload)
+
+
+@router.get("/history/export", dependencies=[Depends(require_api_key)])
+def history_export(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    employee_id: int | None = None,
+    cursor: str | None = None,
+    include_payload: bool = True,
+):
+    """Export complet en streaming (curseur serveur), sans charger le résultat en mémoire."""
+    try:
+        if cursor is not None:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    def _stream():
+        # session propre au stream : la réponse vit plus longtemps que la dépendance get_db
+        db = SessionLocal()
+        try:
+            items = iter_history(
+                db, employee_id=employee_id, cursor=cursor, include_payload=include_payload
+            )
+            if fmt == "csv":
+                yield from to_csv(items, include_payload)
+            else:
+                yield from to_ndjson(items)
+        finally:
+            db.close()
+
+    if fmt == "csv":
+        return StreamingResponse(
+            _stream(),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=predictions_history.csv"},
         )
-        for r in rows
-    ]
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
 
 
 @router.get(
@@ -158,25 +564,12 @@ def history(limit: int = 50, db: Session = Depends(get_db)):
     response_model=list[HistoryItem],
     dependencies=[Depends(require_api_key)],
 )
-def history_by_id(employee_id: int, limit: int = 50, db: Session = Depends(get_db)):
-    q = text("""
-        SELECT id, created_at, employee_id, proba_depart, prediction, threshold, model_version, input_payload
-        FROM predictions
-        WHERE employee_id = :employee_id
-        ORDER BY created_at DESC
-        LIMIT :limit
-    """)
-    rows = db.execute(q, {"employee_id": employee_id, "limit": limit}).fetchall()
-    return [
-        HistoryItem(
-            id=int(r[0]),
-            created_at=r[1].isoformat(),
-            employee_id=r[2],
-            proba_depart=float(r[3]),
-            prediction=int(r[4]),
-            threshold=float(r[5]),
-            model_version=r[6],
-            input_payload=r[7] if isinstance(r[7], dict) else json.loads(r[7]),
-        )
-        for r in rows
-    ]
+async def history_by_id(
+    employee_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT),
+    cursor: str | None = None,
+    include_payload: bool = True,
+    db: Session = Depends(get_db),
+):
+    return await _history_page(response, db, employee_id, limit, cursor, include_payload)
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 Primitive = int | float | str | bool | None
 
+MAX_BATCH_RECORDS = 10_000
+MAX_EXPLAIN_TOP_K = 20
+
+
+def non_primitive_keys(features: Dict[str, Any]) -> list[str]:
+    """Clés dont la valeur n'est pas une primitive JSON (int/float/str/bool/None)."""
+    return [
+        k
+        for k, val in features.items()
+        if not isinstance(val, (int, float, str, bool)) and val is not None
+    ]
+
 
 class PredictRequest(BaseModel):
     """
@@ -18,12 +30,29 @@ class PredictRequest(BaseModel):
     @field_validator("features")
     @classmethod
     def validate_primitives(cls, v: Dict[str, Any]) -> Dict[str, Primitive]:
-        for k, val in v.items():
-            if not isinstance(val, (int, float, str, bool)) and val is not None:
-                raise ValueError(f"Valeur non supportée pour {k}: {type(val)}")
+        bad = non_primitive_keys(v)
+        if bad:
+            raise ValueError(f"Valeur non supportée pour {bad[0]}: {type(v[bad[0]])}")
         return v
 
 
+class FeatureContribution(BaseModel):
+    feature: str  # variable brute (avant encodage)
+    value: Primitive = None
+    contribution: float  # log-odds, > 0 : pousse vers le départ
+
+
+class Explanation(BaseModel):
+    """
+    Contributions exactes du modèle logistique (équivalent SHAP linéaire) :
+    base_value + somme de toutes les contributions = logit.
+    """
+
+    base_value: float
+    logit: float
+    contributions: List[FeatureContribution]
+
+
 class PredictResponse(BaseModel):
     proba_depart: float
     prediction: int
@@ -31,6 +60,78 @@ class PredictResponse(BaseModel):
     model_version: str
     stored: bool
     db_id: Optional[int] = None
+    # "persisted" (en DB, db_id renseigné) | "queued" (write-behind) | "dropped" (file pleine)
+    # | "cached" (hit de cache, db_id = ligne d'audit d'origine, PREDICTION_CACHE_AUDIT=reference)
+    persistence: str = "persisted"
+    # ?explain=k : top-k variables par |contribution|
+    explanation: Optional[Explanation] = None
+
+
+class PredictBatchRequest(BaseModel):
+    """
+    Batch de records :
+    - records = liste de dict[str, valeur] (validés record par record côté endpoint,
+      pour qu'un record invalide n'invalide pas tout le batch)
+    """
+
+    records: List[Dict[str, Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_RECORDS,
+        description="Liste de features brutes (avant encodage), un dict par employé.",
+    )
+
+
+class PredictBatchItem(BaseModel):
+    index: int
+    ok: bool
+    proba_depart: Optional[float] = None
+    prediction: Optional[int] = None
+    db_id: Optional[int] = None
+    persistence: Optional[str] = None
+    explanation: Optional[Explanation] = None
+    error: Optional[Dict[str, Any]] = None
+
+
+class PredictBatchResponse(BaseModel):
+    threshold: float
+    model_version: str
+    n_records: int
+    n_ok: int
+    n_errors: int
+    stored: bool
+    # statut commun aux records OK, ou "mixed" (détail par item)
+    persistence: str = "persisted"
+    items: List[PredictBatchItem]
+
+
+class EmployeeFilter(BaseModel):
+    """Filtre "tous les employés qui matchent" (bornes d'id + égalités sur les features JSONB)."""
+
+    employee_id_min: Optional[int] = None
+    employee_id_max: Optional[int] = None
+    features: Dict[str, Primitive] = Field(
+        default_factory=dict,
+        description='Égalités sur les features (ex: {"departement": "Commercial"}).',
+    )
+
+
+class PredictByIdsRequest(BaseModel):
+    """
+    Scoring serveur d'une liste d'ids OU de tous les employés matchant un filtre
+    (filter = {} -> toute la table). Réponse en NDJSON (une ligne par employé + un summary).
+    """
+
+    employee_ids: Optional[List[int]] = Field(None, min_length=1, max_length=100_000)
+    filter: Optional[EmployeeFilter] = None
+    chunk_size: int = Field(1000, ge=1, le=MAX_BATCH_RECORDS)
+    persist: bool = True
+
+    @model_validator(mode="after")
+    def require_selection(self) -> "PredictByIdsRequest":
+        if self.employee_ids is None and self.filter is None:
+            raise ValueError("Fournir employee_ids et/ou filter")
+        return self
 
 
 class HistoryItem(BaseModel):
@@ -41,4 +142,5 @@ class HistoryItem(BaseModel):
     prediction: int
     threshold: float
     model_version: str
-    input_payload: Dict[str, Any]
+    # None si include_payload=false
+    input_payload: Optional[Dict[str, Any]] = None
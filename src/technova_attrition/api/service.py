@@ -1,30 +1,55 @@
 from __future__ import annotations
 
-import json
-from functools import lru_cache
-from typing import Any, Dict, Tuple
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 
-import joblib
+import numpy as np
 import pandas as pd
 
+from technova_attrition.api import metrics
+from technova_attrition.api.registry import ServedModel, get_registry
 from technova_attrition.api.settings import get_config
+from technova_attrition.fast_scorer import CompiledScorer, load_compiled
+from technova_attrition.normalization import normalize_records, records_to_frame
 
+T = TypeVar("T")
 
-@lru_cache
-def get_expected_features() -> list[str]:
-    cfg = get_config()
-    data = json.loads(cfg.expected_features_path.read_text(encoding="utf-8"))
-    if not isinstance(data, list) or not all(isinstance(x, str) for x in data):
-        raise ValueError("expected_features.json invalide (doit être une liste de strings)")
-    return data
+
+def current_model() -> ServedModel:
+    """
+    Modèle servi (registry) : version, seuil, pipeline, features attendues.
+    Un endpoint le lit une fois et le passe aux fonctions ci-dessous : toute la requête
+    utilise le même modèle, même si une bascule a lieu entre-temps.
+    """
+    return get_registry().current()
 
 
-@lru_cache
-def load_pipeline():
-    cfg = get_config()
-    if not cfg.pipeline_path.exists():
-        raise FileNotFoundError(f"Pipeline introuvable: {cfg.pipeline_path}")
-    return joblib.load(cfg.pipeline_path)
+def get_expected_features(model: Optional[ServedModel] = None) -> list[str]:
+    return (model or current_model()).expected_features
+
+
+def load_pipeline(model: Optional[ServedModel] = None):
+    return (model or current_model()).pipeline
+
+
+def load_compiled_scorer(model: Optional[ServedModel] = None) -> CompiledScorer:
+    """Scorer NumPy (models/pipeline_compiled.json), utilisé si FAST_SCORER=1."""
+    model = model or current_model()
+    if model.compiled is not None:
+        return model.compiled
+    # ni FAST_SCORER ni FEATURE_STORE : pas chargé par le registry (scripts)
+    return load_compiled(get_config().compiled_pipeline_path)
+
+
+def model_artifacts_token() -> tuple:
+    """
+    Jeton du modèle servi (version, seuil, signature des fichiers) : change à chaque
+    bascule du registry, ce qui invalide le cache de prédictions.
+    """
+    return current_model().token
 
 
 def normalize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -32,76 +57,100 @@ def normalize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     Normalise quelques champs sensibles pour éviter les erreurs de dtype.
     Objectif: accepter des entrées humaines (M/F, Oui/Non) tout en nourrissant
     le pipeline avec les mêmes types que l'entraînement.
+    Règles : tables de technova_attrition.normalization (communes aux routes de scoring).
     """
-    p = dict(payload)
-
-    # genre: attendu 0/1 dans ton sample (0=femme, 1=homme) -> on accepte M/F aussi
-    if "genre" in p:
-        g = p["genre"]
-        if isinstance(g, str):
-            gs = g.strip().upper()
-            if gs in {"M", "H", "HOMME", "MALE", "1"}:
-                p["genre"] = 1
-            elif gs in {"F", "FEMME", "FEMALE", "0"}:
-                p["genre"] = 0
-        elif isinstance(g, bool):
-            p["genre"] = int(g)
-
-    # heure_supplementaires: attendu 0/1 dans ton sample -> on accepte Oui/Non/True/False
-    if "heure_supplementaires" in p:
-        hs = p["heure_supplementaires"]
-        if isinstance(hs, str):
-            hss = hs.strip().lower()
-            if hss in {"oui", "yes", "true", "1"}:
-                p["heure_supplementaires"] = 1
-            elif hss in {"non", "no", "false", "0"}:
-                p["heure_supplementaires"] = 0
-        elif isinstance(hs, bool):
-            p["heure_supplementaires"] = int(hs)
-
-    # augmentation salaire: dans ton sample c'est une STRING type "11 %"
-    # -> on accepte aussi 11 ou 0.11 et on convertit en "11 %"
-    if "augementation_salaire_precedente" in p:
-        a = p["augementation_salaire_precedente"]
-        if isinstance(a, (int, float)):
-            # si 0.11 -> 11%
-            val = a * 100 if 0 < a < 1 else a
-            p["augementation_salaire_precedente"] = f"{int(round(val))} %"
-        elif isinstance(a, str):
-            s = a.strip()
-            # normalise "11%" -> "11 %"
-            if s.endswith("%") and not s.endswith(" %"):
-                s = s[:-1].strip() + " %"
-            p["augementation_salaire_precedente"] = s
-
-    return p
-
-
-def check_payload(payload: Dict[str, Any]) -> Tuple[list[str], list[str]]:
+    return normalize_records([payload])[0]
+
+
+def normalize_payloads(payloads: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """Version N payloads de normalize_payload (mêmes règles, une passe par champ)."""
+    return normalize_records(payloads)
+
+
+def check_payload(
+    payload: Dict[str, Any], model: Optional[ServedModel] = None
+) -> Tuple[list[str], list[str]]:
     """
     Vérifie que:
     - toutes les features attendues sont présentes
     - aucune n'est None
     """
-    expected = get_expected_features()
+    expected = get_expected_features(model)
     missing = [f for f in expected if f not in payload]
     nulls = [f for f in expected if f in payload and payload[f] is None]
     return missing, nulls
 
 
-def align_features(payload: Dict[str, Any]) -> pd.DataFrame:
-    expected = get_expected_features()
-    aligned = {f: payload.get(f, None) for f in expected}
-    return pd.DataFrame([aligned], columns=expected)
+def align_features(payload: Dict[str, Any], model: Optional[ServedModel] = None) -> pd.DataFrame:
+    return align_features_batch([payload], model)
 
 
-def predict_proba(payload: Dict[str, Any]) -> float:
-    pipe = load_pipeline()
-    X = align_features(payload)
-    proba = float(pipe.predict_proba(X)[:, 1][0])
+def align_features_batch(
+    payloads: list[Dict[str, Any]], model: Optional[ServedModel] = None
+) -> pd.DataFrame:
+    """
+    Version N lignes de align_features : un seul DataFrame construit colonne par colonne
+    (tableaux NumPy typés ; features manquantes -> NaN).
+    """
+    return records_to_frame(payloads, get_expected_features(model))
+
+
+def predict_proba(payload: Dict[str, Any], model: Optional[ServedModel] = None) -> float:
+    model = model or current_model()
+    if get_config().fast_scorer:
+        with metrics.stage("fast_scorer"):
+            return load_compiled_scorer(model).predict_proba_one(payload)
+    pipe = load_pipeline(model)
+    with metrics.stage("align_features"):
+        X = align_features(payload, model)
+    with metrics.stage("sklearn_predict"):
+        proba = float(pipe.predict_proba(X)[:, 1][0])
     return proba
 
 
-def decide(proba: float) -> int:
+def predict_proba_batch(
+    payloads: list[Dict[str, Any]], model: Optional[ServedModel] = None
+) -> np.ndarray:
+    """Un seul predict_proba sur une matrice N lignes (au lieu de N appels)."""
+    model = model or current_model()
+    if get_config().fast_scorer:
+        with metrics.stage("fast_scorer"):
+            return load_compiled_scorer(model).predict_proba_many(payloads)
+    pipe = load_pipeline(model)
+    with metrics.stage("align_features"):
+        X = align_features_batch(payloads, model)
+    with metrics.stage("sklearn_predict"):
+        return pipe.predict_proba(X)[:, 1].astype(float)
+
+
+def explain_batch(
+    payloads: list[Dict[str, Any]], top_k: int, model: Optional[ServedModel] = None
+) -> list[dict]:
+    """Top-k contributions (log-odds) par variable brute, explainer linéaire précalculé."""
+    model = model or current_model()
+    with metrics.stage("explain"):
+        return model.require_explainer().explain_many(payloads, top_k)
+
+
+def decide(proba: float, model: Optional[ServedModel] = None) -> int:
+    return int(proba >= (model or current_model()).threshold)
+
+
+def decide_batch(probas: np.ndarray, model: Optional[ServedModel] = None) -> np.ndarray:
+    return (np.asarray(probas) >= (model or current_model()).threshold).astype(int)
+
+
+@lru_cache
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Executor borné (INFERENCE_MAX_WORKERS) dédié à l'inférence, séparé du threadpool DB."""
     cfg = get_config()
-    return int(proba >= cfg.model_threshold)
+    return ThreadPoolExecutor(max_workers=cfg.inference_max_workers, thread_name_prefix="inference")
+
+
+async def run_inference(fn: Callable[..., T], *args: Any, stage: str = "inference") -> T:
+    """Exécute une fonction CPU-bound (inférence, préparation d'un batch) hors event loop."""
+    loop = asyncio.get_running_loop()
+    # contexte copié : labels de métriques (endpoint) visibles dans le thread d'inférence
+    ctx = contextvars.copy_context()
+    with metrics.stage(stage):
+        return await loop.run_in_executor(get_inference_executor(), ctx.run, partial(fn, *args))
@@ -22,15 +22,67 @@ def load_env(default_env_file: str = ".env.local") -> None:
     load_dotenv(ROOT / env_file, override=True)
 
 
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
 @dataclass(frozen=True)
 class AppConfig:
     api_key: str
     database_url: str
-    model_threshold: float
-    model_version: str
     expected_features_path: Path
     pipeline_path: Path
     model_card_path: Path
+    compiled_pipeline_path: Path
+    explainer_path: Path
+    fast_scorer: bool
+    feature_store: bool
+    warmup_on_startup: bool
+    db_async: bool
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    inference_max_workers: int
+    audit_log_mode: str
+    audit_queue_size: int
+    audit_batch_size: int
+    audit_flush_interval_s: float
+    audit_backpressure: str
+    prediction_cache: bool
+    prediction_cache_size: int
+    prediction_cache_ttl_s: float
+    prediction_cache_audit: str
+    metrics_enabled: bool
+    model_reload_poll_s: float
+
+
+def resolve_model_identity(
+    model_card_path: Path, default_version: str = "dev"
+) -> tuple[float, str]:
+    """
+    (seuil, version) servis : env > model_card.json > défauts. Appelé par le registry à chaque
+    chargement : seule source du seuil et de la version (pas de copie dans AppConfig).
+    MODEL_VERSION / MODEL_THRESHOLD définies : valeurs figées, même après un rechargement
+    à chaud qui change les poids (model_card.json ignoré pour ces champs).
+    """
+    model_card = {}
+    if model_card_path.exists():
+        model_card = json.loads(model_card_path.read_text(encoding="utf-8"))
+
+    # seuil: env > model_card > 0.5
+    threshold = os.getenv("MODEL_THRESHOLD")
+    if threshold is None or threshold == "":
+        # default_threshold : clé écrite par les scripts d'export (threshold_default : ancien nom)
+        threshold = model_card.get("default_threshold", model_card.get("threshold_default", 0.5))
+    threshold = float(threshold)
+
+    # version: env > model_card > défaut
+    model_version = os.getenv("MODEL_VERSION") or model_card.get("model_version", default_version)
+    return threshold, model_version
 
 
 @lru_cache
@@ -40,22 +92,57 @@ def get_config() -> AppConfig:
     model_card_path = MODELS_DIR / "model_card.json"
     expected_features_path = MODELS_DIR / "expected_features.json"
     pipeline_path = MODELS_DIR / "pipeline.joblib"
-
-    model_card = {}
-    if model_card_path.exists():
-        model_card = json.loads(model_card_path.read_text(encoding="utf-8"))
+    compiled_pipeline_path = MODELS_DIR / "pipeline_compiled.json"
+    # explications (?explain=k) : optionnel, chargé s'il existe
+    explainer_path = MODELS_DIR / "explainer.json"
 
     api_key = os.getenv("API_KEY", "")
     database_url = os.getenv("DATABASE_URL", "")
 
-    # seuil: env > model_card > 0.5
-    threshold = os.getenv("MODEL_THRESHOLD")
-    if threshold is None or threshold == "":
-        threshold = model_card.get("threshold_default", 0.5)
-    threshold = float(threshold)
-
-    # version: env > model_card > "dev"
-    model_version = os.getenv("MODEL_VERSION") or model_card.get("model_version", "dev")
+    # scorer NumPy compilé (opt-in) : FAST_SCORER=1
+    fast_scorer = _env_flag("FAST_SCORER", False)
+
+    # /predict_by_id : vecteur précalculé (employee_feature_vectors) si à jour
+    feature_store = _env_flag("FEATURE_STORE", False)
+
+    # warm-up (pipeline, features, prédiction synthétique, pool DB) au démarrage
+    warmup_on_startup = _env_flag("WARMUP_ON_STARTUP", True)
+
+    # DB : moteur async optionnel (psycopg async / asyncpg) + pool réglable
+    db_async = _env_flag("DB_ASYNC", False)
+    db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+    # inférence hors event loop, bornée (CPU-bound : pas plus de workers que de cœurs utiles)
+    inference_max_workers = int(os.getenv("INFERENCE_MAX_WORKERS", "4"))
+
+    # audit des prédictions : "sync" (INSERT + commit avant réponse) ou "async" (write-behind)
+    audit_log_mode = os.getenv("AUDIT_LOG_MODE", "sync").strip().lower()
+    if audit_log_mode not in {"sync", "async"}:
+        raise RuntimeError(f"AUDIT_LOG_MODE invalide: {audit_log_mode} (sync|async)")
+    audit_queue_size = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    audit_batch_size = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    audit_flush_interval_s = float(os.getenv("AUDIT_FLUSH_INTERVAL_S", "0.5"))
+    audit_backpressure = os.getenv("AUDIT_BACKPRESSURE", "sync").strip().lower()
+
+    # cache LRU/TTL des probabilités (payload normalisé + version)
+    prediction_cache = _env_flag("PREDICTION_CACHE", False)
+    prediction_cache_size = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+    prediction_cache_ttl_s = float(os.getenv("PREDICTION_CACHE_TTL_S", "300"))
+    # sur un hit : "write" (nouvelle ligne d'audit) ou "reference" (db_id de la ligne d'origine)
+    prediction_cache_audit = os.getenv("PREDICTION_CACHE_AUDIT", "write").strip().lower()
+    if prediction_cache_audit not in {"write", "reference"}:
+        raise RuntimeError(
+            f"PREDICTION_CACHE_AUDIT invalide: {prediction_cache_audit} (write|reference)"
+        )
+
+    # /metrics (Prometheus) + instrumentation par étape ; désactivé : coût quasi nul
+    metrics_enabled = _env_flag("METRICS_ENABLED", False)
+
+    # rechargement à chaud : scrute models/ toutes les N secondes (0 : seulement via l'API admin)
+    model_reload_poll_s = float(os.getenv("MODEL_RELOAD_POLL_S", "0"))
 
     if not database_url:
         raise RuntimeError("DATABASE_URL manquant (vérifie .env.local ou .env.supabase)")
@@ -63,11 +150,31 @@ def get_config() -> AppConfig:
     return AppConfig(
         api_key=api_key,
         database_url=database_url,
-        model_threshold=threshold,
-        model_version=model_version,
         expected_features_path=expected_features_path,
         pipeline_path=pipeline_path,
         model_card_path=model_card_path,
+        compiled_pipeline_path=compiled_pipeline_path,
+        explainer_path=explainer_path,
+        fast_scorer=fast_scorer,
+        feature_store=feature_store,
+        warmup_on_startup=warmup_on_startup,
+        db_async=db_async,
+        db_pool_size=db_pool_size,
+        db_max_overflow=db_max_overflow,
+        db_pool_timeout=db_pool_timeout,
+        db_pool_recycle=db_pool_recycle,
+        inference_max_workers=inference_max_workers,
+        audit_log_mode=audit_log_mode,
+        audit_queue_size=audit_queue_size,
+        audit_batch_size=audit_batch_size,
+        audit_flush_interval_s=audit_flush_interval_s,
+        audit_backpressure=audit_backpressure,
+        prediction_cache=prediction_cache,
+        prediction_cache_size=prediction_cache_size,
+        prediction_cache_ttl_s=prediction_cache_ttl_s,
+        prediction_cache_audit=prediction_cache_audit,
+        metrics_enabled=metrics_enabled,
+        model_reload_poll_s=model_reload_poll_s,
     )
 
 
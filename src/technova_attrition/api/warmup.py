@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from technova_attrition.api import service
+from technova_attrition.api.registry import imputer_payload
+
+
+@dataclass
+class StageResult:
+    name: str
+    ok: bool
+    duration_ms: float
+    error: Optional[str] = None
+
+
+@dataclass
+class Readiness:
+    """État du warm-up, exposé tel quel par /ready."""
+
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+    started: bool = False
+
+    @property
+    def ready(self) -> bool:
+        return self.started and all(s.ok for s in self.stages.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "total_ms": round(sum(s.duration_ms for s in self.stages.values()), 3),
+            "stages": [asdict(s) for s in self.stages.values()],
+        }
+
+
+logger = logging.getLogger(__name__)
+
+READINESS = Readiness()
+_LOCK = threading.Lock()
+
+
+def synthetic_payload() -> dict[str, Any]:
+    """Payload complet tiré des valeurs d'imputation du modèle servi (pas de données réelles)."""
+    model = service.current_model()
+    return imputer_payload(model.pipeline, model.expected_features)
+
+
+def _stage_pipeline() -> None:
+    # chargement + validation par le registry (features, prédiction de contrôle, scorer compilé)
+    service.current_model()
+
+
+def _stage_features() -> None:
+    service.get_expected_features()
+
+
+def _stage_prediction() -> None:
+    payload = synthetic_payload()
+    service.predict_proba(payload)
+    service.predict_proba_batch([payload, payload])
+
+
+def _stage_db_pool() -> None:
+    # import local : deps construit l'engine à l'import (évite un cycle au chargement)
+    from technova_attrition.api.deps import engine
+
+    # ouvre autant de connexions que le pool en garde (checkout simultanés puis retour au pool)
+    conns = []
+    try:
+        for _ in range(max(1, engine.pool.size())):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+STAGES: list[tuple[str, Callable[[], None]]] = [
+    ("load_pipeline", _stage_pipeline),
+    ("expected_features", _stage_features),
+    ("synthetic_prediction", _stage_prediction),
+    ("db_pool", _stage_db_pool),
+]
+
+
+def run_warmup(only_failed: bool = False) -> Readiness:
+    """
+    Exécute les étapes de warm-up (chronométrées). Une étape en échec n'arrête pas
+    les suivantes : /ready rapporte l'état de chacune.
+    only_failed=True : ne rejoue que les étapes pas encore OK (ex: DB pas prête au boot).
+    """
+    with _LOCK:
+        READINESS.started = True
+        for name, fn in STAGES:
+            prev = READINESS.stages.get(name)
+            if only_failed and prev is not None and prev.ok:
+                continue
+            t0 = time.perf_counter()
+            try:
+                fn()
+                result = StageResult(name, True, 0.0)
+            except Exception as e:  # on rapporte, on ne crashe pas le process
+                # /ready est public : seul le type d'erreur est exposé, le détail va dans les logs
+                logger.warning("warm-up %s en échec: %s", name, e)
+                result = StageResult(name, False, 0.0, type(e).__name__)
+            result.duration_ms = round((time.perf_counter() - t0) * 1000, 3)
+            READINESS.stages[name] = result
+        return READINESS
+
+
+async def _stage_db_async_pool(async_engine) -> None:
+    # les connexions async sont liées à l'event loop : warm-up dans la loop de l'app
+    n = max(1, async_engine.pool.size())
+    conns = [await async_engine.connect() for _ in range(n)]
+    try:
+        await asyncio.gather(*(c.execute(text("SELECT 1")) for c in conns))
+    finally:
+        for conn in conns:
+            await conn.close()
+
+
+async def run_async_warmup(only_failed: bool = False) -> Readiness:
+    """Étape "db_async_pool" (DB_ASYNC=1 uniquement), à appeler depuis l'event loop."""
+    from technova_attrition.api.deps import async_engine
+
+    if async_engine is None:
+        return READINESS
+    prev = READINESS.stages.get("db_async_pool")
+    if only_failed and prev is not None and prev.ok:
+        return READINESS
+
+    t0 = time.perf_counter()
+    try:
+        await _stage_db_async_pool(async_engine)
+        result = StageResult("db_async_pool", True, 0.0)
+    except Exception as e:
+        logger.warning("warm-up db_async_pool en échec: %s", e)
+        result = StageResult("db_async_pool", False, 0.0, type(e).__name__)
+    result.duration_ms = round((time.perf_counter() - t0) * 1000, 3)
+    READINESS.stages["db_async_pool"] = result
+    return READINESS
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Iterable, Mapping
+
+MANIFEST = "stage.json"
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """sha256 du contenu d'un fichier (lecture par blocs)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def json_digest(obj: Any) -> str:
+    """sha256 d'un objet JSON canonique (clés triées) : clé de cache d'une étape."""
+    canon = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+def source_digest(*modules: ModuleType | Path) -> str:
+    """
+    Empreinte du code source (modules ou fichiers) exécuté par une étape : à mettre dans ses
+    entrées pour qu'un changement de code invalide le cache.
+    """
+    files = [Path(m.__file__) if isinstance(m, ModuleType) else Path(m) for m in modules]
+    return json_digest({f.name: file_digest(f) for f in files})
+
+
+def atomic_copy(src: Path, dest: Path) -> None:
+    """Copie puis rename sur le même volume : un lecteur ne voit jamais un fichier partiel."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.tmp-{os.getpid()}")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+@dataclass(frozen=True)
+class StageResult:
+    name: str
+    digest: str  # empreinte des sorties (fichiers + meta) : entrée des étapes suivantes
+    directory: Path
+    meta: dict[str, Any]
+    files: dict[str, str]  # nom -> sha256
+    cached: bool
+    seconds: float = 0.0
+
+    def path(self, name: str) -> Path:
+        return self.directory / name
+
+
+@dataclass
+class StageCache:
+    """
+    Cache d'étapes adressé par contenu : <root>/<étape>/<clé>/, clé = hash des entrées
+    (empreintes des étapes amont + paramètres). Une étape écrit dans un répertoire
+    temporaire, renommé une fois le manifeste écrit : un run interrompu ne laisse que des
+    étapes complètes, et le run suivant reprend à la première étape manquante.
+    """
+
+    root: Path
+    force: set[str] = field(default_factory=set)
+
+    def _load(self, name: str, directory: Path) -> StageResult | None:
+        try:
+            manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        files = manifest["files"]
+        # fichier supprimé ou modifié à la main -> étape rejouée
+        for fname, sha in files.items():
+            p = directory / fname
+            if not p.exists() or file_digest(p) != sha:
+                return None
+        return StageResult(name, manifest["digest"], directory, manifest["meta"], files, True)
+
+    def run(
+        self,
+        name: str,
+        inputs: Mapping[str, Any],
+        fn: Callable[[Path], dict[str, Any]],
+    ) -> StageResult:
+        """
+        Exécute fn(répertoire de travail) -> meta (JSON) si l'étape n'est pas en cache.
+        fn écrit ses fichiers de sortie dans le répertoire reçu.
+        """
+        key = json_digest({"stage": name, "inputs": dict(inputs)})[:16]
+        directory = self.root / name / key
+        if name not in self.force:
+            cached = self._load(name, directory)
+            if cached is not None:
+                return cached
+
+        t0 = time.perf_counter()
+        tmp = self.root / name / f".{key}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            meta = fn(tmp)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)  # étapes amont déjà en cache : reprise ici
+            raise
+        files = {p.name: file_digest(p) for p in sorted(tmp.iterdir()) if p.is_file()}
+        digest = json_digest({"files": files, "meta": meta})
+        manifest = {
+            "stage": name,
+            "inputs": dict(inputs),
+            "digest": digest,
+            "files": files,
+            "meta": meta,
+            "created_at": time.time(),
+        }
+        # manifeste écrit en dernier : sa présence = étape complète
+        (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2, default=str), encoding="utf-8")
+
+        shutil.rmtree(directory, ignore_errors=True)  # reste d'un run interrompu / forcé
+        os.replace(tmp, directory)
+        return StageResult(name, digest, directory, meta, files, False, time.perf_counter() - t0)
+
+    def prune(self, keep: Iterable[StageResult]) -> int:
+        """Supprime les entrées de cache non référencées (autres clés, temporaires)."""
+        keep_dirs = {r.directory.resolve() for r in keep}
+        removed = 0
+        if not self.root.exists():
+            return removed
+        for stage_dir in self.root.iterdir():
+            if not stage_dir.is_dir():
+                continue
+            for entry in stage_dir.iterdir():
+                if entry.resolve() not in keep_dirs:
+                    shutil.rmtree(entry, ignore_errors=True)
+                    removed += 1
+        return removed
@@ -3,26 +3,17 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-YES_SET = {"Y", "OUI", "Oui", "oui", "o", "yes", "y", "true", "1"}
-NO_SET = {"N", "NON", "Non", "non", "n", "no", "false", "0"}
+from technova_attrition.normalization import percent_ratio_column, yes_no_column
 
 
 def yes_no_to_int(series: pd.Series) -> pd.Series:
-    s = series.astype(str).str.strip().str.lower()
-    out = pd.Series(pd.NA, index=series.index, dtype="Int64")
-    out[s.isin(YES_SET)] = 1
-    out[s.isin(NO_SET)] = 0
-    return out
-
-
-def percent_to_ratio(series: pd.Series) -> pd.Series:
-    # "15%" -> 0.15 ; "0.15" -> 0.15 ; NaN stays NaN
-    s = series.astype(str).str.strip()
-    s = s.replace({"nan": np.nan, "None": np.nan})
-    s = s.str.replace("%", "", regex=False)
-    s = pd.to_numeric(s, errors="coerce")
-    # Heuristic: if values look like 15 (percent points), convert to 0.15
-    return np.where(s > 1, s / 100.0, s)
+    # tables partagées avec le service : normalization.YES_NO_TOKENS
+    return pd.Series(yes_no_column(series), index=series.index)
+
+
+def percent_to_ratio(series: pd.Series) -> np.ndarray:
+    # "15%" -> 0.15 ; "0.15" -> 0.15 ; NaN stays NaN (normalization.percent_points)
+    return percent_ratio_column(series)
 
 
 def safe_divide(num: pd.Series, den: pd.Series) -> pd.Series:
@@ -25,6 +25,11 @@ class Settings:
     anonymization_key: str | None
 
 
+def resolve_n_jobs(n_jobs: int) -> int:
+    """n_jobs façon joblib : négatif -> tous les CPU, sinon au moins 1 worker."""
+    return max(1, os.cpu_count() or 1) if n_jobs < 0 else max(1, n_jobs)
+
+
 PATHS = Paths()
 SETTINGS = Settings(
     random_state=int(os.getenv("RANDOM_STATE", "42")),
@@ -34,6 +39,22 @@ FINAL_MODEL_PARAMS = {
     "model__C": 0.1,
     "model__l1_ratio": 0.0,  # équivalent L2 selon warning sklearn>=1.8
 }
+# Variables corrélées permutées ensemble pour l'importance par permutation
+# (permutée seule, une variable du groupe est compensée par les autres)
+IMPORTANCE_FEATURE_GROUPS = {
+    "anciennete": [
+        "annees_dans_l_entreprise",
+        "annees_dans_le_poste_actuel",
+        "annes_sous_responsable_actuel",
+        "annees_depuis_la_derniere_promotion",
+    ],
+    "satisfaction": [
+        "satisfaction_employee_environnement",
+        "satisfaction_employee_nature_travail",
+        "satisfaction_employee_equipe",
+        "satisfaction_employee_equilibre_pro_perso",
+    ],
+}
 
 
 def _get_model_threshold(default: float = 0.5) -> float:
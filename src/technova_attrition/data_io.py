@@ -2,33 +2,217 @@ from __future__ import annotations
 
 import hashlib
 import hmac
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import repeat
 from pathlib import Path
-from typing import Literal
+from typing import Iterable, Iterator, Literal, Mapping
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 from technova_attrition.config import SETTINGS
 
+CsvEngine = Literal["c", "pyarrow"]
+DEFAULT_CHUNKSIZE = 100_000
 
-def _read_csv(path: Path) -> pd.DataFrame:
+# Schémas de lecture par source : entiers compacts nullables (cellule vide -> <NA>, comme
+# le NaN de l'inférence pandas), catégories pour les modalités répétées, chaînes arrow pour
+# les identifiants. Les clés de jointure restent int64 : une clé manquante lève une erreur.
+SIRH_DTYPES: dict[str, str] = {
+    "id_employee": "int64",
+    "age": "Int16",
+    "genre": "category",
+    "revenu_mensuel": "Int32",
+    "statut_marital": "category",
+    "departement": "category",
+    "poste": "category",
+    "nombre_experiences_precedentes": "Int16",
+    "nombre_heures_travailless": "Int16",
+    "annee_experience_totale": "Int16",
+    "annees_dans_l_entreprise": "Int16",
+    "annees_dans_le_poste_actuel": "Int16",
+}
+
+EVAL_DTYPES: dict[str, str] = {
+    "satisfaction_employee_environnement": "Int8",
+    "note_evaluation_precedente": "Int8",
+    "niveau_hierarchique_poste": "Int8",
+    "satisfaction_employee_nature_travail": "Int8",
+    "satisfaction_employee_equipe": "Int8",
+    "satisfaction_employee_equilibre_pro_perso": "Int8",
+    "eval_number": "string[pyarrow]",
+    "note_evaluation_actuelle": "Int8",
+    "heure_supplementaires": "category",
+    "augementation_salaire_precedente": "category",
+}
+
+SONDAGE_DTYPES: dict[str, str] = {
+    "a_quitte_l_entreprise": "category",
+    "nombre_participation_pee": "Int8",
+    "nb_formations_suivies": "Int8",
+    "nombre_employee_sous_responsabilite": "Int16",
+    "code_sondage": "int64",
+    "distance_domicile_travail": "Int16",
+    "niveau_education": "Int8",
+    "domaine_etude": "category",
+    "ayant_enfants": "category",
+    "frequence_deplacement": "category",
+    "annees_depuis_la_derniere_promotion": "Int16",
+    "annes_sous_responsable_actuel": "Int16",
+}
+
+
+def _read_csv(
+    path: Path,
+    dtypes: Mapping[str, str] | None = None,
+    engine: CsvEngine = "c",
+) -> pd.DataFrame:
+    if not path.exists():
+        raise FileNotFoundError(f"CSV not found: {path}")
+    if dtypes is None and engine == "c":
+        return pd.read_csv(path, encoding="utf-8", sep=",", low_memory=False)
+    return pd.read_csv(path, encoding="utf-8", sep=",", dtype=dtypes, engine=engine)
+
+
+def _arrow_types(dtypes: Mapping[str, str]) -> dict:
+    """Schéma pandas -> types de colonnes du lecteur CSV arrow (le cast final reste astype)."""
+    import pyarrow as pa
+
+    out = {}
+    for col, dtype in dtypes.items():
+        if dtype in ("category", "string[pyarrow]", "string", "object"):
+            out[col] = pa.string()
+        elif dtype.lower() in ("int8", "int16", "int32", "int64", "float32", "float64"):
+            # Int16 (nullable) -> int16 : cellule vide -> null -> <NA> après astype
+            out[col] = pa.from_numpy_dtype(np.dtype(dtype.lower()))
+    return out
+
+
+def _iter_csv(
+    path: Path,
+    dtypes: Mapping[str, str] | None,
+    chunksize: int,
+    engine: CsvEngine = "c",
+) -> Iterator[pd.DataFrame]:
+    """
+    Lecture par chunks de `chunksize` lignes (mémoire bornée).
+    engine="pyarrow" : lecteur CSV streaming de pyarrow (multi-thread), re-découpé en chunks.
+    """
     if not path.exists():
         raise FileNotFoundError(f"CSV not found: {path}")
-    return pd.read_csv(path, encoding="utf-8", sep=",", low_memory=False)
+    if engine != "pyarrow":
+        yield from pd.read_csv(path, encoding="utf-8", sep=",", dtype=dtypes, chunksize=chunksize)
+        return
+
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    def _to_pandas(table: pa.Table) -> pd.DataFrame:
+        df = table.to_pandas()
+        present = {c: t for c, t in (dtypes or {}).items() if c in df.columns}
+        return df.astype(present) if present else df
+
+    # types imposés à la lecture : sans eux, arrow infère sur le 1er bloc (colonne vide -> null)
+    # cellule vide -> null aussi pour les chaînes (comme le NaN du moteur "c")
+    convert = pa_csv.ConvertOptions(
+        column_types=_arrow_types(dtypes or {}), strings_can_be_null=True
+    )
+    reader = pa_csv.open_csv(path, convert_options=convert)
+    batches: list[pa.RecordBatch] = []
+    n = 0
+    for batch in reader:
+        batches.append(batch)
+        n += batch.num_rows
+        while n >= chunksize:
+            table = pa.Table.from_batches(batches)
+            yield _to_pandas(table.slice(0, chunksize))
+            rest = table.slice(chunksize)
+            batches, n = rest.to_batches(), rest.num_rows
+    if n:
+        yield _to_pandas(pa.Table.from_batches(batches))
+
+
+def concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatène des chunks typés en conservant les catégories
+    (pd.concat repasse en object quand les catégories diffèrent d'un chunk à l'autre).
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    out = pd.concat(chunks, ignore_index=True)
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            out[col] = union_categoricals([c[col] for c in chunks], ignore_order=True)
+    return out
 
 
 def parse_eval_number(series: pd.Series) -> pd.Series:
-    # "E_1" -> 1
-    return series.astype(str).str.strip().str.replace("E_", "", regex=False).astype("Int64")
+    # "E_1" -> 1 (opérations vectorisées arrow ; valeur manquante -> <NA>)
+    return (
+        series.astype("string[pyarrow]")
+        .str.strip()
+        .str.replace("E_", "", regex=False)
+        .astype("Int64")
+    )
+
+
+ANON_DIGEST_LEN = 16
+ANON_PARALLEL_MIN_IDS = 200_000
+
+
+def _hmac_digests(messages: list[str], secret_bytes: bytes) -> list[str]:
+    # clé HMAC préparée une fois (pads internes/externes), copiée pour chaque id
+    base = hmac.new(secret_bytes, digestmod=hashlib.sha256)
+    out = []
+    for msg in messages:
+        h = base.copy()
+        h.update(msg.encode("utf-8"))
+        out.append(h.hexdigest()[:ANON_DIGEST_LEN])
+    return out
+
+
+def anonymization_key_fingerprint(secret: str) -> str:
+    """Empreinte non réversible de la clé : invalide le cache si ANONYMIZATION_KEY change."""
+    digest = hmac.new(secret.encode("utf-8"), b"technova-anon-cache", hashlib.sha256)
+    return digest.hexdigest()[:16]
+
+
+def _load_anon_cache(path: Path, fingerprint: str) -> dict[str, str]:
+    if not path.exists():
+        return {}
+    cache = json.loads(path.read_text(encoding="utf-8"))
+    if cache.get("fingerprint") != fingerprint:
+        return {}  # autre clé : tokens inutilisables
+    return cache["tokens"]
+
+
+def _save_anon_cache(path: Path, fingerprint: str, tokens: dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"fingerprint": fingerprint, "tokens": tokens}), encoding="utf-8")
+    tmp.replace(path)
 
 
 def anonymize_employee_id(
     series: pd.Series,
     key: str | None = None,
     prefix: str = "emp_",
+    cache_path: Path | None = None,
+    n_jobs: int = 1,
 ) -> pd.Series:
     """
     Stable anonymization using HMAC-SHA256.
     Non reversible without key.
+
+    - un seul HMAC par id distinct, résultat re-projeté sur la série
+    - cache_path : cache persistant id -> token (JSON), lié à l'empreinte de la clé ;
+      un chargement incrémental ne hache que les nouveaux ids.
+      ⚠️ table de correspondance pseudonymisante : à protéger comme la clé, jamais versionnée.
+    - n_jobs > 1 : pool de processus au-delà de ANON_PARALLEL_MIN_IDS ids à hacher
     """
     secret = key or SETTINGS.anonymization_key
     if not secret:
@@ -36,56 +220,223 @@ def anonymize_employee_id(
 
     secret_bytes = secret.encode("utf-8")
 
-    def _hmac(x: object) -> str:
-        msg = str(x).encode("utf-8")
-        digest = hmac.new(secret_bytes, msg, hashlib.sha256).hexdigest()
-        return f"{prefix}{digest[:16]}"  # short stable id
+    # apply(str) sur les valeurs distinctes : mêmes messages (et mêmes conversions pandas,
+    # ex: Int64 avec <NA> -> "1.0") que l'application ligne à ligne
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    messages = pd.Series(uniques).apply(str).tolist()
 
-    return series.apply(_hmac)
+    fingerprint = anonymization_key_fingerprint(secret)
+    cache = _load_anon_cache(cache_path, fingerprint) if cache_path is not None else {}
+    todo = [m for m in dict.fromkeys(messages) if m not in cache]
 
+    if n_jobs > 1 and len(todo) >= ANON_PARALLEL_MIN_IDS:
+        size = -(-len(todo) // n_jobs)
+        parts = [todo[i : i + size] for i in range(0, len(todo), size)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = pool.map(_hmac_digests, parts, repeat(secret_bytes))
+            digests = [d for part in results for d in part]
+    else:
+        digests = _hmac_digests(todo, secret_bytes)
+    cache.update(zip(todo, digests))
 
-def load_sirh(path: Path) -> pd.DataFrame:
-    df = _read_csv(path)
-    # Expected join key already numeric: id_employee
-    if "id_employee" not in df.columns:
-        raise KeyError("sirh: missing column 'id_employee'")
-    return df
+    if cache_path is not None and todo:
+        _save_anon_cache(cache_path, fingerprint, cache)
 
+    tokens = np.array([f"{prefix}{cache[m]}" for m in messages], dtype=object)  # short stable id
+    out = pd.Series(tokens[codes], index=series.index, name=series.name)
+    return out.astype("category") if isinstance(series.dtype, pd.CategoricalDtype) else out
 
-def load_eval(path: Path) -> pd.DataFrame:
-    df = _read_csv(path)
-    if "eval_number" not in df.columns:
-        raise KeyError("eval: missing column 'eval_number'")
+
+def _require(df: pd.DataFrame, source: str, key: str) -> None:
+    if key not in df.columns:
+        raise KeyError(f"{source}: missing column '{key}'")
+
+
+def _with_eval_number_int(df: pd.DataFrame) -> pd.DataFrame:
+    _require(df, "eval", "eval_number")
     df["eval_number_int"] = parse_eval_number(df["eval_number"])
     return df
 
 
-def load_sondage(path: Path) -> pd.DataFrame:
-    df = _read_csv(path)
-    if "code_sondage" not in df.columns:
-        raise KeyError("sondage: missing column 'code_sondage'")
+def load_sirh(
+    path: Path,
+    dtypes: Mapping[str, str] | None = SIRH_DTYPES,
+    engine: CsvEngine = "c",
+) -> pd.DataFrame:
+    df = _read_csv(path, dtypes, engine)
+    # Expected join key already numeric: id_employee
+    _require(df, "sirh", "id_employee")
     return df
 
 
+def load_eval(
+    path: Path,
+    dtypes: Mapping[str, str] | None = EVAL_DTYPES,
+    engine: CsvEngine = "c",
+) -> pd.DataFrame:
+    return _with_eval_number_int(_read_csv(path, dtypes, engine))
+
+
+def load_sondage(
+    path: Path,
+    dtypes: Mapping[str, str] | None = SONDAGE_DTYPES,
+    engine: CsvEngine = "c",
+) -> pd.DataFrame:
+    df = _read_csv(path, dtypes, engine)
+    _require(df, "sondage", "code_sondage")
+    return df
+
+
+def iter_sirh(
+    path: Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dtypes: Mapping[str, str] | None = SIRH_DTYPES,
+    engine: CsvEngine = "c",
+) -> Iterator[pd.DataFrame]:
+    for chunk in _iter_csv(path, dtypes, chunksize, engine):
+        _require(chunk, "sirh", "id_employee")
+        yield chunk
+
+
+def iter_eval(
+    path: Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dtypes: Mapping[str, str] | None = EVAL_DTYPES,
+    engine: CsvEngine = "c",
+) -> Iterator[pd.DataFrame]:
+    for chunk in _iter_csv(path, dtypes, chunksize, engine):
+        yield _with_eval_number_int(chunk)
+
+
+def iter_sondage(
+    path: Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dtypes: Mapping[str, str] | None = SONDAGE_DTYPES,
+    engine: CsvEngine = "c",
+) -> Iterator[pd.DataFrame]:
+    for chunk in _iter_csv(path, dtypes, chunksize, engine):
+        _require(chunk, "sondage", "code_sondage")
+        yield chunk
+
+
 def check_duplicates(df: pd.DataFrame, subset: list[str] | None = None) -> pd.DataFrame:
     dup = df[df.duplicated(subset=subset, keep=False)].copy()
     return dup
 
 
+@dataclass
+class JoinStats:
+    """Diagnostics de join_sources (clés sans correspondance, doublons de clé)."""
+
+    n_sirh: int
+    n_eval: int
+    n_sondage: int
+    n_joined: int
+    unmatched: dict[str, int] = field(default_factory=dict)
+    duplicates: dict[str, int] = field(default_factory=dict)
+    method: str = "hash"
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _positions(keys: pd.Series, lookup: pd.Series) -> tuple[np.ndarray | None, int]:
+    """
+    Position de chaque clé de `keys` dans `lookup` (-1 si absente) et nombre de lignes
+    de `lookup` à clé dupliquée. Une table de hachage par source, libérée aussitôt.
+    """
+    index = pd.Index(lookup.array)
+    if not index.is_unique:
+        return None, int(lookup.duplicated(keep=False).sum())
+    return index.get_indexer(keys.array), 0
+
+
+def _take_rows(df: pd.DataFrame, pos: np.ndarray) -> pd.DataFrame:
+    # pos = -1 -> ligne de NaN (équivalent d'une jointure left sans correspondance)
+    if (pos >= 0).all():
+        return df.take(pos).reset_index(drop=True)
+    return df.reset_index(drop=True).reindex(pos).reset_index(drop=True)
+
+
 def join_sources(
     sirh: pd.DataFrame,
     eval_df: pd.DataFrame,
     sondage: pd.DataFrame,
     how: Literal["inner", "left"] = "inner",
-) -> pd.DataFrame:
+    return_stats: bool = False,
+) -> pd.DataFrame | tuple[pd.DataFrame, JoinStats]:
     """
     Join strategy:
     - Map eval_number_int <-> id_employee and code_sondage <-> id_employee
       (assumption based on your mapping; if needed we'll adapt after inspecting CSVs)
+
+    Clés uniques (cas nominal) : chaque source est indexée une fois sur sa clé entière,
+    puis les trois sont assemblées en une passe (pas de DataFrame intermédiaire).
+    Doublons de clé ou noms de colonnes communs : repli sur les deux merges pandas
+    (même sémantique que l'historique). return_stats=True -> (df, JoinStats).
     """
     if "eval_number_int" not in eval_df.columns:
         raise KeyError("eval_df missing 'eval_number_int' (run load_eval)")
 
-    df = sirh.merge(eval_df, left_on="id_employee", right_on="eval_number_int", how=how)
-    df = df.merge(sondage, left_on="id_employee", right_on="code_sondage", how=how)
-    return df
+    k_sirh = sirh["id_employee"]
+    k_eval = eval_df["eval_number_int"]
+    k_sondage = sondage["code_sondage"]
+
+    e_pos, n_dup_eval = _positions(k_sirh, k_eval)
+    s_pos, n_dup_sondage = _positions(k_sirh, k_sondage)
+    duplicates = {
+        "sirh": 0 if k_sirh.is_unique else int(k_sirh.duplicated(keep=False).sum()),
+        "eval": n_dup_eval,
+        "sondage": n_dup_sondage,
+    }
+    overlap = (
+        set(sirh.columns) & set(eval_df.columns)
+        or set(sirh.columns) & set(sondage.columns)
+        or set(eval_df.columns) & set(sondage.columns)
+    )
+
+    if any(duplicates.values()) or overlap:
+        df = sirh.merge(eval_df, left_on="id_employee", right_on="eval_number_int", how=how)
+        df = df.merge(sondage, left_on="id_employee", right_on="code_sondage", how=how)
+        method = "merge"
+        unmatched = {
+            "sirh_without_eval": int((~k_sirh.isin(k_eval)).sum()),
+            "sirh_without_sondage": int((~k_sirh.isin(k_sondage)).sum()),
+            "eval_without_sirh": int((~k_eval.isin(k_sirh)).sum()),
+            "sondage_without_sirh": int((~k_sondage.isin(k_sirh)).sum()),
+        }
+    else:
+        rows = np.arange(len(sirh))
+        if how == "inner":
+            rows = np.flatnonzero((e_pos >= 0) & (s_pos >= 0))
+        df = pd.concat(
+            [
+                _take_rows(sirh, rows),
+                _take_rows(eval_df, e_pos[rows]),
+                _take_rows(sondage, s_pos[rows]),
+            ],
+            axis=1,
+        )
+        method = "hash"
+        # clés uniques partout : correspondances 1-1, comptes déduits des positions
+        n_eval_matched = int((e_pos >= 0).sum())
+        n_sondage_matched = int((s_pos >= 0).sum())
+        unmatched = {
+            "sirh_without_eval": len(sirh) - n_eval_matched,
+            "sirh_without_sondage": len(sirh) - n_sondage_matched,
+            "eval_without_sirh": len(eval_df) - n_eval_matched,
+            "sondage_without_sirh": len(sondage) - n_sondage_matched,
+        }
+
+    if not return_stats:
+        return df
+    stats = JoinStats(
+        n_sirh=len(sirh),
+        n_eval=len(eval_df),
+        n_sondage=len(sondage),
+        n_joined=len(df),
+        unmatched=unmatched,
+        duplicates=duplicates,
+        method=method,
+    )
+    return df, stats
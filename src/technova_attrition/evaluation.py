@@ -11,8 +11,12 @@ from sklearn.metrics import (
 )
 
 
-def evaluate_classifier(model, X_train, y_train, X_test, y_test, threshold: float = 0.5) -> dict:
-    model.fit(X_train, y_train)
+def evaluate_classifier(
+    model, X_train, y_train, X_test, y_test, threshold: float = 0.5, fit: bool = True
+) -> dict:
+    # fit=False : modèle déjà entraîné sur (X_train, y_train), évalué tel quel
+    if fit:
+        model.fit(X_train, y_train)
 
     # proba classe 1
     p_train = model.predict_proba(X_train)[:, 1]
@@ -3,7 +3,8 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 import shap
-from sklearn.inspection import permutation_importance
+
+from technova_attrition.importance import grouped_permutation_importance
 
 
 def permutation_importance_df(
@@ -13,28 +14,26 @@ def permutation_importance_df(
     scoring: str = "average_precision",
     n_repeats: int = 20,
     random_state: int = 42,
+    groups=None,
+    n_jobs: int = -1,
 ) -> pd.DataFrame:
     """
     Permutation importance au niveau des FEATURES ORIGINALES (avant encodage),
     ce qui est souvent le plus lisible pour une audience métier.
+    `groups` (nom -> colonnes) : variables corrélées permutées ensemble. n_repeats est un
+    maximum (arrêt anticipé), cf. importance.grouped_permutation_importance.
     """
-    r = permutation_importance(
+    r = grouped_permutation_importance(
         pipeline,
         X_test,
         y_test,
         scoring=scoring,
+        groups=groups,
         n_repeats=n_repeats,
+        n_jobs=n_jobs,
         random_state=random_state,
-        n_jobs=-1,
     )
-    df = pd.DataFrame(
-        {
-            "feature": X_test.columns,
-            "importance_mean": r.importances_mean,
-            "importance_std": r.importances_std,
-        }
-    ).sort_values("importance_mean", ascending=False)
-    return df
+    return r.importances[["feature", "importance_mean", "importance_std"]]
 
 
 def get_transformed_feature_names(pipeline) -> np.ndarray:
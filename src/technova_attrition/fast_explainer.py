@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Literal
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.pipeline import Pipeline
+
+from technova_attrition.fast_scorer import CompiledScorer, compile_pipeline
+
+EXPLAINER_FORMAT = "technova-linear-explainer/1"
+
+# Explications exactes du modèle logistique, sans dépendance SHAP.
+# Pour un modèle linéaire (features transformées supposées indépendantes), la valeur SHAP
+# interventionnelle de la colonne j vaut coef_j * (x_j - E[x_j]) : seul E[x] (moyenne du
+# fond) est nécessaire. Les contributions des colonnes one-hot d'une même variable brute
+# sont sommées (CompiledScorer.output_sources) ; unité : log-odds.
+#   base_value + Σ contributions = logit(proba)
+
+
+def _coef_hash(coef) -> str:
+    blob = json.dumps([float(v) for v in np.ravel(coef)])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def build_linear_explainer(
+    pipeline: Pipeline,
+    X_background: pd.DataFrame,
+    method: Literal["kmeans", "sample"] = "kmeans",
+    n_summary: int = 32,
+    random_state: int = 42,
+) -> dict:
+    """
+    Résumé compact du fond (centres k-means pondérés par la taille des clusters, ou
+    échantillon) dans l'espace transformé + paramètres de l'explainer, en JSON.
+    Les centres k-means pondérés ont la même moyenne que le fond complet.
+    """
+    scorer = CompiledScorer(compile_pipeline(pipeline))
+    Xt = pipeline.named_steps["preprocess"].transform(X_background)
+    Xt = np.asarray(Xt.toarray() if hasattr(Xt, "toarray") else Xt, dtype=float)
+
+    k = min(n_summary, len(Xt))
+    if method == "kmeans":
+        km = KMeans(n_clusters=k, n_init=4, random_state=random_state).fit(Xt)
+        centers = km.cluster_centers_
+        weights = np.bincount(km.labels_, minlength=k) / len(Xt)
+    elif method == "sample":
+        idx = np.random.default_rng(random_state).choice(len(Xt), size=k, replace=False)
+        centers = Xt[idx]
+        weights = np.full(k, 1.0 / k)
+    else:
+        raise ValueError(f"method inconnue: {method} (kmeans|sample)")
+
+    mean = weights @ centers
+    return {
+        "format": EXPLAINER_FORMAT,
+        "method": method,
+        "n_background": int(len(Xt)),
+        "preprocess_hash": scorer.preprocess_hash,
+        "coef_hash": _coef_hash(scorer.coef),
+        "feature_names_out": scorer.feature_names_out,
+        "centers": centers.tolist(),
+        "weights": weights.tolist(),
+        "mean": mean.tolist(),
+        "base_value": float(scorer.intercept + scorer.coef @ mean),
+    }
+
+
+def save_explainer(artifact: dict, path: Path) -> None:
+    path.write_text(json.dumps(artifact, ensure_ascii=False), encoding="utf-8")
+
+
+def load_explainer(path: Path, scorer: CompiledScorer) -> "LinearExplainer":
+    if not path.exists():
+        raise FileNotFoundError(f"Explainer introuvable: {path}")
+    return LinearExplainer(json.loads(path.read_text(encoding="utf-8")), scorer)
+
+
+class LinearExplainer:
+    """
+    Contributions par variable brute pour un ou N payloads normalisés :
+    transform (CompiledScorer) -> (x - moyenne du fond) * coef -> somme par variable.
+    """
+
+    def __init__(self, artifact: dict, scorer: CompiledScorer):
+        if artifact.get("format") != EXPLAINER_FORMAT:
+            raise ValueError(f"Format d'explainer inattendu: {artifact.get('format')}")
+        # explainer.json doit venir du même pipeline que pipeline_compiled.json
+        if artifact["preprocess_hash"] != scorer.preprocess_hash or artifact[
+            "coef_hash"
+        ] != _coef_hash(scorer.coef):
+            raise ValueError("explainer.json désynchronisé du pipeline compilé")
+        self.artifact = artifact
+        self.scorer = scorer
+        self.mean = np.asarray(artifact["mean"], dtype=float)
+        self.base_value = float(artifact["base_value"])
+
+        # matrice (features transformées x variables brutes) : agrégation en un produit
+        self.features = list(dict.fromkeys(scorer.output_sources))
+        pos = {f: i for i, f in enumerate(self.features)}
+        self._agg = np.zeros((len(scorer.output_sources), len(self.features)))
+        for j, src in enumerate(scorer.output_sources):
+            self._agg[j, pos[src]] = 1.0
+
+    def contributions(self, payloads: list[Dict[str, Any]]) -> np.ndarray:
+        """(N x variables brutes) en log-odds ; une ligne somme à logit - base_value."""
+        X = self.scorer.transform_many(payloads)
+        return ((X - self.mean) * self.scorer.coef) @ self._agg
+
+    def explain_many(self, payloads: list[Dict[str, Any]], top_k: int) -> list[dict]:
+        """Top-k variables par |contribution| décroissante, pour chaque payload."""
+        if not payloads:
+            return []
+        contrib = self.contributions(payloads)
+        k = min(top_k, len(self.features))
+        # argpartition puis tri des k retenues : O(F) par ligne au lieu d'un tri complet
+        top = np.argpartition(-np.abs(contrib), k - 1, axis=1)[:, :k]
+        out = []
+        for payload, row, idx in zip(payloads, contrib, top):
+            idx = idx[np.argsort(-np.abs(row[idx]), kind="stable")]
+            out.append(
+                {
+                    "base_value": self.base_value,
+                    "logit": float(self.base_value + row.sum()),
+                    "contributions": [
+                        {
+                            "feature": self.features[j],
+                            "value": payload.get(self.features[j]),
+                            "contribution": float(row[j]),
+                        }
+                        for j in idx
+                    ],
+                }
+            )
+        return out
+
+    def explain_one(self, payload: Dict[str, Any], top_k: int) -> dict:
+        return self.explain_many([payload], top_k)[0]
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from technova_attrition.preprocessing import _log1p_safe
+
+ARTIFACT_FORMAT = "technova-compiled-linear/1"
+
+
+# ---------------------------------------------------------------------------
+# Export : pipeline sklearn ajusté -> artefact JSON compact (NumPy/Python pur)
+# ---------------------------------------------------------------------------
+
+
+def _py(v: Any) -> Any:
+    """Scalaire numpy -> scalaire Python (sérialisable JSON, hashable pour les lookups)."""
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def compile_block(name: str, steps: list[tuple[str, Any]], columns: list[str]) -> dict:
+    """
+    Une sous-pipeline du ColumnTransformer -> un bloc :
+    imputation -> (log1p) -> (encodage ordinal / one-hot) -> (scaling).
+    Toute étape non reconnue lève NotImplementedError (pas de compilation approximative).
+    """
+    block: dict[str, Any] = {
+        "name": name,
+        "columns": list(columns),
+        "impute": None,
+        "log1p": False,
+        "encode": None,
+        "mean": None,
+        "scale": None,
+    }
+    for step_name, step in steps:
+        if isinstance(step, SimpleImputer):
+            block["impute"] = [_py(v) for v in step.statistics_]
+        elif isinstance(step, FunctionTransformer) and step.func is _log1p_safe:
+            block["log1p"] = True
+        elif isinstance(step, OrdinalEncoder):
+            block["encode"] = {
+                "type": "ordinal",
+                "categories": [[_py(v) for v in cats] for cats in step.categories_],
+                "unknown": _py(step.unknown_value),
+            }
+        elif isinstance(step, OneHotEncoder):
+            if getattr(step, "_infrequent_enabled", False):
+                raise NotImplementedError(f"{name}: OneHotEncoder infrequent non supporté")
+            drop_idx = step.drop_idx_
+            block["encode"] = {
+                "type": "onehot",
+                "categories": [[_py(v) for v in cats] for cats in step.categories_],
+                "drop_idx": [
+                    None if drop_idx is None or drop_idx[i] is None else int(drop_idx[i])
+                    for i in range(len(step.categories_))
+                ],
+            }
+        elif isinstance(step, StandardScaler):
+            n = step.n_features_in_
+            mean = step.mean_ if step.with_mean else np.zeros(n)
+            scale = step.scale_ if step.with_std else np.ones(n)
+            block["mean"] = [float(v) for v in mean]
+            block["scale"] = [float(v) for v in scale]
+        else:
+            raise NotImplementedError(f"{name}: étape non supportée {step_name}={step!r}")
+    return block
+
+
+def output_sources(blocks: list[dict]) -> list[str]:
+    """Colonne brute à l'origine de chaque colonne transformée, dans l'ordre de sortie."""
+    sources: list[str] = []
+    for b in blocks:
+        enc = b["encode"]
+        for j, col in enumerate(b["columns"]):
+            if enc and enc["type"] == "onehot":
+                n_out = len(enc["categories"][j]) - (enc["drop_idx"][j] is not None)
+            else:
+                n_out = 1
+            sources.extend([col] * n_out)
+    return sources
+
+
+def compile_pipeline(pipeline: Pipeline) -> dict:
+    """
+    Aplatit Pipeline([("preprocess", ColumnTransformer), ("model", linéaire logistique)])
+    en un dict JSON : imputations, moyennes/échelles, lookups de catégories, coef, intercept.
+    """
+    pre = pipeline.named_steps["preprocess"]
+    model = pipeline.named_steps["model"]
+    if not isinstance(pre, ColumnTransformer):
+        raise NotImplementedError("preprocess doit être un ColumnTransformer")
+
+    is_logistic = type(model).__name__ == "LogisticRegression" or (
+        type(model).__name__ == "SGDClassifier" and model.loss == "log_loss"
+    )
+    if not is_logistic or len(model.classes_) != 2:
+        raise NotImplementedError(f"Modèle non supporté: {type(model).__name__}")
+
+    blocks = []
+    for name, trans, columns in pre.transformers_:
+        if name == "remainder" or trans == "drop" or len(columns) == 0:
+            continue
+        steps = trans.steps if isinstance(trans, Pipeline) else [(name, trans)]
+        blocks.append(compile_block(name, steps, list(columns)))
+
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "model_type": type(model).__name__,
+        "feature_names_out": [str(f) for f in pre.get_feature_names_out()],
+        "blocks": blocks,
+        "coef": [float(v) for v in np.ravel(model.coef_)],
+        "intercept": float(np.ravel(model.intercept_)[0]),
+    }
+    # garde-fou : la taille de sortie doit correspondre aux coefficients
+    if len(artifact["coef"]) != len(artifact["feature_names_out"]):
+        raise ValueError("Nombre de coefficients != nombre de features transformées")
+    return artifact
+
+
+def save_compiled(artifact: dict, path: Path) -> None:
+    path.write_text(json.dumps(artifact, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def load_compiled(path: Path) -> "CompiledScorer":
+    if not path.exists():
+        raise FileNotFoundError(f"Pipeline compilé introuvable: {path}")
+    return CompiledScorer(json.loads(path.read_text(encoding="utf-8")))
+
+
+# ---------------------------------------------------------------------------
+# Scoring : payload normalisé (dict) -> probabilité, sans pandas ni sklearn
+# ---------------------------------------------------------------------------
+
+
+def _is_missing(v: Any) -> bool:
+    # None = manquant dans tous les blocs, comme côté sklearn : records_to_frame passe
+    # None en NaN (colonnes numériques et object), que SimpleImputer impute
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+
+class CompiledScorer:
+    """
+    Scorer NumPy/Python pur, équivalent à pipeline.predict_proba(X)[:, 1].
+
+    - transform_one / transform_many : vecteur model-ready (mêmes colonnes que
+      preprocess.get_feature_names_out())
+    - predict_proba_one : chemin rapide ; scaler et coefficients sont "repliés" en
+      une table de contributions par colonne brute -> une somme de floats + sigmoïde.
+    """
+
+    def __init__(self, artifact: dict):
+        if artifact.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Format d'artefact inattendu: {artifact.get('format')}")
+        self.artifact = artifact
+        self.feature_names_out: list[str] = artifact["feature_names_out"]
+        self.coef = np.asarray(artifact["coef"], dtype=float)
+        self.intercept = float(artifact["intercept"])
+
+        # source brute de chaque colonne transformée (ex: poste_Manager -> poste)
+        self.output_sources: list[str] = output_sources(artifact["blocks"])
+
+        self._compile_fast_path()
+
+    @cached_property
+    def preprocess_hash(self) -> str:
+        """Empreinte des paramètres de préprocessing (blocs), indépendante des coefficients."""
+        blocks = json.dumps(self.artifact["blocks"], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blocks.encode("utf-8")).hexdigest()[:16]
+
+    def _compile_fast_path(self) -> None:
+        """
+        z = intercept + Σ contribution(colonne brute).
+        - numérique : contribution = w * f(x) + c, avec w = coef/scale, c = -coef*mean/scale
+        - ordinal / one-hot : dict valeur -> contribution (+ contribution "inconnue")
+        """
+        self._numeric: list[tuple[str, Any, bool, float]] = []
+        self._lookup: list[tuple[str, Any, dict, float]] = []
+        offset = self.intercept
+        pos = 0
+        for b in self.artifact["blocks"]:
+            enc = b["encode"]
+            for j, col in enumerate(b["columns"]):
+                impute = b["impute"][j] if b["impute"] is not None else None
+                mean = b["mean"][j] if b["mean"] is not None else 0.0
+                scale = b["scale"][j] if b["scale"] is not None else 1.0
+
+                if enc is None:
+                    w = self.coef[pos] / scale
+                    offset -= w * mean
+                    self._numeric.append((col, impute, b["log1p"], float(w)))
+                    pos += 1
+                elif enc["type"] == "ordinal":
+                    cats = enc["categories"][j]
+                    w = self.coef[pos] / scale
+                    table = {c: float(w * (k - mean)) for k, c in enumerate(cats)}
+                    self._lookup.append((col, impute, table, float(w * (enc["unknown"] - mean))))
+                    pos += 1
+                else:  # onehot
+                    cats = enc["categories"][j]
+                    drop = enc["drop_idx"][j]
+                    table = {}
+                    k_out = 0
+                    for k, c in enumerate(cats):
+                        if k == drop:
+                            table[c] = 0.0
+                            continue
+                        table[c] = float(self.coef[pos + k_out])
+                        k_out += 1
+                    self._lookup.append((col, impute, table, 0.0))
+                    pos += k_out
+        self._offset = float(offset)
+
+    # --- chemin rapide
+    def decision_function_one(self, payload: Dict[str, Any]) -> float:
+        z = self._offset
+        for col, impute, log1p, w in self._numeric:
+            v = payload.get(col)
+            if _is_missing(v):
+                v = impute
+            x = float(v)
+            if log1p:
+                x = math.log1p(x if x > 0.0 else 0.0)
+            z += w * x
+        for col, impute, table, unknown in self._lookup:
+            v = payload.get(col)
+            if _is_missing(v) and impute is not None:
+                v = impute
+            z += table.get(v, unknown)
+        return z
+
+    def predict_proba_one(self, payload: Dict[str, Any]) -> float:
+        z = self.decision_function_one(payload)
+        # sigmoïde stable numériquement
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        ez = math.exp(z)
+        return ez / (1.0 + ez)
+
+    def predict_proba_many(self, payloads: list[Dict[str, Any]]) -> np.ndarray:
+        return np.fromiter((self.predict_proba_one(p) for p in payloads), dtype=float)
+
+    # --- vecteur model-ready (features stores, explications)
+    def transform_one(self, payload: Dict[str, Any]) -> np.ndarray:
+        out = np.empty(len(self.feature_names_out), dtype=float)
+        pos = 0
+        for b in self.artifact["blocks"]:
+            enc = b["encode"]
+            for j, col in enumerate(b["columns"]):
+                v = payload.get(col)
+                if _is_missing(v) and b["impute"] is not None:
+                    v = b["impute"][j]
+
+                if enc is not None and enc["type"] == "onehot":
+                    cats = enc["categories"][j]
+                    drop = enc["drop_idx"][j]
+                    n_out = len(cats) - (drop is not None)
+                    out[pos : pos + n_out] = 0.0
+                    try:
+                        k = cats.index(v)
+                    except ValueError:
+                        k = None  # handle_unknown="ignore" -> que des zéros
+                    if k is not None and k != drop:
+                        out[pos + (k if drop is None or k < drop else k - 1)] = 1.0
+                    pos += n_out
+                    continue
+
+                if enc is not None:  # ordinal
+                    cats = enc["categories"][j]
+                    x = float(cats.index(v)) if v in cats else float(enc["unknown"])
+                else:
+                    x = float(v)
+                    if b["log1p"]:
+                        x = math.log1p(x if x > 0.0 else 0.0)
+                if b["mean"] is not None:
+                    x = (x - b["mean"][j]) / b["scale"][j]
+                out[pos] = x
+                pos += 1
+        return out
+
+    def transform_many(self, payloads: list[Dict[str, Any]]) -> np.ndarray:
+        if not payloads:
+            return np.empty((0, len(self.feature_names_out)), dtype=float)
+        return np.vstack([self.transform_one(p) for p in payloads])
+
+    def predict_proba_transformed(self, X: np.ndarray) -> np.ndarray:
+        """Probabilités depuis des vecteurs déjà transformés (feature store) : X @ coef."""
+        z = np.asarray(X, dtype=float) @ self.coef + self.intercept
+        # sigmoïde stable numériquement (pas d'exp d'un grand positif)
+        ez = np.exp(-np.abs(z))
+        return np.where(z >= 0, 1.0 / (1.0 + ez), ez / (1.0 + ez))
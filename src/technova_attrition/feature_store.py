@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Iterator, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from technova_attrition.fast_scorer import CompiledScorer
+from technova_attrition.normalization import normalize_records
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# employés sans vecteur à jour pour (version, empreinte) : absent, ancien préprocesseur
+# ou features modifiées depuis le calcul (updated_at maintenu par trigger).
+# Pagination par clé (employee_id > :last) : une page en mémoire à la fois.
+_SELECT_STALE_PAGE = text("""
+    SELECT e.employee_id, e.features, e.updated_at
+    FROM employees e
+    LEFT JOIN employee_feature_vectors v
+      ON v.employee_id = e.employee_id AND v.model_version = :ver
+    WHERE e.employee_id > :last
+      AND (:full
+       OR v.employee_id IS NULL
+       OR v.preprocess_hash <> :fp
+       OR v.source_updated_at < e.updated_at)
+    ORDER BY e.employee_id
+    LIMIT :limit
+""")
+
+_UPSERT_VECTORS = text("""
+    INSERT INTO employee_feature_vectors
+      (employee_id, model_version, preprocess_hash, vector, source_updated_at, computed_at)
+    SELECT employee_id, :ver, :fp, vector, source_updated_at, NOW()
+    FROM jsonb_to_recordset(CAST(:rows AS JSONB))
+      AS r(employee_id INTEGER, vector DOUBLE PRECISION[], source_updated_at TIMESTAMPTZ)
+    ON CONFLICT (employee_id, model_version) DO UPDATE SET
+      preprocess_hash = EXCLUDED.preprocess_hash,
+      vector = EXCLUDED.vector,
+      source_updated_at = EXCLUDED.source_updated_at,
+      computed_at = EXCLUDED.computed_at
+""")
+
+_SELECT_VECTORS = text("""
+    SELECT v.employee_id, v.vector
+    FROM employee_feature_vectors v
+    JOIN employees e ON e.employee_id = v.employee_id
+    WHERE v.model_version = :ver
+      AND v.preprocess_hash = :fp
+      AND v.source_updated_at >= e.updated_at
+    ORDER BY v.employee_id
+""")
+
+# features brutes + vecteur s'il est à jour (NULL sinon) en une requête
+SELECT_EMPLOYEE_WITH_VECTOR = text("""
+    SELECT e.features, v.vector
+    FROM employees e
+    LEFT JOIN employee_feature_vectors v
+      ON v.employee_id = e.employee_id
+     AND v.model_version = :ver
+     AND v.preprocess_hash = :fp
+     AND v.source_updated_at >= e.updated_at
+    WHERE e.employee_id = :id
+""")
+
+
+def _load_features(raw: Any) -> dict[str, Any]:
+    # selon driver/param, ça peut arriver en dict OU en string JSON
+    return json.loads(raw) if isinstance(raw, str) else raw
+
+
+def refresh_feature_store(
+    db: Session,
+    scorer: CompiledScorer,
+    model_version: str,
+    *,
+    full: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict[str, int]:
+    """
+    Recalcule les vecteurs manquants ou périmés (full=True : tous), page par page
+    (chunk_size employés, pagination par employee_id) : lecture, transform, upsert et
+    commit par page. Retourne {"refreshed", "chunks"}.
+    """
+    fp = scorer.preprocess_hash
+    params = {"ver": model_version, "fp": fp, "full": full, "limit": chunk_size}
+
+    refreshed = 0
+    chunks = 0
+    last = -(2**31) - 1  # sous le minimum INTEGER : première page
+    while True:
+        chunk = db.execute(_SELECT_STALE_PAGE, {**params, "last": last}).fetchall()
+        if not chunk:
+            break
+        last = int(chunk[-1][0])
+        payloads = normalize_records([_load_features(r[1]) for r in chunk])
+        X = scorer.transform_many(payloads)
+        rows = [
+            {
+                "employee_id": int(r[0]),
+                "vector": x.tolist(),
+                "source_updated_at": r[2].isoformat(),
+            }
+            for r, x in zip(chunk, X)
+        ]
+        db.execute(_UPSERT_VECTORS, {"ver": model_version, "fp": fp, "rows": json.dumps(rows)})
+        db.commit()
+        refreshed += len(rows)
+        chunks += 1
+        if len(chunk) < chunk_size:
+            break
+    return {"refreshed": refreshed, "chunks": chunks}
+
+
+def iter_vector_chunks(
+    db: Session,
+    scorer: CompiledScorer,
+    model_version: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """(employee_ids, matrice N x d) par chunk, via curseur serveur (mémoire bornée)."""
+    params = {"ver": model_version, "fp": scorer.preprocess_hash}
+    result = db.execute(
+        _SELECT_VECTORS.execution_options(yield_per=chunk_size, stream_results=True), params
+    )
+    for part in result.partitions():
+        ids = np.fromiter((r[0] for r in part), dtype=np.int64, count=len(part))
+        yield ids, np.asarray([r[1] for r in part], dtype=float)
+
+
+def rescore_from_store(
+    db: Session,
+    scorer: CompiledScorer,
+    model_version: str,
+    threshold: float,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """
+    Re-score de tous les employés à vecteur à jour : un produit matriciel par chunk
+    (pas de préprocessing). Utile après changement de seuil ou de coefficients.
+    """
+    for ids, X in iter_vector_chunks(db, scorer, model_version, chunk_size):
+        probas = scorer.predict_proba_transformed(X)
+        preds = (probas >= threshold).astype(int)
+        for employee_id, proba, pred in zip(ids, probas, preds):
+            yield {
+                "employee_id": int(employee_id),
+                "proba_depart": float(proba),
+                "prediction": int(pred),
+            }
+
+
+def fetch_employee_with_vector(
+    db: Session, employee_id: int, scorer: CompiledScorer, model_version: str
+) -> Optional[tuple[dict[str, Any], Optional[list[float]]]]:
+    """(features brutes, vecteur à jour ou None) ; None si l'employé n'existe pas."""
+    row = db.execute(
+        SELECT_EMPLOYEE_WITH_VECTOR,
+        {"id": employee_id, "ver": model_version, "fp": scorer.preprocess_hash},
+    ).fetchone()
+    if row is None:
+        return None
+    return _load_features(row[0]), row[1]
@@ -1,80 +1,165 @@
 from __future__ import annotations
 
+from typing import Iterable, Iterator
+
 import numpy as np
 import pandas as pd
 
-from technova_attrition.cleaning import (
-    drop_constant_columns,
-    percent_to_ratio,
-    safe_divide,
-    yes_no_to_int,
+from technova_attrition.normalization import (
+    genre_column,
+    percent_ratio_column,
+    yes_no_column,
 )
 
+CONSTANT_CANDIDATES = ["nombre_heures_travailless", "ayant_enfants"]
+
+# ⚠️ Les colonnes peuvent s'appeler "nombre_experiences_precedents" ou "...precedentes"
+EXPERIENCE_COLUMNS = ["nombre_experiences_precedents", "nombre_experiences_precedentes"]
+
+
+class _NumericCache:
+    """Chaque colonne source est convertie en numérique une seule fois (pd.to_numeric)."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._series: dict[str, pd.Series] = {}
+        self._arrays: dict[str, np.ndarray] = {}
+
+    def series(self, col: str) -> pd.Series:
+        if col not in self._series:
+            self._series[col] = pd.to_numeric(self.df[col], errors="coerce")
+        return self._series[col]
+
+    def array(self, col: str) -> np.ndarray:
+        """float64 (NaN pour les manquants) : base des calculs NumPy."""
+        if col not in self._arrays:
+            self._arrays[col] = self.series(col).to_numpy(dtype=float, na_value=np.nan)
+        return self._arrays[col]
 
-def add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
 
-    # --- Binary mappings
-    if "a_quitte_l_entreprise" in out.columns:
-        out["a_quitte_l_entreprise"] = yes_no_to_int(out["a_quitte_l_entreprise"])
+def _inferred_dtypes(df: pd.DataFrame) -> None:
+    """
+    Colonnes typées par data_io (category, string, entiers nullables) -> dtypes de
+    l'inférence pandas (dtypes=None), en place : object/NaN, int64, float64 si valeurs
+    manquantes. sklearn ne sait pas mélanger category, pd.NA et entiers dans un bloc
+    (ex. frequence_deplacement avec les ordinales Int8).
+    """
+    for col in df.columns:
+        s = df[col]
+        dtype = s.dtype
+        if isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            df[col] = s.to_numpy(dtype=object, na_value=np.nan)
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "iu":
+            if s.hasnans:
+                df[col] = s.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                df[col] = s.to_numpy(dtype="int64")
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    # même règle que cleaning.safe_divide, sur des float64 déjà convertis
+    ok = (den > 0) & ~np.isnan(num)
+    out = np.full(num.shape, np.nan)
+    np.divide(num, den, out=out, where=ok)
+    return out
 
-    if "heure_supplementaires" in out.columns:
-        out["heure_supplementaires"] = yes_no_to_int(out["heure_supplementaires"])
+
+def add_engineered_features(
+    df: pd.DataFrame,
+    copy: bool = True,
+    drop_constants: bool = True,
+) -> pd.DataFrame:
+    """
+    Mappings binaires, ratio d'augmentation, genre 0/1, suppression des constantes et
+    features dérivées, en une passe : chaque colonne source est convertie une seule fois
+    (cache numérique), les dérivées sont calculées sur des tableaux NumPy.
+
+    Entrées typées par data_io (category, entiers nullables) : ramenées aux dtypes de
+    l'inférence pandas, la sortie part telle quelle dans build_preprocessor.
+
+    copy=False : modifie `df` en place (pas de copie du DataFrame d'entrée).
+    drop_constants=False : garde les colonnes constantes (schéma stable par chunk).
+    """
+    out = df.copy() if copy else df
+    cols = set(out.columns)
+
+    # --- Schémas typés (data_io) -> dtypes NumPy attendus par le préprocessing sklearn
+    _inferred_dtypes(out)
+
+    # --- Binary mappings (tables de normalization, partagées avec le service)
+    for col in ("a_quitte_l_entreprise", "heure_supplementaires"):
+        if col in cols:
+            out[col] = yes_no_column(out[col])
 
     # --- Percent to ratio
-    if "augmentation_salaire_precedente" in out.columns:
-        out["augmentation_salaire_precedente"] = percent_to_ratio(
+    if "augmentation_salaire_precedente" in cols:
+        out["augmentation_salaire_precedente"] = percent_ratio_column(
             out["augmentation_salaire_precedente"]
         )
 
-    # --- genre : "F"/"M" -> 0/1 (si nécessaire)
-    if "genre" in out.columns:
-        g = out["genre"].astype(str).str.strip().str.upper()
-        if set(g.dropna().unique()).issubset({"F", "M"}):
-            out["genre"] = g.map({"F": 0, "M": 1}).astype("Int64")
+    # --- genre : "F"/"M" -> 0/1 (si tous les libellés sont reconnus)
+    if "genre" in cols:
+        genre = genre_column(out["genre"])
+        if genre is not None:
+            out["genre"] = genre
 
     # --- Drop constants (as requested, but safe if names differ)
-    out = drop_constant_columns(out, candidates=["nombre_heures_travailless", "ayant_enfants"])
+    if drop_constants:
+        to_drop = [
+            c for c in CONSTANT_CANDIDATES if c in cols and out[c].nunique(dropna=False) <= 1
+        ]
+        for c in to_drop:
+            del out[c]  # pas de DataFrame.drop : évite de recopier les autres blocs
+        cols.difference_update(to_drop)
+
+    num = _NumericCache(out)
 
     # --- New feature: changement de poste
-    if {"annees_dans_l_entreprise", "annees_dans_le_poste_actuel"}.issubset(out.columns):
+    if {"annees_dans_l_entreprise", "annees_dans_le_poste_actuel"}.issubset(cols):
+        # comparaison pandas (et non NumPy) : <NA> conservé pour les entrées nullable
         out["changement_poste"] = (
-            pd.to_numeric(out["annees_dans_l_entreprise"], errors="coerce")
-            > pd.to_numeric(out["annees_dans_le_poste_actuel"], errors="coerce")
+            num.series("annees_dans_l_entreprise") > num.series("annees_dans_le_poste_actuel")
         ).astype("Int64")
 
     # --- Probabilités/ratios normalisés
-    # ⚠️ Les colonnes peuvent s'appeler "nombre_experiences_precedents" ou "...precedentes"
-    exp_col = None
-    for cand in ["nombre_experiences_precedents", "nombre_experiences_precedentes"]:
-        if cand in out.columns:
-            exp_col = cand
-            break
+    exp_col = next((c for c in EXPERIENCE_COLUMNS if c in cols), None)
+    adult_years = num.array("age") - 18 if "age" in cols else None
 
-    if exp_col and "annee_experience_totale" in out.columns:
-        out["proba_chgt_experience_par_an"] = safe_divide(
-            out[exp_col], out["annee_experience_totale"]
+    if exp_col and "annee_experience_totale" in cols:
+        out["proba_chgt_experience_par_an"] = _safe_div(
+            num.array(exp_col), num.array("annee_experience_totale")
         )
 
-    if exp_col and "age" in out.columns:
-        adult_years = pd.to_numeric(out["age"], errors="coerce") - 18
-        out["proba_chgt_experience_par_an_adulte"] = safe_divide(out[exp_col], adult_years)
+    if exp_col and adult_years is not None:
+        out["proba_chgt_experience_par_an_adulte"] = _safe_div(num.array(exp_col), adult_years)
 
-    if "annee_experience_totale" in out.columns and "age" in out.columns:
-        adult_years = pd.to_numeric(out["age"], errors="coerce") - 18
-        out["ratio_experience_vie_adulte"] = safe_divide(
-            out["annee_experience_totale"], adult_years
+    if "annee_experience_totale" in cols and adult_years is not None:
+        out["ratio_experience_vie_adulte"] = _safe_div(
+            num.array("annee_experience_totale"), adult_years
         )
 
-    # --- Evolution note
-    if {"note_evaluation_actuelle", "note_evaluation_precedente"}.issubset(out.columns):
-        out["evolution_note"] = pd.to_numeric(
-            out["note_evaluation_actuelle"], errors="coerce"
-        ) - pd.to_numeric(out["note_evaluation_precedente"], errors="coerce")
+    # --- Evolution note (dtype de la soustraction pandas conservé)
+    if {"note_evaluation_actuelle", "note_evaluation_precedente"}.issubset(cols):
+        out["evolution_note"] = num.series("note_evaluation_actuelle") - num.series(
+            "note_evaluation_precedente"
+        )
 
     return out
 
 
+def iter_engineered_features(
+    chunks: Iterable[pd.DataFrame],
+    copy: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Version chunk par chunk (ex: data_io.iter_* + join par chunk). Les colonnes
+    constantes ne sont pas supprimées : un chunk isolé ne permet pas de juger
+    (appliquer drop_constant_columns après concat si besoin).
+    """
+    for chunk in chunks:
+        yield add_engineered_features(chunk, copy=copy, drop_constants=False)
+
+
 def compute_incoherence_metrics(df: pd.DataFrame) -> dict[str, float]:
     """
     Retourne des métriques simples (n et ratio) sur incohérences demandées.
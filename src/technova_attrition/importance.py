@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import get_scorer
+from sklearn.pipeline import Pipeline
+
+from technova_attrition.config import resolve_n_jobs
+from technova_attrition.fast_scorer import compile_block, output_sources
+
+ImportanceSpace = Literal["auto", "transformed", "raw"]
+
+# Importance par permutation : score(X) - score(X avec une variable, ou un groupe, permuté).
+# Quand le préprocessing est colonne par colonne (imputation, log1p, encodages, scaling),
+# permuter une colonne brute revient à permuter les mêmes lignes de ses colonnes
+# transformées : X est transformé une seule fois, seul le modèle est réévalué.
+
+
+@dataclass
+class ImportanceResult:
+    # feature, importance_mean, importance_std, n_repeats, ci_halfwidth, columns
+    importances: pd.DataFrame
+    baseline_score: float
+    space: Literal["transformed", "raw"]
+    n_evaluations: int
+    wall_time_s: float
+
+
+def _transformed_columns(pipeline, columns: list[str]) -> Optional[dict[str, np.ndarray]]:
+    """
+    Colonne brute -> indices de ses colonnes transformées, ou None si permuter dans l'espace
+    transformé n'est pas équivalent (étape non colonne par colonne, remainder conservé...).
+    Colonne ignorée par le préprocessing -> aucun indice.
+    """
+    if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+        return None
+    pre = pipeline.named_steps.get("preprocess")
+    if not isinstance(pre, ColumnTransformer):
+        return None
+
+    blocks = []
+    try:
+        for name, trans, cols in pre.transformers_:
+            if trans == "drop" or len(cols) == 0:
+                continue
+            if name == "remainder":
+                return None
+            steps = trans.steps if isinstance(trans, Pipeline) else [(name, trans)]
+            # mêmes étapes reconnues que fast_scorer : toutes colonne par colonne
+            blocks.append(compile_block(name, steps, list(cols)))
+    except NotImplementedError:
+        return None
+
+    sources = np.asarray(output_sources(blocks), dtype=object)
+    if len(sources) != len(pre.get_feature_names_out()) or not set(sources) <= set(columns):
+        return None
+    return {c: np.flatnonzero(sources == c) for c in columns}
+
+
+def _resolve_groups(
+    columns: list[str], groups: Optional[Mapping[str, Sequence[str]]]
+) -> list[tuple[str, list[str]]]:
+    """Unités permutées : groupes (colonnes présentes uniquement) puis colonnes seules."""
+    units: list[tuple[str, list[str]]] = []
+    seen: set[str] = set()
+    for name, members in (groups or {}).items():
+        members = [c for c in members if c in columns]
+        dup = seen.intersection(members)
+        if dup:
+            raise ValueError(f"Colonnes présentes dans plusieurs groupes: {sorted(dup)}")
+        if members:
+            units.append((name, members))
+            seen.update(members)
+    units += [(c, [c]) for c in columns if c not in seen]
+    return units
+
+
+def _ci_halfwidth(values: list[float], confidence: float) -> float:
+    n = len(values)
+    if n < 2:
+        return float("inf")
+    t = stats.t.ppf((1 + confidence) / 2, n - 1)
+    return float(t * np.std(values, ddof=1) / np.sqrt(n))
+
+
+# --- exécution (en ligne ou dans un process du pool)
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(estimator, data, y, scoring: str, unit_cols, random_state: int) -> None:
+    _WORKER.update(
+        estimator=estimator,
+        data=data,
+        buf=data.copy(),  # copie de travail : colonnes permutées puis restaurées
+        y=y,
+        scorer=get_scorer(scoring),
+        unit_cols=unit_cols,
+        random_state=random_state,
+    )
+
+
+def _permuted_score(task: tuple[int, int]) -> tuple[int, float]:
+    unit, repeat = task
+    data, buf, cols = _WORKER["data"], _WORKER["buf"], _WORKER["unit_cols"][unit]
+    # permutation fixée par (graine, unité, répétition) : résultat indépendant de n_jobs
+    perm = np.random.default_rng([_WORKER["random_state"], unit, repeat]).permutation(len(data))
+
+    if isinstance(data, pd.DataFrame):
+        for j in cols:
+            buf.isetitem(j, data.iloc[:, j].to_numpy()[perm])
+    else:
+        buf[:, cols] = data[np.ix_(perm, cols)]
+    score = _WORKER["scorer"](_WORKER["estimator"], buf, _WORKER["y"])
+
+    if isinstance(data, pd.DataFrame):
+        for j in cols:
+            buf.isetitem(j, data.iloc[:, j].to_numpy())
+    else:
+        buf[:, cols] = data[:, cols]
+    return unit, float(score)
+
+
+def grouped_permutation_importance(
+    pipeline: Pipeline,
+    X: pd.DataFrame,
+    y,
+    scoring: str = "average_precision",
+    groups: Optional[Mapping[str, Sequence[str]]] = None,
+    n_repeats: int = 20,
+    min_repeats: int = 5,
+    batch_repeats: int = 5,
+    confidence: float = 0.95,
+    rtol: float = 0.1,
+    atol: float = 1e-3,
+    space: ImportanceSpace = "auto",
+    n_jobs: int = 1,
+    random_state: int = 42,
+) -> ImportanceResult:
+    """
+    Importance par permutation au niveau des variables brutes ou de groupes de variables
+    (`groups` : nom -> colonnes, permutées ensemble avec la même permutation de lignes).
+
+    - space="auto" : espace transformé si le préprocessing le permet, sinon pipeline complet
+      sur X brut ("raw").
+    - n_repeats est un maximum : après min_repeats, puis tous les batch_repeats, une unité
+      s'arrête quand la demi-largeur de son IC (t de Student, `confidence`) passe sous
+      max(atol, rtol * |importance moyenne|).
+    - répétitions réparties sur un pool de process (n_jobs > 1 ; -1 = tous les cœurs).
+    """
+    t_start = time.perf_counter()
+    columns = [str(c) for c in X.columns]
+    units = _resolve_groups(columns, groups)
+    y = np.asarray(y)
+
+    col_map = None if space == "raw" else _transformed_columns(pipeline, columns)
+    if space == "transformed" and col_map is None:
+        raise ValueError("Préprocessing non colonne par colonne : utiliser space='raw'")
+    if col_map is not None:
+        Xt = pipeline.named_steps["preprocess"].transform(X)
+        data: Any = np.asarray(Xt.toarray() if hasattr(Xt, "toarray") else Xt, dtype=float)
+        estimator = pipeline.named_steps["model"]
+        unit_cols = [np.concatenate([col_map[c] for c in members]) for _, members in units]
+    else:
+        data, estimator = X, pipeline
+        pos = {c: j for j, c in enumerate(columns)}
+        unit_cols = [np.array([pos[c] for c in members]) for _, members in units]
+
+    scores: list[list[float]] = [[] for _ in units]
+    # unité sans colonne transformée (ignorée par le préprocessing) : importance nulle
+    active = [i for i, cols in enumerate(unit_cols) if len(cols)]
+    n_jobs = resolve_n_jobs(n_jobs)
+    initargs = (estimator, data, y, scoring, unit_cols, random_state)
+    pool: Optional[ProcessPoolExecutor] = None
+    if n_jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=initargs)
+    else:
+        _init_worker(*initargs)
+
+    n_evaluations = 0
+    try:
+        baseline = float(get_scorer(scoring)(estimator, data, y))
+        done = 0
+        while active and done < n_repeats:
+            step = min(n_repeats - done, batch_repeats if done else max(min_repeats, 2))
+            tasks = [(i, r) for i in active for r in range(done, done + step)]
+            if pool is None:
+                results = map(_permuted_score, tasks)
+            else:
+                chunk = max(1, len(tasks) // (4 * n_jobs))
+                results = pool.map(_permuted_score, tasks, chunksize=chunk)
+            for i, score in results:
+                scores[i].append(baseline - score)
+            n_evaluations += len(tasks)
+            done += step
+            active = [
+                i
+                for i in active
+                if _ci_halfwidth(scores[i], confidence)
+                > max(atol, rtol * abs(float(np.mean(scores[i]))))
+            ]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        _WORKER.clear()
+
+    rows = []
+    for (name, members), values in zip(units, scores):
+        rows.append(
+            {
+                "feature": name,
+                "importance_mean": float(np.mean(values)) if values else 0.0,
+                "importance_std": float(np.std(values)) if values else 0.0,
+                "n_repeats": len(values),
+                "ci_halfwidth": _ci_halfwidth(values, confidence) if values else 0.0,
+                "columns": members,
+            }
+        )
+    df = (
+        pd.DataFrame(rows)
+        .sort_values("importance_mean", ascending=False, kind="stable")
+        .reset_index(drop=True)
+    )
+    return ImportanceResult(
+        importances=df,
+        baseline_score=baseline,
+        space="raw" if col_map is None else "transformed",
+        n_evaluations=n_evaluations,
+        wall_time_s=time.perf_counter() - t_start,
+    )
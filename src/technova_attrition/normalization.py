@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------------------------
+# Normalisation table-driven, commune au service et à l'entraînement :
+# - service (/predict, /predict_batch, scoring en masse) : normalize_records, payload par payload
+# - entraînement (features.add_engineered_features, cleaning) : *_column, une colonne pandas,
+#   règles appliquées aux seules valeurs distinctes puis re-projetées
+# Mêmes tables (jetons Oui/Non, genre, pourcentages) des deux côtés.
+# ---------------------------------------------------------------------------
+
+YES_SET = {"Y", "OUI", "Oui", "oui", "o", "yes", "y", "true", "1"}
+NO_SET = {"N", "NON", "Non", "non", "n", "no", "false", "0"}
+
+# Oui/Non : comparaison en minuscules
+YES_NO_TOKENS: dict[str, int] = {
+    **{t.lower(): 0 for t in NO_SET},
+    **{t.lower(): 1 for t in YES_SET},
+}
+
+# genre : attendu 0/1 (0=femme, 1=homme) -> on accepte M/F aussi (comparaison en majuscules)
+GENRE_TOKENS: dict[str, int] = {
+    **{t: 1 for t in ("M", "H", "HOMME", "MALE", "1")},
+    **{t: 0 for t in ("F", "FEMME", "FEMALE", "0")},
+}
+
+
+def _token_rule(tokens: dict[str, int], upper: bool) -> Callable[[Any], Any]:
+    """Chaîne -> 0/1 via la table, bool -> int, toute autre valeur inchangée."""
+
+    def rule(v: Any) -> Any:
+        if isinstance(v, str):
+            s = v.strip()
+            return tokens.get(s.upper() if upper else s.lower(), v)
+        if isinstance(v, bool):
+            return int(v)
+        return v
+
+    return rule
+
+
+yes_no_rule = _token_rule(YES_NO_TOKENS, upper=False)
+genre_rule = _token_rule(GENRE_TOKENS, upper=True)
+
+
+def percent_points(v: Any) -> float:
+    """
+    Pourcentage en points : 11, 0.11, "11 %", "11%", "0.11" -> 11.0 (valeur dans ]0, 1[
+    lue comme un ratio). Manquant ou illisible -> NaN.
+    """
+    if isinstance(v, str):
+        try:
+            x = float(v.strip().removesuffix("%"))
+        except ValueError:
+            return math.nan
+    elif isinstance(v, (int, float, np.number)) and not isinstance(v, bool):
+        x = float(v)
+    else:
+        return math.nan
+    return x * 100 if 0 < x < 1 else x
+
+
+def _percent_label(v: Any) -> Any:
+    """
+    augementation_salaire_precedente : STRING type "11 %" (format des extraits)
+    -> on accepte aussi 11, 0.11, "11%" ou "0.11" et on convertit en "11 %".
+    """
+    x = percent_points(v)
+    if math.isnan(x):
+        return v.strip() if isinstance(v, str) else v
+    return f"{int(round(x))} %"
+
+
+FIELD_RULES: dict[str, Callable[[Any], Any]] = {
+    "genre": genre_rule,
+    "heure_supplementaires": yes_no_rule,
+    "augementation_salaire_precedente": _percent_label,
+}
+
+# mémo par champ : chaque valeur brute distincte n'est normalisée qu'une fois
+_MEMO_MAX = 4096
+_MEMO: dict[str, dict[tuple[type, Any], Any]] = {f: {} for f in FIELD_RULES}
+
+
+def normalize_value(field: str, v: Any) -> Any:
+    rule = FIELD_RULES.get(field)
+    if rule is None:
+        return v
+    if isinstance(v, float):  # NaN != NaN, floats peu répétés : pas de mémo
+        return rule(v)
+    memo = _MEMO[field]
+    try:
+        key = (type(v), v)  # type dans la clé : True / 1 / 1.0 restent distincts
+        return memo[key]
+    except KeyError:
+        out = rule(v)
+        if len(memo) < _MEMO_MAX:
+            memo[key] = out
+        return out
+    except TypeError:  # valeur non hashable : pas de mémo
+        return rule(v)
+
+
+def normalize_records(payloads: Iterable[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """
+    Normalise une liste de payloads en une passe par champ à règle (et non une cascade
+    de tests par payload). Le cas 1 payload est la même fonction avec une liste de 1.
+    """
+    out = [dict(p) for p in payloads]
+    for field in FIELD_RULES:
+        for p in out:
+            if field in p:
+                p[field] = normalize_value(field, p[field])
+    return out
+
+
+# --- colonnes d'entraînement : mêmes règles, appliquées aux valeurs distinctes
+
+
+def _uniques(series: pd.Series) -> tuple[np.ndarray, list[Any]]:
+    """(codes, valeurs distinctes en scalaires Python) : NaN/NA gardés comme une valeur."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes, pd.Series(uniques, dtype=object).tolist()
+
+
+def _binary(v: Any) -> Any:
+    # sortie d'une règle à jetons : 0/1 reconnu, tout le reste -> manquant
+    return v if type(v) is int and v in (0, 1) else pd.NA
+
+
+def yes_no_column(series: pd.Series) -> pd.api.extensions.ExtensionArray:
+    """Oui/Non -> Int64 0/1 (valeur non reconnue -> <NA>)."""
+    codes, uniques = _uniques(series)
+    mapped = pd.array([_binary(yes_no_rule(u)) for u in uniques], dtype="Int64")
+    return mapped.take(codes)
+
+
+def genre_column(series: pd.Series) -> pd.api.extensions.ExtensionArray | None:
+    """Genre texte -> Int64 0/1 ; None si une valeur n'est pas un libellé reconnu."""
+    codes, uniques = _uniques(series)
+    mapped = [genre_rule(u) if isinstance(u, str) else None for u in uniques]
+    if not all(type(m) is int for m in mapped):
+        return None
+    return pd.array(mapped, dtype="Int64").take(codes)
+
+
+def percent_ratio_column(series: pd.Series) -> np.ndarray:
+    """Pourcentage (11, 0.11, "11 %"...) -> ratio float64 (0.11) ; illisible -> NaN."""
+    codes, uniques = _uniques(series)
+    return (np.array([percent_points(u) for u in uniques], dtype=float) / 100.0)[codes]
+
+
+def records_to_columns(payloads: list[Dict[str, Any]], columns: list[str]) -> dict[str, np.ndarray]:
+    """
+    Payloads (normalisés) -> une colonne NumPy typée par feature :
+    float64 si aucune chaîne, sinon object ; None/absent -> NaN dans les deux cas, pour que
+    SimpleImputer impute une valeur manquante quel que soit le reste du batch.
+    """
+    cols: dict[str, np.ndarray] = {}
+    for col in columns:
+        values = [p.get(col) for p in payloads]
+        if any(isinstance(v, str) for v in values):
+            arr = np.empty(len(values), dtype=object)
+            arr[:] = [np.nan if v is None else v for v in values]
+        else:
+            arr = np.array(values, dtype=float)
+        cols[col] = arr
+    return cols
+
+
+def records_to_frame(payloads: list[Dict[str, Any]], columns: list[str]) -> pd.DataFrame:
+    """DataFrame aligné sur `columns` (features absentes -> NaN, clés inconnues ignorées)."""
+    return pd.DataFrame(records_to_columns(payloads, columns), columns=columns)
@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import json
+import re
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Literal, Optional
 
 from sqlalchemy import Engine, text
 
+# Postgres limite un statement à 65535 paramètres (6 par ligne ici) -> on découpe
+INSERT_CHUNK_ROWS = 1000
+
+# partitions mensuelles créées par predictions_create_partition (01_schema.sql)
+PARTITION_NAME_RE = re.compile(r"^predictions_y(\d{4})m(\d{2})$")
+
+# rollups : histogramme des probabilités en HIST_BUCKETS intervalles de même largeur
+HIST_BUCKETS = 10
+
 
 def apply_schema(engine: Engine, schema_path: str = "sql/serving/01_schema.sql") -> None:
     sql = Path(schema_path).read_text(encoding="utf-8")
@@ -39,7 +51,7 @@ def fetch_history(engine: Engine, limit: int = 50) -> list[dict[str, Any]]:
                     """
                 SELECT id, created_at, employee_id, proba_depart, prediction, threshold, model_version
                 FROM predictions
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
                 LIMIT :limit
                 """
                 ),
@@ -49,3 +61,171 @@ def fetch_history(engine: Engine, limit: int = 50) -> list[dict[str, Any]]:
             .all()
         )
     return [dict(r) for r in rows]
+
+
+def insert_predictions(db, rows: list[dict[str, Any]]) -> list[int]:
+    """
+    Insère plusieurs prédictions via un INSERT multi-lignes (pas de commit ici :
+    l'appelant garde la main sur la transaction, typiquement un seul commit par batch).
+
+    rows: dicts avec employee_id, input_payload (dict), proba, pred, thr, ver.
+    Retourne les ids générés, dans l'ordre de rows.
+    """
+    ids: list[int] = []
+    for start in range(0, len(rows), INSERT_CHUNK_ROWS):
+        chunk = rows[start : start + INSERT_CHUNK_ROWS]
+        values = []
+        params: dict[str, Any] = {}
+        for i, r in enumerate(chunk):
+            values.append(
+                f"(:employee_id_{i}, CAST(:input_payload_{i} AS JSONB), "
+                f":proba_{i}, :pred_{i}, :thr_{i}, :ver_{i})"
+            )
+            params[f"employee_id_{i}"] = r["employee_id"]
+            params[f"input_payload_{i}"] = json.dumps(r["input_payload"], ensure_ascii=False)
+            params[f"proba_{i}"] = r["proba"]
+            params[f"pred_{i}"] = r["pred"]
+            params[f"thr_{i}"] = r["thr"]
+            params[f"ver_{i}"] = r["ver"]
+
+        stmt = text(
+            "INSERT INTO predictions "
+            "(employee_id, input_payload, proba_depart, prediction, threshold, model_version) "
+            f"VALUES {', '.join(values)} RETURNING id"
+        )
+        # nextval('predictions_id_seq') (défaut de la table partitionnée) : ids attribués
+        # dans l'ordre des VALUES -> tri = ordre d'entrée
+        ids.extend(sorted(int(r[0]) for r in db.execute(stmt, params).fetchall()))
+    return ids
+
+
+# ---------------------------------------------------------------------------
+# Partitions mensuelles de predictions : création anticipée + rétention
+# ---------------------------------------------------------------------------
+
+
+def _add_months(d: date, n: int) -> date:
+    m = d.year * 12 + d.month - 1 + n
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def ensure_prediction_partitions(
+    engine: Engine, months_ahead: int = 3, today: Optional[date] = None
+) -> list[str]:
+    """
+    Crée (si absentes) les partitions du mois courant et des `months_ahead` suivants,
+    pour que les INSERT ne tombent jamais dans la partition par défaut.
+    """
+    start = (today or _utc_today()).replace(day=1)
+    with engine.begin() as conn:
+        return [
+            conn.execute(
+                text("SELECT predictions_create_partition(CAST(:month AS DATE))"),
+                {"month": _add_months(start, k)},
+            ).scalar_one()
+            for k in range(months_ahead + 1)
+        ]
+
+
+def list_prediction_partitions(engine: Engine) -> list[tuple[str, date]]:
+    """(nom, 1er jour du mois) des partitions mensuelles, du plus ancien au plus récent."""
+    with engine.connect() as conn:
+        names = conn.execute(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass('predictions')
+                """
+            )
+        ).scalars()
+        out = []
+        for name in names:
+            m = PARTITION_NAME_RE.match(name)
+            if m:
+                out.append((name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(out, key=lambda x: x[1])
+
+
+def drop_prediction_partitions(
+    engine: Engine, retention_months: int, today: Optional[date] = None
+) -> list[str]:
+    """
+    Rétention : supprime les partitions entièrement antérieures aux `retention_months`
+    derniers mois (mois courant compris). DROP d'une partition = opération de catalogue,
+    sans DELETE ligne à ligne ni VACUUM. Les rollups journaliers sont conservés.
+    """
+    if retention_months < 1:
+        raise ValueError("retention_months doit être >= 1")
+    cutoff = _add_months((today or _utc_today()).replace(day=1), -(retention_months - 1))
+    dropped = [name for name, month in list_prediction_partitions(engine) if month < cutoff]
+    with engine.begin() as conn:
+        for name in dropped:
+            # nom issu du catalogue et validé par PARTITION_NAME_RE
+            conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+    return dropped
+
+
+# ---------------------------------------------------------------------------
+# Rollups journaliers (comptes + histogramme des probabilités par model_version)
+# ---------------------------------------------------------------------------
+
+# jours de [start, end) qui ont encore des lignes brutes (partitions non supprimées)
+_ROLLUP_DELETE = """
+    DELETE FROM {table}
+    WHERE day IN (
+      SELECT DISTINCT CAST(created_at AT TIME ZONE 'UTC' AS DATE)
+      FROM predictions
+      WHERE created_at >= :start AND created_at < :end
+    )
+"""
+
+_ROLLUP_COUNTS = text("""
+    INSERT INTO predictions_daily_counts
+      (day, model_version, n_predictions, n_positive, proba_sum, proba_min, proba_max)
+    SELECT CAST(created_at AT TIME ZONE 'UTC' AS DATE), model_version,
+           COUNT(*), COUNT(*) FILTER (WHERE prediction = 1),
+           SUM(proba_depart), MIN(proba_depart), MAX(proba_depart)
+    FROM predictions
+    WHERE created_at >= :start AND created_at < :end
+    GROUP BY 1, 2
+""")
+
+_ROLLUP_HISTOGRAM = text("""
+    INSERT INTO predictions_daily_histogram (day, model_version, bucket, n)
+    SELECT CAST(created_at AT TIME ZONE 'UTC' AS DATE), model_version,
+           LEAST(width_bucket(proba_depart, 0.0, 1.0, :buckets), :buckets) - 1, COUNT(*)
+    FROM predictions
+    WHERE created_at >= :start AND created_at < :end
+    GROUP BY 1, 2, 3
+""")
+
+
+def refresh_prediction_rollups(
+    engine: Engine, since: Optional[date] = None, until: Optional[date] = None
+) -> dict[str, int]:
+    """
+    Recalcule les rollups des jours UTC [since, until] (défaut : hier et aujourd'hui).
+    Les bornes sur created_at limitent le scan aux partitions concernées ; les jours
+    sont remplacés (DELETE + INSERT) dans une seule transaction. Seuls les jours qui ont
+    encore des lignes brutes sont remplacés : les rollups des partitions supprimées par
+    la rétention sont conservés.
+    """
+    until = until or _utc_today()
+    since = since or until - timedelta(days=1)
+    params = {
+        "start": datetime(since.year, since.month, since.day, tzinfo=timezone.utc),
+        "end": datetime(until.year, until.month, until.day, tzinfo=timezone.utc)
+        + timedelta(days=1),
+    }
+    with engine.begin() as conn:
+        for table in ("predictions_daily_counts", "predictions_daily_histogram"):
+            conn.execute(text(_ROLLUP_DELETE.format(table=table)), params)
+        n_counts = conn.execute(_ROLLUP_COUNTS, params).rowcount
+        n_hist = conn.execute(_ROLLUP_HISTOGRAM, {**params, "buckets": HIST_BUCKETS}).rowcount
+    return {"days": (until - since).days + 1, "count_rows": n_counts, "histogram_rows": n_hist}
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import average_precision_score
+from sklearn.pipeline import Pipeline
+
+from technova_attrition.preprocessing import (
+    FeatureGroups,
+    _log1p_safe,
+    build_preprocessor,
+    make_feature_groups,
+)
+
+logger = logging.getLogger(__name__)
+
+# Entraînement hors mémoire : le parquet (un fichier ou un répertoire de fichiers, ex: un
+# par filiale) est lu row group par row group, jamais en entier.
+#   passe 1 : statistiques du préprocessing (médianes par sketch de quantiles, moyennes /
+#             variances, vocabulaires des catégorielles) ;
+#   passe 2 : SGDClassifier(loss="log_loss").partial_fit sur les lots transformés.
+# Le résultat est un Pipeline sklearn standard (preprocess + model), compatible avec
+# service.load_pipeline, fast_scorer.compile_pipeline et expected_features.json.
+
+
+class QuantileSketch:
+    """
+    Sketch de quantiles à mémoire bornée (compacteurs empilés, type MRL/KLL) : chaque
+    niveau garde au plus k valeurs ; au-delà, il est trié et une valeur sur deux (décalage
+    aléatoire) monte au niveau suivant avec un poids double. Tant qu'aucune compaction
+    n'a eu lieu, le résultat est exact (np.quantile, comme SimpleImputer).
+    """
+
+    def __init__(self, k: int = 4096, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def update(self, values: np.ndarray) -> None:
+        v = np.asarray(values, dtype=float)
+        v = v[~np.isnan(v)]
+        if v.size == 0:
+            return
+        self.n += v.size
+        self.levels[0] = np.concatenate([self.levels[0], v])
+        h = 0
+        while h < len(self.levels):
+            buf = self.levels[h]
+            if buf.size > self.k:
+                buf = np.sort(buf)
+                # nombre impair : la dernière valeur reste à ce niveau
+                keep, buf = (buf[-1:], buf[:-1]) if buf.size % 2 else (buf[:0], buf)
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                offset = int(self._rng.integers(2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], buf[offset::2]])
+                self.levels[h] = keep
+            h += 1
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(lvl.size, 2.0**h) for h, lvl in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cum = np.cumsum(weights[order])
+        i = int(np.searchsorted(cum, q * cum[-1]))
+        return float(values[order][min(i, len(order) - 1)])
+
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+
+@dataclass
+class RunningMoments:
+    """Moyenne / variance (population, ddof=0 comme StandardScaler), fusion de Chan."""
+
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        v = np.asarray(values, dtype=float)
+        v = v[~np.isnan(v)]
+        if v.size:
+            self.merge(v.size, float(v.mean()), float(((v - v.mean()) ** 2).sum()))
+
+    def merge(self, n: int, mean: float, m2: float) -> None:
+        total = self.n + n
+        if total == 0:
+            return
+        delta = mean - self.mean
+        self.m2 += m2 + delta**2 * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+
+    @property
+    def var(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+
+
+@dataclass
+class ColumnStats:
+    kind: str  # "num" | "log" | "count"
+    n_null: int = 0
+    sketch: Optional[QuantileSketch] = None
+    moments: RunningMoments = field(default_factory=RunningMoments)
+    counts: Counter = field(default_factory=Counter)
+
+    def update(self, s: pd.Series) -> None:
+        self.n_null += int(s.isna().sum())
+        if self.kind == "count":
+            for value, n in s.value_counts(dropna=True).items():
+                self.counts[_py(value)] += int(n)
+            return
+        x = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        self.sketch.update(x)
+        self.moments.update(_log1p_safe(x.reshape(-1, 1)).ravel() if self.kind == "log" else x)
+
+    def mode(self) -> Any:
+        # SimpleImputer(most_frequent) : à égalité, la plus petite valeur
+        top = max(self.counts.values())
+        return min(v for v, n in self.counts.items() if n == top)
+
+
+def _py(v: Any) -> Any:
+    return v.item() if isinstance(v, np.generic) else v
+
+
+@dataclass
+class StreamStats:
+    """Résultat de la passe 1 : une entrée par colonne utilisée + comptes de la cible."""
+
+    groups: FeatureGroups
+    feature_names: list[str]
+    columns: dict[str, ColumnStats]
+    class_counts: Counter
+    n_rows: int = 0
+    n_test: int = 0
+
+
+def parquet_files(path: Path) -> list[Path]:
+    path = Path(path)
+    files = sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+    if not files:
+        raise FileNotFoundError(f"Aucun fichier parquet: {path}")
+    return files
+
+
+def iter_row_groups(
+    files: list[Path], target: str, test_size: float, seed: int
+) -> Iterator[tuple[tuple[int, int], pd.DataFrame, pd.Series, np.ndarray]]:
+    """
+    (id du lot, X, y, masque test) par row group. Le masque de holdout est tiré d'un
+    générateur initialisé par (seed, fichier, row group) : identique à chaque passe.
+    """
+    for fi, path in enumerate(files):
+        pf = pq.ParquetFile(path)
+        for rg in range(pf.num_row_groups):
+            df = pf.read_row_group(rg).to_pandas()
+            is_test = np.random.default_rng([seed, fi, rg]).random(len(df)) < test_size
+            yield (fi, rg), df.drop(columns=[target]), df[target].astype(int), is_test
+
+
+def _schema_frame(files: list[Path]) -> pd.DataFrame:
+    """DataFrame vide avec les colonnes du parquet (make_feature_groups ne lit que les noms)."""
+    return pq.read_schema(files[0]).empty_table().to_pandas()
+
+
+def fit_stream_stats(
+    files: list[Path],
+    target: str,
+    test_size: float = 0.10,
+    seed: int = 42,
+    sketch_k: int = 4096,
+) -> StreamStats:
+    """Passe 1 : statistiques du préprocessing sur les lignes de train, lot par lot."""
+    schema = _schema_frame(files)
+    groups = make_feature_groups(schema, target=target)
+    kinds = {c: "num" for c in groups.num_cont + groups.num_disc}
+    kinds.update({c: "log" for c in groups.num_log})
+    kinds.update({c: "count" for c in groups.bin_cols + groups.cat_nom + groups.cat_ord})
+    columns = {
+        c: ColumnStats(kind, sketch=QuantileSketch(sketch_k, seed) if kind != "count" else None)
+        for c, kind in kinds.items()
+    }
+
+    stats = StreamStats(
+        groups=groups,
+        feature_names=[c for c in schema.columns if c != target],
+        columns=columns,
+        class_counts=Counter(),
+    )
+    for _, X, y, is_test in iter_row_groups(files, target, test_size, seed):
+        stats.n_rows += len(y)
+        stats.n_test += int(is_test.sum())
+        X, y = X[~is_test], y[~is_test]
+        stats.class_counts.update(y.value_counts().to_dict())
+        for c, col in columns.items():
+            col.update(X[c])
+
+    # ordres ordinaux : tri des valeurs vues (comme make_feature_groups sur le DataFrame)
+    stats.groups = replace(
+        groups, ord_categories=[sorted(columns[c].counts) for c in groups.cat_ord]
+    )
+    return stats
+
+
+def _scaler_stats(col: ColumnStats, fill: float, encode=None) -> tuple[float, float]:
+    """
+    Moyenne / variance de la colonne telle que vue par le StandardScaler : valeurs
+    observées + valeurs manquantes imputées (constante `fill`), après transformation.
+    """
+    if col.kind == "count":
+        m = RunningMoments()
+        for value, n in col.counts.items():
+            m.merge(n, float(encode(value) if encode else value), 0.0)
+    else:
+        m = RunningMoments(col.moments.n, col.moments.mean, col.moments.m2)
+    t_fill = float(encode(fill) if encode else fill)
+    if col.kind == "log":
+        t_fill = float(_log1p_safe([[fill]])[0, 0])
+    m.merge(col.n_null, t_fill, 0.0)
+    return m.mean, m.var
+
+
+def _skeleton(stats: StreamStats, first_batch: pd.DataFrame) -> pd.DataFrame:
+    """
+    Petit DataFrame qui contient chaque modalité : le fit du ColumnTransformer dessus
+    pose toute la structure (colonnes, encodeurs, noms de sortie) ; les statistiques
+    sont ensuite remplacées par celles du flux.
+    """
+    size = max([2] + [len(c.counts) for c in stats.columns.values()])
+    skel = first_batch.iloc[np.resize(np.arange(len(first_batch)), size)].reset_index(drop=True)
+    for name, col in stats.columns.items():
+        if col.kind == "count":
+            values = sorted(col.counts)
+            skel[name] = pd.Series(np.resize(np.array(values, dtype=object), size)).infer_objects()
+        else:
+            skel[name] = np.resize([0.0, 1.0], size)
+    return skel
+
+
+def build_stream_preprocessor(stats: StreamStats, first_batch: pd.DataFrame) -> ColumnTransformer:
+    """ColumnTransformer de build_preprocessor(groups), ajusté avec les statistiques du flux."""
+    pre = build_preprocessor(stats.groups)
+    pre.fit(_skeleton(stats, first_batch))
+
+    for _, trans, cols in pre.transformers_:
+        if not isinstance(trans, Pipeline) or len(cols) == 0:
+            continue
+        steps = trans.named_steps
+        col_stats = [stats.columns[c] for c in cols]
+        fills = [c.mode() if c.kind == "count" else c.sketch.median() for c in col_stats]
+        imputer = steps["imputer"]
+        imputer.statistics_ = np.array(fills, dtype=imputer.statistics_.dtype)
+
+        if "scaler" not in steps:
+            continue  # one-hot : catégories déjà posées par le squelette
+        encoders = [None] * len(cols)
+        if "ord" in steps:
+            encoders = [{v: i for i, v in enumerate(cats)}.get for cats in steps["ord"].categories_]
+        moments = [_scaler_stats(c, f, e) for c, f, e in zip(col_stats, fills, encoders)]
+        scaler = steps["scaler"]
+        scaler.mean_ = np.array([m for m, _ in moments])
+        scaler.var_ = np.array([v for _, v in moments])
+        scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+        scaler.n_samples_seen_ = sum(stats.class_counts.values())  # lignes de train
+    return pre
+
+
+@dataclass
+class StreamTrainResult:
+    pipeline: Pipeline
+    stats: StreamStats
+    metrics: dict[str, Any]
+    background: pd.DataFrame  # échantillon du train (fond de fast_explainer)
+
+
+def train_streaming(
+    path: Path,
+    target: str,
+    C: float = 0.1,
+    epochs: int = 5,
+    test_size: float = 0.10,
+    seed: int = 42,
+    sketch_k: int = 4096,
+    eval_sample_rows: int = 1_000_000,
+    background_rows: int = 10_000,
+    verbose: bool = True,
+) -> StreamTrainResult:
+    """
+    Passe 1 (statistiques), puis `epochs` passes de partial_fit, puis une passe
+    d'évaluation (AP sur le holdout, et sur un échantillon du train).
+
+    Régularisation alignée sur LogisticRegression(C) : alpha = 1 / (C * n_train).
+    Poids de classes "balanced" calculés sur les comptes de la passe 1 (partial_fit
+    n'accepte pas class_weight="balanced").
+    """
+    files = parquet_files(path)
+    stats = fit_stream_stats(files, target, test_size, seed, sketch_k)
+    n_train = sum(stats.class_counts.values())
+    first = next(iter_row_groups(files, target, test_size, seed))[1]
+    pre = build_stream_preprocessor(stats, first)
+
+    classes = np.array(sorted(stats.class_counts))
+    class_weight = {int(c): n_train / (len(classes) * stats.class_counts[c]) for c in classes}
+    model = SGDClassifier(
+        loss="log_loss",
+        penalty="l2",
+        alpha=1.0 / (C * n_train),
+        class_weight=class_weight,
+        random_state=seed,
+    )
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        for _, X, y, is_test in iter_row_groups(files, target, test_size, seed):
+            keep = np.flatnonzero(~is_test)
+            if keep.size == 0:
+                continue
+            keep = rng.permutation(keep)  # lignes mélangées dans le lot
+            Xt = pre.transform(X.iloc[keep])
+            model.partial_fit(Xt, y.to_numpy()[keep], classes=classes)
+        if verbose:
+            logger.info("epoch %s/%s terminée", epoch + 1, epochs)
+
+    pipeline = Pipeline([("preprocess", pre), ("model", model)])
+    metrics, background = evaluate_streaming(
+        pipeline, files, target, test_size, seed, n_train, eval_sample_rows, background_rows
+    )
+    metrics.update({"n_rows": stats.n_rows, "n_train": n_train, "n_test": stats.n_test})
+    return StreamTrainResult(pipeline=pipeline, stats=stats, metrics=metrics, background=background)
+
+
+def evaluate_streaming(
+    pipeline: Pipeline,
+    files: list[Path],
+    target: str,
+    test_size: float,
+    seed: int,
+    n_train: int,
+    eval_sample_rows: int,
+    background_rows: int = 10_000,
+) -> tuple[dict[str, Any], pd.DataFrame]:
+    """
+    AP holdout (toutes les lignes de test) et train (échantillon uniforme borné) ; les
+    premières lignes de l'échantillon train (au plus background_rows) servent de fond.
+    """
+    rate = min(1.0, eval_sample_rows / max(n_train, 1))
+    rng = np.random.default_rng([seed, 1])
+    scores: dict[str, list] = {"train": [], "test": []}
+    background: list[pd.DataFrame] = []
+    kept = 0
+    for _, X, y, is_test in iter_row_groups(files, target, test_size, seed):
+        sampled = ~is_test & (rng.random(len(y)) < rate)
+        for split, mask in (("test", is_test), ("train", sampled)):
+            if mask.any():
+                p = pipeline.predict_proba(X[mask])[:, 1]
+                scores[split].append((y.to_numpy()[mask], p))
+        if kept < background_rows and sampled.any():
+            background.append(X[sampled].head(background_rows - kept))
+            kept += len(background[-1])
+    out: dict[str, Any] = {}
+    for split, parts in scores.items():
+        if parts:
+            y_true = np.concatenate([a for a, _ in parts])
+            p_hat = np.concatenate([b for _, b in parts])
+            out[f"{split}_ap"] = float(average_precision_score(y_true, p_hat))
+        else:
+            out[f"{split}_ap"] = None
+    return out, pd.concat(background, ignore_index=True) if background else pd.DataFrame()
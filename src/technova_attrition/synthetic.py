@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# Modalités observées dans les extraits (cf. models/pipeline_compiled.json)
+STATUT_MARITAL = ["Célibataire", "Divorcé(e)", "Marié(e)"]
+DEPARTEMENT = ["Commercial", "Consulting", "Ressources Humaines"]
+POSTE = [
+    "Assistant de Direction",
+    "Cadre Commercial",
+    "Consultant",
+    "Directeur Technique",
+    "Manager",
+    "Représentant Commercial",
+    "Ressources Humaines",
+    "Senior Manager",
+    "Tech Lead",
+]
+DOMAINE_ETUDE = [
+    "Autre",
+    "Entrepreunariat",
+    "Infra & Cloud",
+    "Marketing",
+    "Ressources Humaines",
+    "Transformation Digitale",
+]
+FREQUENCE_DEPLACEMENT = ["Aucun", "Frequent", "Occasionnel"]
+
+
+def make_raw_sources(
+    n: int, seed: int = 42, start_id: int = 1
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Extraits SIRH / évaluations / sondage synthétiques, au format brut des CSV
+    (chaînes "Oui"/"Non", "E_<id>", "11 %", genre "F"/"M"), clés alignées sur id_employee.
+    Sert aux benchmarks et tests de volumétrie : aucune donnée réelle.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(start_id, start_id + n, dtype=np.int64)
+
+    age = rng.integers(18, 61, n)
+    exp_tot = np.minimum(rng.integers(0, 41, n), age - 18)
+    tenure = np.minimum(rng.integers(0, 41, n), exp_tot)
+    in_role = np.minimum(rng.integers(0, 19, n), tenure)
+
+    sirh = pd.DataFrame(
+        {
+            "id_employee": ids,
+            "age": age,
+            "genre": rng.choice(["F", "M"], n),
+            "revenu_mensuel": rng.integers(1000, 20000, n),
+            "statut_marital": rng.choice(STATUT_MARITAL, n),
+            "departement": rng.choice(DEPARTEMENT, n),
+            "poste": rng.choice(POSTE, n),
+            "nombre_experiences_precedentes": rng.integers(0, 10, n),
+            "nombre_heures_travailless": np.full(n, 80),
+            "annee_experience_totale": exp_tot,
+            "annees_dans_l_entreprise": tenure,
+            "annees_dans_le_poste_actuel": in_role,
+        }
+    )
+
+    note_prec = rng.integers(1, 5, n)
+    eval_df = pd.DataFrame(
+        {
+            "satisfaction_employee_environnement": rng.integers(1, 5, n),
+            "note_evaluation_precedente": note_prec,
+            "niveau_hierarchique_poste": rng.integers(1, 6, n),
+            "satisfaction_employee_nature_travail": rng.integers(1, 5, n),
+            "satisfaction_employee_equipe": rng.integers(1, 5, n),
+            "satisfaction_employee_equilibre_pro_perso": rng.integers(1, 5, n),
+            "eval_number": pd.Series(ids).map("E_{}".format),
+            "note_evaluation_actuelle": rng.integers(3, 5, n),
+            "heure_supplementaires": rng.choice(["Oui", "Non"], n, p=[0.3, 0.7]),
+            "augementation_salaire_precedente": pd.Series(rng.integers(11, 26, n)).map(
+                "{} %".format
+            ),
+        }
+    )
+
+    sondage = pd.DataFrame(
+        {
+            "a_quitte_l_entreprise": rng.choice(["Oui", "Non"], n, p=[0.16, 0.84]),
+            "nombre_participation_pee": rng.integers(0, 4, n),
+            "nb_formations_suivies": rng.integers(0, 7, n),
+            "nombre_employee_sous_responsabilite": np.ones(n, dtype=np.int64),
+            "code_sondage": ids,
+            "distance_domicile_travail": rng.integers(1, 30, n),
+            "niveau_education": rng.integers(1, 6, n),
+            "domaine_etude": rng.choice(DOMAINE_ETUDE, n),
+            "ayant_enfants": np.full(n, "Y"),
+            "frequence_deplacement": rng.choice(FREQUENCE_DEPLACEMENT, n),
+            "annees_depuis_la_derniere_promotion": np.minimum(rng.integers(0, 16, n), tenure),
+            "annes_sous_responsable_actuel": np.minimum(rng.integers(0, 18, n), tenure),
+        }
+    )
+    return sirh, eval_df, sondage
+
+
+def make_joined(n: int, seed: int = 42) -> pd.DataFrame:
+    """Équivalent synthétique de data_io.join_sources(load_sirh, load_eval, load_sondage)."""
+    sirh, eval_df, sondage = make_raw_sources(n, seed)
+    eval_df["eval_number_int"] = sirh["id_employee"].to_numpy()
+    # même ordre de colonnes que la jointure réelle (sirh, eval + clé, sondage)
+    return pd.concat([sirh, eval_df, sondage], axis=1)
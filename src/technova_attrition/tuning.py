@@ -1,7 +1,30 @@
 from __future__ import annotations
 
+import math
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal, Optional
+
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import GridSearchCV
+from joblib import Memory
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import (
+    GridSearchCV,
+    ParameterGrid,
+    ParameterSampler,
+    StratifiedShuffleSplit,
+)
+from sklearn.pipeline import Pipeline
+
+from technova_attrition.config import resolve_n_jobs
+
+SearchStrategy = Literal["grid", "random", "halving", "halving_random"]
 
 
 def run_grid_search(
@@ -27,15 +50,445 @@ def run_grid_search(
     return gs
 
 
-def summarize_grid_search(gs: GridSearchCV) -> pd.DataFrame:
+def _n_splits(cv_results: dict) -> int:
+    return sum(1 for k in cv_results if k.startswith("split") and k.endswith("_test_score"))
+
+
+def summarize_grid_search(gs) -> pd.DataFrame:
+    """
+    Tableau des candidats trié par rang. Accepte un GridSearchCV (ou Halving*/Randomized*)
+    comme un SearchResult. wall_time_s = temps cumulé (fit + score, tous folds) du candidat.
+    """
     df = pd.DataFrame(gs.cv_results_).copy()
+    if "wall_time_s" not in df.columns:
+        df["wall_time_s"] = _n_splits(gs.cv_results_) * (
+            df["mean_fit_time"] + df["mean_score_time"]
+        )
     cols = [
         "rank_test_score",
         "mean_test_score",
         "std_test_score",
         "mean_train_score",
         "std_train_score",
+        "wall_time_s",
         "params",
     ]
-    df = df[cols].sort_values("rank_test_score")
+    extra = [c for c in ("iter", "n_resources") if c in df.columns]
+    df = df[cols[:-1] + extra + cols[-1:]].sort_values("rank_test_score")
     return df
+
+
+# --- recherche avec préprocessing mis en cache par fold
+#
+# Le ColumnTransformer ne dépend que des paramètres `preprocess__*` : il est ajusté une
+# fois par (fold, jeu de paramètres de préprocessing) puis tous les candidats qui ne
+# diffèrent que par `model__*` sont entraînés sur les matrices transformées. Une tâche du
+# pool = un fold x un jeu de préprocessing x tous ses candidats.
+
+
+@dataclass
+class SearchResult:
+    """Résultat de run_search : mêmes clés cv_results_ que GridSearchCV (+ wall_time_s)."""
+
+    cv_results_: dict[str, Any]
+    best_index_: int
+    best_params_: dict[str, Any]
+    best_score_: float
+    n_splits_: int
+    strategy: str
+    wall_time_s: float
+    preprocess_fits: int
+    budget_exhausted: bool = False
+    best_estimator_: Optional[Pipeline] = None
+    rounds: list[dict[str, Any]] = field(default_factory=list)
+
+
+# état des workers (posé par l'initializer : X n'est sérialisé qu'une fois par process)
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(pipeline: Pipeline, X, y, scoring: str, memory: Optional[str]) -> None:
+    _WORKER.update(
+        pre=Pipeline(pipeline.steps[:-1]),
+        model=pipeline.steps[-1][1],
+        X=X,
+        y=y,
+        scorer=get_scorer(scoring),
+        fit_transform=_fold_fit_transform
+        if memory is None
+        else Memory(memory, verbose=0).cache(_fold_fit_transform),
+    )
+
+
+def _fold_fit_transform(pre: Pipeline, X_train, y_train, X_val) -> tuple[Any, Any]:
+    pre = clone(pre)
+    return pre.fit_transform(X_train, y_train), pre.transform(X_val)
+
+
+def _warm_start_chains(
+    model, candidates: list[tuple[int, dict[str, Any]]], warm_start: bool
+) -> list[list[tuple[int, dict[str, Any]]]]:
+    """
+    Regroupe les candidats qui ne diffèrent que par C (LogisticRegression) : chaque
+    chaîne est parcourue par C croissant, le fit repartant des coefficients précédents.
+    liblinear ne sait pas repartir d'une solution : un candidat = une chaîne.
+    """
+    if not (warm_start and isinstance(model, LogisticRegression) and model.solver != "liblinear"):
+        return [[c] for c in candidates]
+    chains: dict[str, list[tuple[int, dict[str, Any]]]] = defaultdict(list)
+    for idx, params in candidates:
+        key = repr(sorted((k, v) for k, v in params.items() if k != "C"))
+        chains[key].append((idx, params))
+    return [sorted(chain, key=lambda c: c[1].get("C", model.C)) for chain in chains.values()]
+
+
+def _run_fold_task(task: dict[str, Any]) -> dict[str, Any]:
+    X, y, scorer = _WORKER["X"], _WORKER["y"], _WORKER["scorer"]
+    train, val = task["train"], task["val"]
+
+    t0 = time.perf_counter()
+    pre = clone(_WORKER["pre"]).set_params(**task["pre_params"])
+    Xt_train, Xt_val = _WORKER["fit_transform"](pre, X.iloc[train], y[train], X.iloc[val])
+    pre_time = time.perf_counter() - t0
+
+    rows = []
+    base = _WORKER["model"]
+    for chain in _warm_start_chains(base, task["candidates"], task["warm_start"]):
+        est = None
+        for idx, params in chain:
+            if est is None:
+                est = clone(base).set_params(**params)
+                if len(chain) > 1:
+                    est.set_params(warm_start=True)
+            else:
+                est.set_params(**params)
+            t0 = time.perf_counter()
+            est.fit(Xt_train, y[train])
+            fit_time = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            test_score = scorer(est, Xt_val, y[val])
+            train_score = scorer(est, Xt_train, y[train])
+            rows.append(
+                {
+                    "candidate": idx,
+                    "test_score": float(test_score),
+                    "train_score": float(train_score),
+                    "fit_time": fit_time,
+                    "score_time": time.perf_counter() - t0,
+                }
+            )
+    return {"fold": task["fold"], "pre_time": pre_time, "rows": rows}
+
+
+def _split_params(params: dict[str, Any], model_step: str) -> tuple[dict, dict]:
+    prefix = f"{model_step}__"
+    model_params = {k[len(prefix) :]: v for k, v in params.items() if k.startswith(prefix)}
+    pre_params = {k: v for k, v in params.items() if not k.startswith(prefix)}
+    return pre_params, model_params
+
+
+def _make_tasks(
+    candidates: list[dict[str, Any]],
+    folds: list[tuple[np.ndarray, np.ndarray]],
+    model_step: str,
+    warm_start: bool,
+) -> list[dict[str, Any]]:
+    by_pre: dict[str, tuple[dict, list]] = {}
+    for idx, params in enumerate(candidates):
+        pre_params, model_params = _split_params(params, model_step)
+        key = repr(sorted(pre_params.items()))
+        by_pre.setdefault(key, (pre_params, []))[1].append((idx, model_params))
+    return [
+        {
+            "fold": f,
+            "train": train,
+            "val": val,
+            "pre_params": pre_params,
+            "candidates": cands,
+            "warm_start": warm_start,
+        }
+        for pre_params, cands in by_pre.values()
+        for f, (train, val) in enumerate(folds)
+    ]
+
+
+class _Executor:
+    """Pool de process (ou exécution en ligne si n_jobs=1) + budget de temps global."""
+
+    def __init__(self, n_jobs: int, initargs: tuple, deadline: Optional[float]):
+        self.deadline = deadline
+        self.exhausted = False
+        self.n_jobs = n_jobs
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if n_jobs > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_worker, initargs=initargs
+            )
+        else:
+            _init_worker(*initargs)
+
+    def _over_budget(self) -> bool:
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+    def run(self, tasks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Exécute les tâches ; budget dépassé -> plus de nouvelle tâche soumise."""
+        out: list[dict[str, Any]] = []
+        if self.pool is None:
+            for task in tasks:
+                if self._over_budget():
+                    break
+                out.append(_run_fold_task(task))
+            return out
+
+        pending = list(reversed(tasks))
+        running: set[Future] = set()
+        while pending or running:
+            while pending and len(running) < self.n_jobs and not self._over_budget():
+                running.add(self.pool.submit(_run_fold_task, pending.pop()))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            out.extend(f.result() for f in done)
+        return out
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def _aggregate(
+    candidates: list[dict[str, Any]], results: list[dict[str, Any]], n_splits: int
+) -> dict[str, np.ndarray]:
+    """
+    Scores par candidat et par fold. Le temps de préprocessing d'une tâche est réparti
+    entre ses candidats dans wall_time_s. Fold manquant (budget) -> score NaN.
+    """
+    n = len(candidates)
+    keys = ("test_score", "train_score", "fit_time", "score_time")
+    arr = {k: np.full((n, n_splits), np.nan) for k in keys}
+    wall = np.zeros(n)
+    for res in results:
+        share = res["pre_time"] / max(len(res["rows"]), 1)
+        for row in res["rows"]:
+            for k in keys:
+                arr[k][row["candidate"], res["fold"]] = row[k]
+            wall[row["candidate"]] += row["fit_time"] + row["score_time"] + share
+    arr["wall_time_s"] = wall
+    return arr
+
+
+def _rank(scores: np.ndarray) -> np.ndarray:
+    # comme sklearn : rang "min", NaN classés derniers
+    return (
+        pd.Series(scores)
+        .rank(method="min", ascending=False, na_option="bottom")
+        .astype(int)
+        .to_numpy()
+    )
+
+
+def _cv_results(
+    candidates: list[dict[str, Any]],
+    arr: dict[str, np.ndarray],
+    n_splits: int,
+    iters: Optional[np.ndarray] = None,
+    n_resources: Optional[np.ndarray] = None,
+) -> dict[str, Any]:
+    mean_test = np.mean(arr["test_score"], axis=1)  # NaN si un fold manque
+    out: dict[str, Any] = {
+        "params": candidates,
+        "mean_fit_time": np.nanmean(arr["fit_time"], axis=1),
+        "std_fit_time": np.nanstd(arr["fit_time"], axis=1),
+        "mean_score_time": np.nanmean(arr["score_time"], axis=1),
+        "std_score_time": np.nanstd(arr["score_time"], axis=1),
+        "wall_time_s": arr["wall_time_s"],
+    }
+    for k in ("test", "train"):
+        scores = arr[f"{k}_score"]
+        for f in range(n_splits):
+            out[f"split{f}_{k}_score"] = scores[:, f]
+        out[f"mean_{k}_score"] = np.mean(scores, axis=1)
+        out[f"std_{k}_score"] = np.std(scores, axis=1)
+    if iters is None:
+        out["rank_test_score"] = _rank(mean_test)
+    else:
+        # comme HalvingGridSearchCV : d'abord le dernier tour atteint, puis le score
+        order = pd.DataFrame({"iter": iters, "score": mean_test}).fillna({"score": -np.inf})
+        order = order.sort_values(["iter", "score"], ascending=False, kind="stable")
+        ranks = np.empty(len(order), dtype=int)
+        ranks[order.index.to_numpy()] = np.arange(1, len(order) + 1)
+        out["rank_test_score"] = ranks
+        out["iter"] = iters
+        out["n_resources"] = n_resources
+    return out
+
+
+def _sample_candidates(
+    param_grid, strategy: str, n_iter: int, random_state: Optional[int]
+) -> list[dict[str, Any]]:
+    if strategy in ("random", "halving_random"):
+        return list(ParameterSampler(param_grid, n_iter=n_iter, random_state=random_state))
+    return list(ParameterGrid(param_grid))
+
+
+def run_search(
+    pipeline: Pipeline,
+    param_grid,
+    X_train: pd.DataFrame,
+    y_train,
+    cv,
+    scoring: str = "average_precision",
+    strategy: SearchStrategy = "grid",
+    n_iter: int = 20,
+    factor: int = 3,
+    min_resources: Optional[int] = None,
+    n_jobs: int = -1,
+    budget_s: Optional[float] = None,
+    memory: Optional[str | Path] = None,
+    warm_start: bool = True,
+    random_state: Optional[int] = 42,
+    refit: bool = True,
+    verbose: int = 1,
+) -> SearchResult:
+    """
+    Recherche d'hyperparamètres sur un Pipeline (préprocessing..., modèle) sans refit
+    du préprocessing par candidat.
+
+    - strategy : "grid" (exhaustive), "random" (n_iter tirages de ParameterSampler),
+      "halving" / "halving_random" (successive halving : chaque tour garde 1/factor des
+      candidats et multiplie par factor le nombre de lignes, jusqu'au train complet).
+    - warm_start : LogisticRegression entraînée le long du chemin des C (même fold,
+      mêmes autres paramètres), chaque fit partant de la solution précédente.
+    - memory : répertoire joblib.Memory ; le préprocessing ajusté par fold est réutilisé
+      d'une exécution à l'autre (et entre workers).
+    - n_jobs : process du pool (-1 : tous les CPU, 1 : en ligne) ; budget_s : temps max
+      (s) ; au-delà plus aucune tâche n'est lancée, les candidats incomplets ont un
+      score NaN (rang dernier) et budget_exhausted=True.
+    """
+    t_start = time.perf_counter()
+    y = np.asarray(y_train)
+    model_step = pipeline.steps[-1][0]
+    candidates = _sample_candidates(param_grid, strategy, n_iter, random_state)
+    deadline = t_start + budget_s if budget_s is not None else None
+    memory = str(memory) if memory is not None else None
+    executor = _Executor(resolve_n_jobs(n_jobs), (pipeline, X_train, y, scoring, memory), deadline)
+
+    try:
+        if strategy in ("grid", "random"):
+            folds = list(cv.split(X_train, y))
+            tasks = _make_tasks(candidates, folds, model_step, warm_start)
+            results = executor.run(tasks)
+            arr = _aggregate(candidates, results, len(folds))
+            cv_results = _cv_results(candidates, arr, len(folds))
+            rounds = [{"iter": 0, "n_candidates": len(candidates), "n_resources": len(y)}]
+            preprocess_fits = len(results)
+        else:
+            cv_results, rounds, preprocess_fits = _successive_halving(
+                executor,
+                candidates,
+                X_train,
+                y,
+                cv,
+                model_step,
+                warm_start,
+                factor,
+                min_resources,
+                random_state,
+            )
+    finally:
+        executor.close()
+
+    best_index = int(np.argmin(cv_results["rank_test_score"]))
+    best_score = float(cv_results["mean_test_score"][best_index])
+    best_params = cv_results["params"][best_index]
+    best_estimator = None
+    if refit and not math.isnan(best_score):
+        best_estimator = clone(pipeline).set_params(**best_params).fit(X_train, y)
+
+    result = SearchResult(
+        cv_results_=cv_results,
+        best_index_=best_index,
+        best_params_=best_params,
+        best_score_=best_score,
+        n_splits_=cv.get_n_splits(),
+        strategy=strategy,
+        wall_time_s=time.perf_counter() - t_start,
+        preprocess_fits=preprocess_fits,
+        budget_exhausted=executor.exhausted,
+        best_estimator_=best_estimator,
+        rounds=rounds,
+    )
+    if verbose:
+        print(
+            f"{strategy}: {len(candidates)} candidats, {preprocess_fits} fits de préprocessing, "
+            f"{result.wall_time_s:.1f}s — meilleur {best_score:.4f} {best_params}"
+            + (" (budget épuisé)" if result.budget_exhausted else "")
+        )
+    return result
+
+
+def _successive_halving(
+    executor: _Executor,
+    candidates: list[dict[str, Any]],
+    X_train: pd.DataFrame,
+    y: np.ndarray,
+    cv,
+    model_step: str,
+    warm_start: bool,
+    factor: int,
+    min_resources: Optional[int],
+    random_state: Optional[int],
+) -> tuple[dict[str, Any], list[dict[str, Any]], int]:
+    """
+    Ressource = lignes de train (sous-échantillon stratifié, CV sur le sous-échantillon).
+    Une ligne de cv_results_ par (candidat, tour), comme HalvingGridSearchCV.
+    """
+    n_samples = len(y)
+    n_splits = cv.get_n_splits()
+    n_rounds = 1 + int(math.log(max(len(candidates), 1), factor))
+    if min_resources is None:
+        min_resources = n_samples // factor ** (n_rounds - 1)
+    min_resources = max(min_resources, 2 * n_splits * len(np.unique(y)))
+
+    rows_params: list[dict[str, Any]] = []
+    rows_arr: list[dict[str, np.ndarray]] = []
+    iters: list[int] = []
+    resources: list[int] = []
+    rounds: list[dict[str, Any]] = []
+    preprocess_fits = 0
+    alive = list(range(len(candidates)))
+
+    for it in range(n_rounds):
+        n_res = n_samples if it == n_rounds - 1 else min(n_samples, min_resources * factor**it)
+        if n_res < n_samples:
+            sss = StratifiedShuffleSplit(n_splits=1, train_size=n_res, random_state=random_state)
+            sub = np.sort(next(sss.split(np.zeros(n_samples), y))[0])
+        else:
+            sub = np.arange(n_samples)
+        # indices du sous-échantillon ramenés aux positions dans X_train (workers)
+        folds = [(sub[tr], sub[va]) for tr, va in cv.split(X_train.iloc[sub], y[sub])]
+
+        round_cands = [candidates[i] for i in alive]
+        results = executor.run(_make_tasks(round_cands, folds, model_step, warm_start))
+        preprocess_fits += len(results)
+        arr = _aggregate(round_cands, results, n_splits)
+
+        rows_params.extend(round_cands)
+        rows_arr.append(arr)
+        iters.extend([it] * len(alive))
+        resources.extend([n_res] * len(alive))
+        rounds.append({"iter": it, "n_candidates": len(alive), "n_resources": int(n_res)})
+
+        if executor.exhausted or it == n_rounds - 1:
+            break
+        mean = np.nan_to_num(np.mean(arr["test_score"], axis=1), nan=-np.inf)
+        keep = max(1, math.ceil(len(alive) / factor))
+        alive = [alive[i] for i in np.argsort(-mean, kind="stable")[:keep]]
+
+    merged = {k: np.concatenate([a[k] for a in rows_arr]) for k in rows_arr[0]}
+    cv_results = _cv_results(
+        rows_params, merged, n_splits, iters=np.array(iters), n_resources=np.array(resources)
+    )
+    return cv_results, rounds, preprocess_fits
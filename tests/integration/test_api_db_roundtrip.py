@@ -45,3 +45,66 @@ def test_history_returns_rows(client, engine):
     data = r.json()
     assert isinstance(data, list)
     assert len(data) >= 2
+
+
+def test_predict_batch_logs_valid_rows_only(client, engine):
+    headers = {"X-API-Key": "test_key"}
+    rows = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+
+    before = _count_predictions(engine)
+
+    records = rows[:3] + [{"age": 35}]
+    r = client.post("/predict_batch", headers=headers, json={"records": records})
+    assert r.status_code == 200, r.text
+
+    data = r.json()
+    assert data["n_ok"] == 3
+    assert data["n_errors"] == 1
+    assert [it["ok"] for it in data["items"]] == [True, True, True, False]
+    assert data["items"][3]["error"]["missing_features"]
+
+    ids = [it["db_id"] for it in data["items"][:3]]
+    assert ids == sorted(ids)
+    assert _count_predictions(engine) == before + 3
+
+
+def test_predict_by_ids_streams_ndjson(client, engine):
+    headers = {"X-API-Key": "test_key"}
+
+    r = client.post("/predict_by_ids", headers=headers, json={"employee_ids": [1, 2, 999999]})
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in r.text.splitlines() if line]
+    by_id = {x["employee_id"]: x for x in lines if "employee_id" in x}
+    assert by_id[1]["ok"] and by_id[2]["ok"]
+    assert not by_id[999999]["ok"]
+    assert lines[-1]["summary"]["n_ok"] == 2
+    assert _count_predictions(engine) == 2
+
+
+def test_history_cursor_walks_all_rows_once(client, engine):
+    headers = {"X-API-Key": "test_key"}
+
+    payload = _load_one_valid_payload()
+    for _ in range(5):
+        client.post("/predict", headers=headers, json=payload)
+
+    seen = []
+    params = {"limit": 2, "include_payload": "false"}
+    while True:
+        r = client.get("/history", headers=headers, params=params)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        assert all(it["input_payload"] is None for it in page)
+        seen.extend(it["id"] for it in page)
+        if "x-next-cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["x-next-cursor"]
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == _count_predictions(engine)
+
+    r = client.get("/history/export", headers=headers, params={"format": "csv"})
+    assert r.status_code == 200, r.text
+    assert len(r.text.splitlines()) == len(seen) + 1
@@ -0,0 +1,67 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from technova_attrition.api.registry import get_registry
+from technova_attrition.api.routers import predict
+from technova_attrition.api.settings import reset_config_cache
+from technova_attrition.config import PATHS
+from technova_attrition.fast_scorer import load_compiled
+from technova_attrition.feature_store import iter_vector_chunks, refresh_feature_store
+
+VERSION = "test-feature-store"
+SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "refresh_feature_store.py"
+
+
+def test_refresh_pages_through_stale_employees(engine):
+    scorer = load_compiled(PATHS.models / "pipeline_compiled.json")
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM employee_feature_vectors WHERE model_version = :v"), {"v": VERSION}
+        )
+        n = conn.execute(text("SELECT COUNT(*) FROM employees")).scalar_one()
+    assert n > 3
+
+    with Session(engine) as db:
+        stats = refresh_feature_store(db, scorer, VERSION, chunk_size=3)
+        assert stats == {"refreshed": n, "chunks": -(-n // 3)}
+        # tout est à jour : aucune page relue
+        assert refresh_feature_store(db, scorer, VERSION, chunk_size=3)["refreshed"] == 0
+        assert refresh_feature_store(db, scorer, VERSION, full=True, chunk_size=3)["refreshed"] == n
+
+        ids = [i for chunk_ids, _ in iter_vector_chunks(db, scorer, VERSION) for i in chunk_ids]
+        assert len(ids) == len(set(ids)) == n
+
+
+@pytest.fixture()
+def served_defaults(monkeypatch):
+    # config par défaut : version et seuil issus de la carte du modèle / des artefacts
+    monkeypatch.delenv("MODEL_VERSION")
+    monkeypatch.delenv("MODEL_THRESHOLD")
+    monkeypatch.setenv("FEATURE_STORE", "1")
+    reset_config_cache()
+    get_registry.cache_clear()
+    yield
+    get_registry.cache_clear()
+
+
+def test_refresh_script_feeds_predict_by_id(served_defaults, engine, client, monkeypatch):
+    spec = importlib.util.spec_from_file_location("refresh_feature_store", SCRIPT)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    script.main(["--full"])
+
+    with engine.connect() as conn:
+        employee_id = conn.execute(text("SELECT MIN(employee_id) FROM employees")).scalar_one()
+
+    async def _no_raw_scoring(*args, **kwargs):
+        raise AssertionError("vecteur précalculé ignoré : re-scoring depuis les features brutes")
+
+    monkeypatch.setattr(predict, "_score", _no_raw_scoring)
+    r = client.post(f"/predict_by_id/{employee_id}", headers={"X-API-Key": "test_key"})
+
+    assert r.status_code == 200, r.text
+    assert r.json()["model_version"] == get_registry().current().version
@@ -0,0 +1,57 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "load_raw_to_postgres.py"
+TABLE = "test_raw_extrait"
+
+
+@pytest.fixture()
+def loader(monkeypatch, engine):
+    spec = importlib.util.spec_from_file_location("load_raw_to_postgres", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setitem(module.KEYS, TABLE, "code")
+    yield module
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{TABLE}"'))
+
+
+def _write(path: Path, rows: list[str]) -> Path:
+    path.write_text("\n".join(["Code,Note,Libellé", *rows]) + "\n", encoding="utf-8")
+    return path
+
+
+def _rows(engine) -> list[tuple]:
+    with engine.connect() as conn:
+        return [
+            tuple(r)
+            for r in conn.execute(text(f'SELECT code, note, libelle FROM "{TABLE}" ORDER BY code'))
+        ]
+
+
+def test_copy_replace_then_upsert(loader, engine, tmp_path):
+    first = _write(tmp_path / "a.csv", ["1,10,un", "2,,deux", "3,30,trois"])
+    assert loader.copy_csv_to_table(engine, TABLE, first, mode="replace", chunk_size=2) == 3
+    assert _rows(engine) == [(1, 10, "un"), (2, None, "deux"), (3, 30, "trois")]
+
+    # replace : la table est recréée, pas complétée
+    assert loader.copy_csv_to_table(engine, TABLE, first, mode="replace") == 3
+    assert len(_rows(engine)) == 3
+
+    # upsert : clé 2 mise à jour, 4 ajoutée ; doublon de clé dans un chunk -> dernière ligne
+    second = _write(tmp_path / "b.csv", ["2,20,deux-bis", "4,40,quatre", "4,41,quatre-bis"])
+    assert loader.copy_csv_to_table(engine, TABLE, second, mode="upsert", chunk_size=10) == 3
+    assert _rows(engine) == [
+        (1, 10, "un"),
+        (2, 20, "deux-bis"),
+        (3, 30, "trois"),
+        (4, 41, "quatre-bis"),
+    ]
+
+    # doublon réparti sur deux chunks : le chunk suivant écrase
+    third = _write(tmp_path / "c.csv", ["5,50,cinq", "5,51,cinq-bis"])
+    loader.copy_csv_to_table(engine, TABLE, third, mode="upsert", chunk_size=1)
+    assert _rows(engine)[-1] == (5, 51, "cinq-bis")
@@ -0,0 +1,80 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from technova_attrition.serving_db_ops import (
+    drop_prediction_partitions,
+    ensure_prediction_partitions,
+    list_prediction_partitions,
+    refresh_prediction_rollups,
+)
+
+
+def _insert(conn, created_at: str, proba: float, version: str = "test") -> None:
+    conn.execute(
+        text("""
+            INSERT INTO predictions
+              (created_at, input_payload, proba_depart, prediction, threshold, model_version)
+            VALUES (CAST(:ts AS TIMESTAMPTZ), CAST('{}' AS JSONB), :p, :pred, 0.5, :ver)
+        """),
+        {"ts": created_at, "p": proba, "pred": int(proba >= 0.5), "ver": version},
+    )
+
+
+def test_partitions_are_created_ahead_and_dropped_by_retention(engine):
+    ensure_prediction_partitions(engine, months_ahead=0, today=date(2001, 1, 15))
+    created = ensure_prediction_partitions(engine, months_ahead=2, today=date(2001, 2, 10))
+    assert created == ["predictions_y2001m02", "predictions_y2001m03", "predictions_y2001m04"]
+
+    with engine.begin() as conn:
+        _insert(conn, "2001-01-20T10:00:00+00", 0.2)
+    with engine.connect() as conn:
+        part = conn.execute(
+            text("SELECT tableoid::regclass::text FROM predictions WHERE created_at < '2001-02-01'")
+        ).scalar_one()
+    assert part == "predictions_y2001m01"
+
+    dropped = drop_prediction_partitions(engine, retention_months=3, today=date(2001, 4, 1))
+    assert dropped == ["predictions_y2001m01"]
+    names = [n for n, _ in list_prediction_partitions(engine)]
+    assert "predictions_y2001m01" not in names and "predictions_y2001m02" in names
+
+    drop_prediction_partitions(engine, retention_months=1, today=date(2001, 5, 1))
+
+
+def test_daily_rollups_count_and_histogram(engine):
+    ensure_prediction_partitions(engine, months_ahead=0, today=date(2002, 6, 1))
+    with engine.begin() as conn:
+        for p in (0.05, 0.15, 0.95, 1.0):
+            _insert(conn, "2002-06-03T12:00:00+00", p)
+        _insert(conn, "2002-06-03T12:00:00+00", 0.5, version="other")
+
+    stats = refresh_prediction_rollups(engine, since=date(2002, 6, 3), until=date(2002, 6, 3))
+    assert stats["count_rows"] == 2
+
+    with engine.connect() as conn:
+        counts = conn.execute(
+            text("""
+                SELECT n_predictions, n_positive FROM predictions_daily_counts
+                WHERE day = '2002-06-03' AND model_version = 'test'
+            """)
+        ).one()
+        hist = dict(
+            conn.execute(
+                text("""
+                    SELECT bucket, n FROM predictions_daily_histogram
+                    WHERE day = '2002-06-03' AND model_version = 'test'
+                """)
+            ).all()
+        )
+    assert tuple(counts) == (4, 2)
+    assert hist == {0: 1, 1: 1, 9: 2}
+
+    # rétention : plus de lignes brutes pour juin, le rollup du jour doit survivre au refresh
+    drop_prediction_partitions(engine, retention_months=1, today=date(2002, 7, 1))
+    refresh_prediction_rollups(engine, since=date(2002, 6, 1), until=date(2002, 6, 30))
+    with engine.connect() as conn:
+        kept = conn.execute(
+            text("SELECT COUNT(*) FROM predictions_daily_counts WHERE day = '2002-06-03'")
+        ).scalar_one()
+    assert kept == 2
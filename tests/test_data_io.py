@@ -1,6 +1,24 @@
+import hashlib
+import hmac
+import json
+
+import numpy as np
 import pandas as pd
+import pytest
 
-from technova_attrition.data_io import anonymize_employee_id, parse_eval_number
+from technova_attrition.data_io import (
+    anonymize_employee_id,
+    concat_chunks,
+    iter_eval,
+    join_sources,
+    load_eval,
+    load_sirh,
+    load_sondage,
+    parse_eval_number,
+)
+from technova_attrition.features import add_engineered_features
+from technova_attrition.preprocessing import build_preprocessor, make_feature_groups
+from technova_attrition.synthetic import make_raw_sources
 
 
 def test_parse_eval_number():
@@ -15,3 +33,158 @@ def test_anonymize_employee_id_stable():
     out = anonymize_employee_id(s, key=key)
     assert out.iloc[0] == out.iloc[2]
     assert out.iloc[0] != out.iloc[1]
+
+
+def _write_eval_csv(path, n):
+    rows = [
+        f"3,3,1,3,3,3,E_{i},3,{'Oui' if i % 2 else 'Non'},{11 + i % 3} %" for i in range(1, n + 1)
+    ]
+    header = (
+        "satisfaction_employee_environnement,note_evaluation_precedente,"
+        "niveau_hierarchique_poste,satisfaction_employee_nature_travail,"
+        "satisfaction_employee_equipe,satisfaction_employee_equilibre_pro_perso,"
+        "eval_number,note_evaluation_actuelle,heure_supplementaires,"
+        "augementation_salaire_precedente"
+    )
+    path.write_text("\n".join([header, *rows]) + "\n", encoding="utf-8")
+
+
+def test_load_eval_typed_schema(tmp_path):
+    path = tmp_path / "eval.csv"
+    _write_eval_csv(path, 10)
+
+    df = load_eval(path)
+    assert df["note_evaluation_actuelle"].dtype == "Int8"
+    assert isinstance(df["heure_supplementaires"].dtype, pd.CategoricalDtype)
+    assert df["eval_number_int"].tolist() == list(range(1, 11))
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_load_eval_keeps_missing_integers(tmp_path, engine):
+    path = tmp_path / "eval.csv"
+    _write_eval_csv(path, 4)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    lines[2] = "," + lines[2].split(",", 1)[1]  # satisfaction_employee_environnement vide
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    df = load_eval(path, engine=engine)
+    col = df["satisfaction_employee_environnement"]
+    assert col.dtype == "Int8"
+    assert col.isna().tolist() == [False, True, False, False]
+    assert load_eval(path, dtypes=None)["satisfaction_employee_environnement"].isna().sum() == 1
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_iter_eval_chunks_match_full_load(tmp_path, engine):
+    path = tmp_path / "eval.csv"
+    _write_eval_csv(path, 25)
+
+    chunks = list(iter_eval(path, chunksize=10, engine=engine))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+
+    out = concat_chunks(chunks)
+    full = load_eval(path)
+    assert isinstance(out["augementation_salaire_precedente"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(
+        out.astype({"augementation_salaire_precedente": str, "heure_supplementaires": str}),
+        full.astype({"augementation_salaire_precedente": str, "heure_supplementaires": str}),
+    )
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_iter_eval_column_empty_in_first_block(tmp_path, engine):
+    # > 1 Mo : le lecteur arrow lit plusieurs blocs, la colonne n'est remplie que dans le dernier
+    path = tmp_path / "eval.csv"
+    n = 50_000
+    _write_eval_csv(path, n)
+    header, *rows = path.read_text(encoding="utf-8").splitlines()
+    for i in range(n - 100):
+        parts = rows[i].split(",")
+        parts[4] = parts[8] = ""  # satisfaction_employee_equipe, heure_supplementaires
+        rows[i] = ",".join(parts)
+    path.write_text("\n".join([header, *rows]) + "\n", encoding="utf-8")
+
+    out = concat_chunks(iter_eval(path, chunksize=20_000, engine=engine))
+    assert out["satisfaction_employee_equipe"].dtype == "Int8"
+    assert out["satisfaction_employee_equipe"].notna().sum() == 100
+    assert out["heure_supplementaires"].notna().sum() == 100
+    assert set(out["heure_supplementaires"].cat.categories) == {"Oui", "Non"}
+
+
+def test_anonymize_employee_id_matches_hmac_format_and_uses_cache(tmp_path):
+    s = pd.Series([3, 1, 3, 2], name="id_employee")
+    key = "unit_test_secret"
+    expected = [
+        "emp_" + hmac.new(key.encode(), str(x).encode(), hashlib.sha256).hexdigest()[:16] for x in s
+    ]
+    cache = tmp_path / "anon_cache.json"
+
+    out = anonymize_employee_id(s, key=key, cache_path=cache)
+    assert out.tolist() == expected
+    assert out.name == "id_employee"
+    assert len(json.loads(cache.read_text())["tokens"]) == 3
+
+    # autre clé : le cache (empreinte différente) n'est pas réutilisé
+    other = anonymize_employee_id(s, key="another_secret", cache_path=cache)
+    assert other.iloc[0] != out.iloc[0]
+    assert anonymize_employee_id(s, key=key, cache_path=cache).tolist() == expected
+
+
+def _sources():
+    sirh = pd.DataFrame({"id_employee": [3, 1, 2, 4], "poste": ["a", "b", "a", "c"]})
+    eval_df = pd.DataFrame({"eval_number": ["E_2", "E_1", "E_3"], "note": [1, 2, 3]})
+    eval_df["eval_number_int"] = parse_eval_number(eval_df["eval_number"])
+    sondage = pd.DataFrame({"code_sondage": [1, 3, 4, 9], "dist": [1.0, 2.0, 3.0, 4.0]})
+    return sirh, eval_df, sondage
+
+
+@pytest.mark.parametrize("how", ["inner", "left"])
+def test_join_sources_hash_path_matches_chained_merge(how):
+    sirh, eval_df, sondage = _sources()
+    expected = sirh.merge(
+        eval_df, left_on="id_employee", right_on="eval_number_int", how=how
+    ).merge(sondage, left_on="id_employee", right_on="code_sondage", how=how)
+
+    out, stats = join_sources(sirh, eval_df, sondage, how=how, return_stats=True)
+    pd.testing.assert_frame_equal(out, expected)
+    assert stats.method == "hash"
+    assert stats.unmatched == {
+        "sirh_without_eval": 1,
+        "sirh_without_sondage": 1,
+        "eval_without_sirh": 0,
+        "sondage_without_sirh": 1,
+    }
+
+
+def test_join_sources_reports_duplicate_keys():
+    sirh, eval_df, sondage = _sources()
+    eval_df = pd.concat([eval_df, eval_df.iloc[[0]]], ignore_index=True)
+
+    out, stats = join_sources(sirh, eval_df, sondage, return_stats=True)
+    assert stats.method == "merge"
+    assert stats.duplicates == {"sirh": 0, "eval": 2, "sondage": 0}
+    assert stats.n_joined == len(out)
+
+
+def test_typed_loaders_feed_features_and_preprocessor(tmp_path):
+    sirh, eval_df, sondage = make_raw_sources(300, seed=3)
+    # valeurs manquantes : ordinale (Int8 -> <NA>) et catégorie mêlée aux ordinales
+    eval_df.loc[:4, "satisfaction_employee_equipe"] = np.nan
+    sondage.loc[5:9, "frequence_deplacement"] = np.nan
+    paths = {name: tmp_path / f"{name}.csv" for name in ("sirh", "eval", "sondage")}
+    for name, df in zip(paths, (sirh, eval_df, sondage)):
+        df.to_csv(paths[name], index=False)
+
+    def matrix(**kwargs):
+        df = join_sources(
+            load_sirh(paths["sirh"], **kwargs),
+            load_eval(paths["eval"], **kwargs),
+            load_sondage(paths["sondage"], **kwargs),
+        )
+        df = add_engineered_features(df)
+        groups = make_feature_groups(df, target="a_quitte_l_entreprise")
+        return build_preprocessor(groups).fit_transform(df.drop(columns="a_quitte_l_entreprise"))
+
+    typed = matrix()
+    assert typed.shape[0] == 300 and not np.isnan(typed).any()
+    np.testing.assert_array_equal(typed, matrix(dtypes=None))
@@ -24,3 +24,23 @@ def test_add_engineered_features_basic():
     assert float(out["augmentation_salaire_precedente"].iloc[0]) == 0.15
     assert "changement_poste" in out.columns
     assert "evolution_note" in out.columns
+
+
+def test_add_engineered_features_inplace_and_chunks_match_copy():
+    from technova_attrition.features import iter_engineered_features
+    from technova_attrition.synthetic import make_joined
+
+    df = make_joined(500, seed=1)
+    expected = add_engineered_features(df, drop_constants=False)
+
+    work = df.copy()
+    out = add_engineered_features(work, copy=False, drop_constants=False)
+    assert out is work
+    pd.testing.assert_frame_equal(out, expected)
+
+    parts = (df.iloc[i : i + 200].copy() for i in range(0, 500, 200))
+    chunks = list(iter_engineered_features(parts))
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+    # colonnes constantes (nombre_heures_travailless, ayant_enfants) supprimées par défaut
+    assert "ayant_enfants" not in add_engineered_features(df).columns
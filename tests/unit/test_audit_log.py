@@ -0,0 +1,82 @@
+from technova_attrition.api import audit_log
+from technova_attrition.api.audit_log import DROPPED, QUEUED, SYNC_FALLBACK, PredictionWriter
+
+
+class _FakeResult:
+    def __init__(self, n):
+        self._n = n
+
+    def fetchall(self):
+        return [(i,) for i in range(self._n)]
+
+
+class _FakeSession:
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = []
+
+    def execute(self, _stmt, params):
+        n = sum(1 for k in params if k.startswith("proba_"))
+        self.pending.append(n)
+        return _FakeResult(n)
+
+    def commit(self):
+        self.sink.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+def _row(i):
+    return {
+        "employee_id": None,
+        "input_payload": {"age": 30 + i},
+        "proba": 0.5,
+        "pred": 1,
+        "thr": 0.5,
+        "ver": "test",
+    }
+
+
+def test_writer_flushes_in_batches_and_drains_on_stop():
+    committed = []
+    writer = PredictionWriter(lambda: _FakeSession(committed), batch_size=2, flush_interval_s=0.01)
+    writer.start()
+    assert all(writer.submit(_row(i)) == QUEUED for i in range(5))
+    writer.stop()
+
+    assert sum(committed) == 5
+    assert max(committed) <= 2
+    assert writer.stats["flushed"] == 5
+    assert writer.qsize() == 0
+
+
+def test_backpressure_policies_when_queue_is_full():
+    sync_writer = PredictionWriter(lambda: None, maxsize=1, backpressure="sync")
+    assert sync_writer.submit(_row(0)) == QUEUED
+    assert sync_writer.submit(_row(1)) == SYNC_FALLBACK
+
+    drop_writer = PredictionWriter(lambda: None, maxsize=1, backpressure="drop")
+    drop_writer.submit(_row(0))
+    assert drop_writer.submit(_row(1)) == DROPPED
+    assert drop_writer.stats["dropped"] == 1
+
+
+class _FailingSession(_FakeSession):
+    def commit(self):
+        raise RuntimeError("db down")
+
+
+def test_flush_retries_without_sleeping_after_last_attempt(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(audit_log.time, "sleep", sleeps.append)
+    writer = PredictionWriter(lambda: _FailingSession([]), max_retries=3)
+
+    writer._flush([_row(0), _row(1)])
+
+    assert len(sleeps) == 2  # entre les tentatives uniquement
+    assert writer.stats["failed"] == 2
@@ -0,0 +1,27 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "bench_pipeline.py"
+META = {"created_at": "2026-01-01T00:00:00+00:00", "csv_engine": "c", "pandas": "x", "python": "x"}
+
+
+@pytest.fixture(scope="module")
+def bench():
+    spec = importlib.util.spec_from_file_location("bench_pipeline", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_run_size_measures_every_stage(bench, tmp_path, engine):
+    fit_max_rows = {"fit_logreg": 10_000, "fit_random_forest": 100}
+    results = bench.run_size(500, 0, list(bench.STAGES), fit_max_rows, engine, tmp_path)
+
+    measured = [s for s in bench.STAGES if s != "fit_random_forest"]
+    assert all(results[s]["seconds"] >= 0 for s in measured)
+    assert results["fit_random_forest"] == {"skipped": "n > 100"}
+    assert list(tmp_path.iterdir()) == []  # extraits CSV supprimés
+    assert "`fit_logreg`" in bench.to_markdown({"meta": META, "sizes": {"500": results}})
@@ -0,0 +1,65 @@
+import pytest
+
+from technova_attrition.checkpoints import StageCache, source_digest
+
+
+def _stage(calls, content="a"):
+    def fn(out):
+        calls.append(content)
+        (out / "data.txt").write_text(content, encoding="utf-8")
+        return {"n": len(content)}
+
+    return fn
+
+
+def test_stage_is_skipped_when_inputs_unchanged(tmp_path):
+    calls = []
+    cache = StageCache(tmp_path)
+    first = cache.run("fit", {"params": 1}, _stage(calls))
+    again = cache.run("fit", {"params": 1}, _stage(calls))
+    other = cache.run("fit", {"params": 2}, _stage(calls))
+
+    assert calls == ["a", "a"]
+    assert again.cached and again.digest == first.digest
+    assert not other.cached and other.directory != first.directory
+    # même contenu produit -> même empreinte : les étapes aval restent en cache
+    assert other.digest == first.digest
+
+
+def test_crashed_stage_is_rerun_and_upstream_reused(tmp_path):
+    calls = []
+    cache = StageCache(tmp_path)
+    up = cache.run("split", {"seed": 0}, _stage(calls, "split"))
+
+    def crash(out):
+        (out / "partial.bin").write_bytes(b"x")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.run("fit", {"split": up.digest}, crash)
+    assert not list((tmp_path / "fit").iterdir())  # rien de partiel n'est gardé
+
+    up2 = StageCache(tmp_path).run("split", {"seed": 0}, _stage(calls, "split"))
+    res = StageCache(tmp_path).run("fit", {"split": up2.digest}, _stage(calls, "fit"))
+    assert up2.cached and not res.cached
+    assert calls == ["split", "fit"]
+
+    # sortie modifiée à la main -> l'étape est rejouée
+    res.path("data.txt").write_text("altéré", encoding="utf-8")
+    assert not StageCache(tmp_path).run("fit", {"split": up2.digest}, _stage(calls, "fit")).cached
+
+
+def test_code_change_invalidates_stage(tmp_path):
+    calls = []
+    module = tmp_path / "preprocessing.py"
+    module.write_text("SCALE = 1\n", encoding="utf-8")
+
+    def inputs():
+        return {"params": 1, "code": source_digest(module)}
+
+    assert not StageCache(tmp_path / "c").run("fit", inputs(), _stage(calls, "fit")).cached
+    assert StageCache(tmp_path / "c").run("fit", inputs(), _stage(calls, "fit")).cached
+
+    module.write_text("SCALE = 2\n", encoding="utf-8")
+    assert not StageCache(tmp_path / "c").run("fit", inputs(), _stage(calls, "fit")).cached
+    assert calls == ["fit", "fit"]
@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from technova_attrition.fast_explainer import LinearExplainer, build_linear_explainer
+from technova_attrition.fast_scorer import CompiledScorer, compile_pipeline
+
+SAMPLE_PATH = Path("data/processed/api_test/X_test_sample.json")
+PIPELINE_PATH = Path("models/pipeline.joblib")
+
+
+@pytest.fixture(scope="module")
+def setup():
+    pipe = joblib.load(PIPELINE_PATH)
+    rows = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+    scorer = CompiledScorer(compile_pipeline(pipe))
+    return pipe, rows, scorer
+
+
+@pytest.mark.parametrize("method", ["kmeans", "sample"])
+def test_contributions_sum_to_logit_and_are_ranked(setup, method):
+    pipe, rows, scorer = setup
+    X = pd.DataFrame(rows)
+    artifact = json.loads(json.dumps(build_linear_explainer(pipe, X, method=method, n_summary=4)))
+    explainer = LinearExplainer(artifact, scorer)
+
+    logits = np.log(pipe.predict_proba(X)[:, 1] / pipe.predict_proba(X)[:, 0])
+    full = explainer.contributions(rows)
+    np.testing.assert_allclose(explainer.base_value + full.sum(axis=1), logits, atol=1e-9)
+
+    out = explainer.explain_many(rows, top_k=5)
+    for row, expl in zip(rows, out):
+        contribs = [c["contribution"] for c in expl["contributions"]]
+        assert len(contribs) == 5
+        assert contribs == sorted(contribs, key=abs, reverse=True)
+        assert all(c["feature"] in pipe.feature_names_in_ for c in expl["contributions"])
+        assert all(row[c["feature"]] == c["value"] for c in expl["contributions"])
+
+
+def test_kmeans_summary_keeps_background_mean(setup):
+    pipe, rows, scorer = setup
+    X = pd.DataFrame(rows)
+    artifact = build_linear_explainer(pipe, X, method="kmeans", n_summary=3)
+    np.testing.assert_allclose(artifact["mean"], scorer.transform_many(rows).mean(axis=0))
+
+
+def test_explainer_from_another_model_is_rejected(setup):
+    pipe, rows, scorer = setup
+    artifact = build_linear_explainer(pipe, pd.DataFrame(rows), method="sample", n_summary=2)
+    other = CompiledScorer({**scorer.artifact, "coef": [0.0] * len(scorer.coef)})
+    with pytest.raises(ValueError, match="désynchronisé"):
+        LinearExplainer(artifact, other)
@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from technova_attrition.fast_scorer import CompiledScorer, compile_pipeline, load_compiled
+from technova_attrition.normalization import records_to_frame
+
+SAMPLE_PATH = Path("data/processed/api_test/X_test_sample.json")
+PIPELINE_PATH = Path("models/pipeline.joblib")
+COMPILED_PATH = Path("models/pipeline_compiled.json")
+FEATURES_PATH = Path("models/expected_features.json")
+
+
+def _rows() -> list[dict]:
+    rows = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+    # cas limites : catégories inconnues + valeurs manquantes (imputation)
+    odd = dict(rows[0], poste="Inconnu", frequence_deplacement="Jamais", age=None)
+    odd["statut_marital"] = None  # nominale
+    missing = [
+        dict(rows[1], satisfaction_employee_equipe=None),  # ordinale numérique
+        dict(rows[2], poste=None),  # nominale
+        dict(rows[3], frequence_deplacement=None),  # ordinale texte
+        dict(rows[4], statut_marital=float("nan")),
+    ]
+    return rows + [odd, *missing]
+
+
+def _frame(rows: list[dict]) -> pd.DataFrame:
+    # même construction que le service (None -> NaN, imputé par sklearn)
+    features = json.loads(FEATURES_PATH.read_text(encoding="utf-8"))
+    return records_to_frame(rows, features)
+
+
+def test_compiled_scorer_matches_sklearn_pipeline():
+    pipe = joblib.load(PIPELINE_PATH)
+    rows = _rows()
+    X = _frame(rows)
+
+    # round-trip JSON : on teste l'artefact tel qu'il est écrit sur disque
+    scorer = CompiledScorer(json.loads(json.dumps(compile_pipeline(pipe))))
+
+    expected = pipe.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(scorer.predict_proba_many(rows), expected, rtol=0, atol=1e-12)
+
+    Xt = pipe.named_steps["preprocess"].transform(X)
+    np.testing.assert_allclose(scorer.transform_many(rows), Xt, rtol=0, atol=1e-12)
+    assert len(scorer.output_sources) == Xt.shape[1]
+
+
+def test_compiled_scorer_matches_single_row_scoring():
+    # 1 ligne : colonne d'une seule valeur manquante -> float64 côté DataFrame
+    pipe = joblib.load(PIPELINE_PATH)
+    scorer = load_compiled(COMPILED_PATH)
+    for row in _rows()[-5:]:
+        expected = pipe.predict_proba(_frame([row]))[0, 1]
+        assert abs(scorer.predict_proba_one(row) - expected) <= 1e-12
+
+
+def test_versioned_compiled_artifact_is_in_sync_with_pipeline():
+    pipe = joblib.load(PIPELINE_PATH)
+    rows = _rows()
+
+    scorer = load_compiled(COMPILED_PATH)
+
+    expected = pipe.predict_proba(_frame(rows))[:, 1]
+    np.testing.assert_allclose(scorer.predict_proba_many(rows), expected, rtol=0, atol=1e-12)
+
+
+def test_precomputed_vectors_score_like_fast_path():
+    # feature store : proba = sigmoïde(vecteur @ coef + intercept)
+    scorer = load_compiled(COMPILED_PATH)
+    rows = _rows()
+
+    # listes Python, comme relues depuis une colonne DOUBLE PRECISION[]
+    vectors = [list(v) for v in scorer.transform_many(rows)]
+    np.testing.assert_allclose(
+        scorer.predict_proba_transformed(vectors),
+        scorer.predict_proba_many(rows),
+        rtol=0,
+        atol=1e-12,
+    )
+
+    # l'empreinte ne dépend que du préprocessing : des coefficients différents la conservent
+    other = json.loads(COMPILED_PATH.read_text(encoding="utf-8"))
+    other["coef"] = [0.0] * len(other["coef"])
+    assert CompiledScorer(other).preprocess_hash == scorer.preprocess_hash
+    other["blocks"][0]["impute"] = None
+    assert CompiledScorer(other).preprocess_hash != scorer.preprocess_hash
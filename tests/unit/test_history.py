@@ -0,0 +1,84 @@
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from technova_attrition.api.history import (
+    build_history_query,
+    decode_cursor,
+    encode_cursor,
+    fetch_history_page,
+    to_csv,
+)
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def _row(i, payload=True):
+    row = (i, T0 - timedelta(seconds=i), None, 0.25, 0, 0.5, "test")
+    return row + ({"age": 30},) if payload else row
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def execute(self, stmt, params):
+        self.calls.append((str(stmt), params))
+        return _FakeResult(self.rows[: params["limit"]])
+
+
+def test_cursor_roundtrip_and_invalid_cursor():
+    assert decode_cursor(encode_cursor(T0, 42)) == (T0, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("pas-un-curseur")
+
+
+def test_keyset_query_without_payload():
+    cursor = encode_cursor(T0, 42)
+    q, params = build_history_query(employee_id=7, cursor=cursor, limit=10, include_payload=False)
+    sql = str(q)
+    assert "input_payload" not in sql
+    assert "(created_at, id) < (:c_ts, :c_id)" in sql
+    assert sql.endswith("ORDER BY created_at DESC, id DESC LIMIT :limit")
+    assert params == {"employee_id": 7, "c_ts": T0, "c_id": 42, "limit": 10}
+
+
+def test_page_returns_next_cursor_only_when_rows_remain():
+    db = _FakeSession([_row(i) for i in range(1, 6)])
+
+    items, next_cursor = fetch_history_page(db, limit=3)
+    assert [it["id"] for it in items] == [1, 2, 3]
+    assert decode_cursor(next_cursor) == (T0 - timedelta(seconds=3), 3)
+    assert db.calls[0][1]["limit"] == 4  # une ligne de plus pour détecter la suite
+
+    items, next_cursor = fetch_history_page(db, limit=5)
+    assert len(items) == 5 and next_cursor is None
+
+
+def test_csv_export_serializes_payload_as_json():
+    items = [
+        {
+            "id": 1,
+            "created_at": T0.isoformat(),
+            "employee_id": None,
+            "proba_depart": 0.25,
+            "prediction": 0,
+            "threshold": 0.5,
+            "model_version": "test",
+            "input_payload": {"age": 30},
+        }
+    ]
+    rows = list(csv.reader(io.StringIO("".join(to_csv(iter(items))))))
+    assert rows[0][-1] == "input_payload"
+    assert rows[1][0] == "1" and rows[1][-1] == '{"age": 30}'
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from technova_attrition.features import add_engineered_features
+from technova_attrition.importance import grouped_permutation_importance
+from technova_attrition.modeling import make_logreg
+from technova_attrition.preprocessing import make_feature_groups
+from technova_attrition.synthetic import make_joined
+
+TARGET = "a_quitte_l_entreprise"
+SATISFACTION = [
+    "satisfaction_employee_environnement",
+    "satisfaction_employee_nature_travail",
+    "satisfaction_employee_equipe",
+    "satisfaction_employee_equilibre_pro_perso",
+]
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = add_engineered_features(make_joined(400, seed=3))
+    X, y = df.drop(columns=[TARGET]), df[TARGET].astype(int)
+    pipe = make_logreg(make_feature_groups(df, target=TARGET)).set_params(model__random_state=0)
+    return pipe.fit(X, y), X, y
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_transformed_space_matches_raw_permutation(data):
+    pipe, X, y = data
+    kw = dict(n_repeats=4, min_repeats=4, rtol=0.0, atol=0.0, random_state=0)
+    fast = grouped_permutation_importance(pipe, X, y, space="auto", **kw)
+    raw = grouped_permutation_importance(pipe, X, y, space="raw", **kw)
+
+    assert (fast.space, raw.space) == ("transformed", "raw")
+    assert fast.baseline_score == pytest.approx(raw.baseline_score)
+    a = fast.importances.set_index("feature")
+    b = raw.importances.set_index("feature").loc[a.index]
+    np.testing.assert_allclose(a["importance_mean"], b["importance_mean"], atol=1e-12)
+    # colonne ignorée par le préprocessing : aucune réévaluation du modèle
+    assert a.loc["eval_number", "n_repeats"] == 0
+    assert fast.n_evaluations < raw.n_evaluations
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_groups_and_early_stopping(data):
+    pipe, X, y = data
+    res = grouped_permutation_importance(
+        pipe, X, y, groups={"satisfaction": SATISFACTION}, n_repeats=30, min_repeats=5
+    )
+    df = res.importances.set_index("feature")
+
+    assert "satisfaction" in df.index
+    assert not set(SATISFACTION) & set(df.index)
+    assert df.loc["satisfaction", "columns"] == SATISFACTION
+    assert df["n_repeats"].between(0, 30).all()
+    assert df["n_repeats"].min() < 30  # des unités s'arrêtent avant le maximum
+    assert df["importance_mean"].is_monotonic_decreasing
+
+    with pytest.raises(ValueError):
+        grouped_permutation_importance(
+            pipe, X, y, groups={"a": SATISFACTION[:2], "b": SATISFACTION[1:]}
+        )
@@ -0,0 +1,66 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "load_raw_to_postgres.py"
+
+
+@pytest.fixture(scope="module")
+def loader():
+    spec = importlib.util.spec_from_file_location("load_raw_to_postgres", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_sanitize_column(loader):
+    assert loader.sanitize_column(" Année d'expérience ") == "annee_d_experience"
+    assert loader.sanitize_column("2nd note") == "col_2nd_note"
+
+
+def test_infer_schema_types_and_nullable_dtypes(loader, tmp_path):
+    path = tmp_path / "extrait.csv"
+    path.write_text(
+        "Id Employé,Âge,Revenu,Ratio,Actif,Poste\n"
+        "1,41,5993,0.5,True,Cadre\n"
+        "2,,5130,,False,Consultant\n"
+        "3,37,,1.25,True,\n",
+        encoding="utf-8",
+    )
+
+    raw_cols, pg_types, dtypes = loader.infer_schema(path, sample_rows=100)
+
+    assert raw_cols == ["Id Employé", "Âge", "Revenu", "Ratio", "Actif", "Poste"]
+    assert pg_types == {
+        "id_employe": "BIGINT",
+        "age": "BIGINT",  # float à cause du vide, mais entier : reste BIGINT
+        "revenu": "BIGINT",
+        "ratio": "DOUBLE PRECISION",
+        "actif": "BOOLEAN",
+        "poste": "TEXT",
+    }
+    assert dtypes == {
+        "Id Employé": "Int64",
+        "Âge": "Int64",
+        "Revenu": "Int64",
+        "Ratio": "Float64",
+        "Actif": "boolean",
+        "Poste": "string",
+    }
+
+    chunks = list(loader.iter_csv_chunks(path, dtypes, chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert list(chunks[0].columns) == list(pg_types)
+    assert chunks[0]["age"].isna().tolist() == [False, True]
+
+
+def test_infer_schema_sample_limits_inference(loader, tmp_path):
+    path = tmp_path / "extrait.csv"
+    path.write_text("code,val\n1,10\n2,11\n3,douze\n", encoding="utf-8")
+
+    _, pg_types, dtypes = loader.infer_schema(path, sample_rows=2)
+    assert pg_types["val"] == "BIGINT"
+    # ligne hors échantillon incompatible : erreur explicite au chargement du chunk
+    with pytest.raises((ValueError, TypeError)):
+        list(loader.iter_csv_chunks(path, dtypes, chunk_size=10))
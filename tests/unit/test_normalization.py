@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from technova_attrition.cleaning import yes_no_to_int
+from technova_attrition.features import add_engineered_features
+from technova_attrition.normalization import (
+    _MEMO,
+    normalize_records,
+    records_to_frame,
+)
+
+
+def test_normalize_records_single_and_batch_share_rules():
+    payloads = [
+        {
+            "genre": " homme ",
+            "heure_supplementaires": "Oui",
+            "augementation_salaire_precedente": 0.11,
+        },
+        {
+            "genre": "F",
+            "heure_supplementaires": False,
+            "augementation_salaire_precedente": "12%",
+        },
+        {"genre": 1, "heure_supplementaires": "?", "age": 30},
+    ]
+    batch = normalize_records(payloads)
+    single = [normalize_records([p])[0] for p in payloads]
+
+    assert batch == single
+    assert batch[0] == {
+        "genre": 1,
+        "heure_supplementaires": 1,
+        "augementation_salaire_precedente": "11 %",
+    }
+    assert batch[1]["augementation_salaire_precedente"] == "12 %"
+    assert batch[2]["heure_supplementaires"] == "?"  # inconnu : laissé tel quel
+    assert payloads[0]["genre"] == " homme "  # entrée non modifiée
+
+
+def test_yes_no_rules_match_training_cleaning():
+    raw = ["oui", "Non", "yes", "N", "true", "0", "peut-être"]
+    served = [
+        p["heure_supplementaires"]
+        for p in normalize_records([{"heure_supplementaires": v} for v in raw])
+    ]
+    trained = yes_no_to_int(pd.Series(raw)).tolist()
+
+    assert served[:-1] == trained[:-1]
+    assert pd.isna(trained[-1]) and served[-1] == "peut-être"
+
+
+def test_percent_and_genre_rules_match_training_features():
+    raw = ["11 %", "12%", 0.13, 14, "0.15"]
+    served = [
+        p["augementation_salaire_precedente"]
+        for p in normalize_records([{"augementation_salaire_precedente": v} for v in raw])
+    ]
+    trained = add_engineered_features(
+        pd.DataFrame({"augmentation_salaire_precedente": raw, "genre": ["f", " M ", "F", "m", "M"]})
+    )
+
+    assert served == ["11 %", "12 %", "13 %", "14 %", "15 %"]
+    np.testing.assert_allclose(
+        trained["augmentation_salaire_precedente"], [0.11, 0.12, 0.13, 0.14, 0.15]
+    )
+    assert trained["genre"].tolist() == [0, 1, 0, 1, 1]
+
+
+def test_floats_are_not_memoized():
+    memo = _MEMO["augementation_salaire_precedente"]
+    memo.clear()
+    out = normalize_records([{"augementation_salaire_precedente": v} for v in (0.11, float("nan"))])
+
+    assert out[0]["augementation_salaire_precedente"] == "11 %"
+    assert np.isnan(out[1]["augementation_salaire_precedente"])
+    assert memo == {}
+
+
+def test_records_to_frame_typed_columns():
+    X = records_to_frame([{"age": 35, "poste": "Manager"}, {"age": None}], ["age", "poste", "x"])
+
+    assert X["age"].dtype == np.float64
+    assert np.isnan(X.loc[1, "age"])
+    assert X.loc[0, "poste"] == "Manager"
+    assert isinstance(X.loc[1, "poste"], float)  # NaN (et non None) : imputé par sklearn
+    assert X["x"].isna().all()
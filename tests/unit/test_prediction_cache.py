@@ -0,0 +1,49 @@
+from technova_attrition.api.prediction_cache import PredictionCache, payload_key
+from technova_attrition.api.service import normalize_payload
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_payload_key_is_canonical_after_normalization():
+    a = normalize_payload({"genre": "M", "age": 30, "heure_supplementaires": "Oui"})
+    b = normalize_payload({"heure_supplementaires": "oui", "age": 30, "genre": 1})
+    assert payload_key(a, "v1") == payload_key(b, "v1")
+    assert payload_key(a, "v1") != payload_key(a, "v2")
+    assert payload_key(a, "v1") != payload_key(a, "v1", employee_id=7)
+
+
+def test_lru_eviction_and_ttl_expiration():
+    clock = _Clock()
+    cache = PredictionCache(max_size=2, ttl_s=10, clock=clock)
+    cache.put("a", 0.1)
+    cache.put("b", 0.2)
+    assert cache.get("a").proba == 0.1  # "a" devient le plus récent
+    cache.put("c", 0.3)  # évince "b"
+    assert cache.get("b") is None
+
+    clock.now = 11
+    assert cache.get("a") is None
+
+    stats = cache.snapshot()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert (stats["evictions"], stats["expirations"], stats["size"]) == (1, 1, 1)
+
+
+def test_cache_is_cleared_when_artifacts_token_changes():
+    clock = _Clock()
+    token = {"v": ("pipeline-mtime-1", 0.5)}
+    cache = PredictionCache(ttl_s=0, token_fn=lambda: token["v"], check_interval_s=1, clock=clock)
+    cache.put("a", 0.1)
+    assert cache.get("a") is not None
+
+    token["v"] = ("pipeline-mtime-1", 0.4)  # seuil modifié
+    assert cache.get("a") is not None  # jeton relu au plus toutes les check_interval_s
+    clock.now = 2
+    assert cache.get("a") is None
+    assert cache.snapshot()["invalidations"] == 1
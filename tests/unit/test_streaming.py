@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from technova_attrition.fast_scorer import CompiledScorer, compile_pipeline
+from technova_attrition.features import add_engineered_features
+from technova_attrition.preprocessing import build_preprocessor, make_feature_groups
+from technova_attrition.streaming import (
+    QuantileSketch,
+    build_stream_preprocessor,
+    fit_stream_stats,
+    parquet_files,
+    train_streaming,
+)
+from technova_attrition.synthetic import make_joined
+
+TARGET = "a_quitte_l_entreprise"
+
+
+@pytest.fixture(scope="module")
+def parquet(tmp_path_factory):
+    df = add_engineered_features(make_joined(1200, seed=5))
+    df.loc[df.sample(frac=0.05, random_state=1).index, "age"] = np.nan
+    path = tmp_path_factory.mktemp("stream") / "features.parquet"
+    df.to_parquet(path, row_group_size=250)
+    return df, path
+
+
+def _dense(X):
+    return X.toarray() if hasattr(X, "toarray") else X
+
+
+def test_stream_preprocessor_matches_in_memory_fit(parquet):
+    df, path = parquet
+    X = df.drop(columns=[TARGET])
+    stats = fit_stream_stats(parquet_files(path), TARGET, test_size=0.0)
+    pre = build_stream_preprocessor(stats, X.head(5))
+    ref = build_preprocessor(make_feature_groups(df, target=TARGET)).fit(X)
+
+    # pas de compaction du sketch à cette taille : médianes exactes
+    assert list(pre.get_feature_names_out()) == list(ref.get_feature_names_out())
+    np.testing.assert_allclose(_dense(pre.transform(X)), _dense(ref.transform(X)), atol=1e-9)
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_streaming_pipeline_is_servable(parquet):
+    df, path = parquet
+    res = train_streaming(path, TARGET, epochs=2, verbose=False)
+    X = df.drop(columns=[TARGET]).head(20)
+
+    assert list(res.pipeline.feature_names_in_) == res.stats.feature_names
+    assert res.metrics["n_train"] + res.metrics["n_test"] == len(df)
+    scorer = CompiledScorer(compile_pipeline(res.pipeline))
+    np.testing.assert_allclose(
+        scorer.predict_proba_many(X.to_dict("records")),
+        res.pipeline.predict_proba(X)[:, 1],
+        atol=1e-9,
+    )
+
+
+def test_quantile_sketch_bounded_memory_and_accuracy():
+    values = np.random.default_rng(0).lognormal(size=200_000)
+    sketch = QuantileSketch(k=512)
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+
+    assert sum(level.size for level in sketch.levels) < 512 * len(sketch.levels)
+    # erreur de rang < 1 %
+    rank = (values < sketch.median()).mean()
+    assert abs(rank - 0.5) < 0.01
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import StratifiedKFold
+
+from technova_attrition.features import add_engineered_features
+from technova_attrition.modeling import make_logreg
+from technova_attrition.preprocessing import make_feature_groups
+from technova_attrition.synthetic import make_joined
+from technova_attrition.tuning import run_grid_search, run_search, summarize_grid_search
+
+TARGET = "a_quitte_l_entreprise"
+GRID = {"model__C": [0.01, 0.1, 1.0], "model__l1_ratio": [0.0, 0.5]}
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = add_engineered_features(make_joined(400, seed=3))
+    pipe = make_logreg(make_feature_groups(df, target=TARGET)).set_params(model__random_state=0)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=0)
+    return pipe, df.drop(columns=[TARGET]), df[TARGET].astype(int), cv
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_cached_search_matches_grid_search(data):
+    pipe, X, y, cv = data
+    gs = run_grid_search(pipe, GRID, X, y, cv, n_jobs=1, verbose=0)
+    res = run_search(pipe, GRID, X, y, cv, n_jobs=1, warm_start=False, refit=False, verbose=0)
+
+    # préprocessing ajusté une fois par fold, pas par candidat
+    assert res.preprocess_fits == 3
+    np.testing.assert_allclose(
+        res.cv_results_["mean_test_score"], gs.cv_results_["mean_test_score"], atol=1e-6
+    )
+    for summary in (summarize_grid_search(gs), summarize_grid_search(res)):
+        assert summary["rank_test_score"].is_monotonic_increasing
+        assert (summary["wall_time_s"] > 0).all()
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_halving_keeps_best_candidates_on_full_train(data):
+    pipe, X, y, cv = data
+    res = run_search(pipe, GRID, X, y, cv, strategy="halving", factor=2, n_jobs=1, verbose=0)
+
+    assert [r["n_candidates"] for r in res.rounds] == [6, 3, 2]
+    assert res.rounds[-1]["n_resources"] == len(y)
+    best = res.best_index_
+    assert res.cv_results_["iter"][best] == 2
+    assert res.best_params_["model__C"] in GRID["model__C"]
+    assert res.best_estimator_ is not None
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_process_pool_and_warm_start_match_sequential(data):
+    pipe, X, y, cv = data
+    kw = dict(refit=False, verbose=0)
+    seq = run_search(pipe, GRID, X, y, cv, n_jobs=1, warm_start=False, **kw)
+    pool = run_search(pipe, GRID, X, y, cv, n_jobs=2, warm_start=False, **kw)
+    warm = run_search(pipe, GRID, X, y, cv, n_jobs=1, warm_start=True, **kw)
+
+    np.testing.assert_allclose(
+        pool.cv_results_["mean_test_score"], seq.cv_results_["mean_test_score"], atol=1e-9
+    )
+    # warm start : même optimum, à la tolérance du solveur près
+    np.testing.assert_allclose(
+        warm.cv_results_["mean_test_score"], seq.cv_results_["mean_test_score"], atol=1e-3
+    )
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_exhausted_budget_leaves_nan_scores(data):
+    pipe, X, y, cv = data
+    res = run_search(pipe, GRID, X, y, cv, n_jobs=1, budget_s=0.0, refit=False, verbose=0)
+
+    assert res.budget_exhausted
+    assert np.isnan(res.cv_results_["mean_test_score"]).all()
+    assert (res.cv_results_["rank_test_score"] == 1).all()